@@ -26,10 +26,43 @@ COMMAND_TOKEN: str = ":"
 SOCKET_HOST_DEFAULT: str = "localIpAddr"
 SOCKET_PORT_DEFAULT: int = 10_000
 SOCKET_MAX_CONNECTIONS: int = 5
-SOCKET_MAX_MESSAGE_QUEUE_PER_WORKER: int = 1000
+SOCKET_MAX_MESSAGE_QUEUE_PER_WORKER: int = 1000  # per broadcaster shard
+SOCKET_BROADCASTER_SHARDS: int = 4  # broadcaster threads, messages are sharded by destination
+SOCKET_OUTBOUND_HIGH_WATERMARK: int = 1024 * 1024  # bytes queued to a client before it counts as a slow consumer
+SOCKET_OUTBOUND_LOW_WATERMARK: int = 1024 * 256   # bytes queued below which a slow consumer is served normally again
+SOCKET_OUTBOUND_MAX_IOV: int = 64  # frames written per sendmsg call
+SOCKET_SLOW_CONSUMER_POLICY: str = "drop_oldest"  # drop_oldest | disconnect | spill
+SOCKET_OFFLINE_STORE_MAX_FRAMES: int = 1000  # frames spilled per user before a slow consumer is disconnected
 SOCKET_MAX_TCP_KEEPCNT: int = 127
 SOCKET_STREAM_LENGTH: int = 1024 * 4
+SOCKET_READER_BUFFER_SIZE: int = SOCKET_STREAM_LENGTH * 2  # initial per-connection receive buffer, grows for large frames
 SOCKET_MESSAGE_DELIMITER = b'~~@$%&\r\n~~@$%&\r\n'
+SOCKET_MAX_FRAME_SIZE: int = 1024 * 1024 * 64
+SOCKET_FRAMING: str = "LENGTH"  # framing requested by clients at connect time, servers still accept legacy DELIMITER peers
+SOCKET_CODECS: tuple[str, ...] = ("binary", "json")  # payload codecs offered at login by preference, json for legacy peers
+SOCKET_COMPRESSIONS: tuple[str, ...] = ("zlib", )  # payload compressions offered at login, empty to never compress
+SOCKET_COMPRESSION_LEVEL: int = 3  # zlib level, saves ~80% of a history page for half the CPU of level 6 (bench.compression)
+SOCKET_COMPRESSION_THRESHOLD: int = 1024 * 4  # smallest payload compressed, deflating smaller ones costs more than it saves
+SOCKET_RESPONSE_STREAMING: bool = True  # clients ask at login for the list responses streamed in chunks
+SOCKET_RESPONSE_CHUNK_ROWS: int = 50  # rows per chunk frame of a streamed list response
+SOCKET_RESPONSE_STREAM_TIMEOUT: float = 10.0  # seconds a streamed response waits for a slow client to drain its queue
+
+SERVER_IO_MODE_DEFAULT: str = "thread"  # thread | epoll | asyncio, server chosen with --io-mode=
+SOCKET_SELECTOR_LOOPS: int = 1  # event-loop threads owning the client sockets in epoll mode
+SOCKET_SELECTOR_TIMEOUT: float = 1.0
+SOCKET_SELECTOR_BACKLOG: int = 4096  # listen backlog in epoll mode, capped by net.core.somaxconn
+SOCKET_SELECTOR_ROUTER_WORKERS: int = 16  # threads running Router.route (blocking controllers and repositories) in epoll mode
+SOCKET_ASYNC_EXECUTOR_WORKERS: int = 16  # threads running Router.route (blocking controllers and repositories) in asyncio mode
+SOCKET_ASYNC_USE_UVLOOP: bool = True  # run the asyncio server on uvloop when it is installed
+
+AUTH_EXECUTOR_WORKERS: int = max(1, (os.cpu_count() or 2) // 2)  # processes hashing passwords, off the I/O threads
+AUTH_EXECUTOR_MAX_PENDING: int = 1024  # logins waiting for a hashing process before new ones are denied
+AUTH_EXECUTOR_START_METHOD: str = "forkserver"  # the servers are multi-threaded, never fork them
+AUTH_TOKEN_TTL: int = DAY  # seconds a session token logs its user in again without the password
+
+SERVER_WORKERS_DEFAULT: int = 1  # server processes sharing the port with SO_REUSEPORT, chosen with --workers=
+CLUSTER_RESPAWN_DELAY: float = 1.0  # seconds the supervisor waits before respawning a dead worker
+CLUSTER_HUB_MAX_PENDING: int = 64 * 1024 * 1024  # bytes the supervisor holds for a stalled worker before dropping it
 
 # --------------------
 # Configurations
@@ -39,6 +72,22 @@ LOG_CONF_NAME: str = "logger.server.conf"
 LOG_CONF_NAME_DEFAULT: str = "logger.conf"
 
 DATABASE_NAME: str = "chatbox.sqlite"
+DATABASE_READERS: int = 4  # read-only connections of the pool, next to the single writer connection
+DATABASE_JOURNAL_MODE: str = "WAL"  # readers do not wait on the writer
+DATABASE_SYNCHRONOUS: str = "NORMAL"  # durable in WAL mode, only the last commits may be lost on power failure
+DATABASE_CACHE_SIZE: int = -16_000  # page cache per connection, negative values are KiB
+DATABASE_MMAP_SIZE: int = 1024 * 1024 * 256
+DATABASE_BUSY_TIMEOUT: int = 5_000  # milliseconds a connection waits on a locked database
+DATABASE_MAX_IN_PARAMETERS: int = 500  # ids bound per "IN (...)" query, batches are split in chunks
+DATABASE_MESSAGE_DURABILITY: str = "async"  # async: deliver then write | flush: deliver once committed
+DATABASE_MESSAGE_BATCH_SIZE: int = 256  # messages written per transaction
+DATABASE_MESSAGE_BATCH_WINDOW: float = 0.05  # seconds a message waits for its batch to fill in async durability
+DATABASE_MESSAGE_MAX_PENDING: int = 10_000  # messages waiting to be written, the oldest are dropped past it
+DATABASE_MESSAGE_FLUSH_TIMEOUT: float = 1.0  # seconds a message waits for its commit in flush durability, it is not delivered past it
+DATABASE_MESSAGE_PAGE_SIZE: int = 100  # messages per history page when the client does not ask for a limit
+DATABASE_MESSAGE_PAGE_SIZE_MAX: int = 500
+DATABASE_ENTITY_CACHE_MAX_ENTRIES: int = 10_000  # users, groups and channels kept in memory, per repository
+DATABASE_ENTITY_CACHE_TTL: float = 60.0  # seconds, bounds staleness of rows changed outside the repositories
 
 # --------------------
 # Directories
@@ -44,6 +44,11 @@ class Codes(Enum):
 	MESSAGE_LIST_GROUP = auto()
 	MESSAGE_LIST_CHANNEL = auto()
 	MESSAGE_DELETE = auto()
+	MESSAGE_SEARCH = auto()
+
+	STREAM_BEGIN = auto()  # a list response streamed in chunks, appended last so the other opcodes keep their value
+	STREAM_CHUNK = auto()
+	STREAM_END = auto()
 
 	def __str__(self):
 		return f'{self.name}'
@@ -51,6 +56,9 @@ class Codes(Enum):
 
 CODE_IDENTIFIER_LEFT: str = "@@##"
 CODE_IDENTIFIER_RIGHT: str = " --"
+CODES_BY_NAME: dict[str, Codes] = {code.name: code for code in Codes}
+_CODE_NAME_START: int = len(CODE_IDENTIFIER_LEFT)
+_CODE_NAME_END_MAX: int = _CODE_NAME_START + max(map(len, CODES_BY_NAME)) + len(CODE_IDENTIFIER_RIGHT)
 
 
 class ChatInternalCodeException(Exception):
@@ -60,6 +68,27 @@ class ChatInternalCodeException(Exception):
 full_code = lambda _code: f"{CODE_IDENTIFIER_LEFT}{_code}{CODE_IDENTIFIER_RIGHT}"
 
 
+def split_code(message: str) -> tuple[Codes | None, str]:
+	"""``(code, body)`` of a message built by ``make_message``, a prefix lookup instead of a scan of every code.
+	Messages without a known code prefix are returned as they are"""
+	if not message.startswith(CODE_IDENTIFIER_LEFT):
+		return None, message
+	end = message.find(CODE_IDENTIFIER_RIGHT, _CODE_NAME_START, _CODE_NAME_END_MAX)
+	code = end > 0 and CODES_BY_NAME.get(message[_CODE_NAME_START:end]) or None
+	if code is None:
+		return None, message
+	return code, message[end + len(CODE_IDENTIFIER_RIGHT):]
+
+
+def take_code(payload: 'message.MessageModel') -> str | None:
+	"""Opcode of the message, its ``code`` envelope field. Messages of legacy peers carry it as the ``make_message``
+	prefix of their body instead, it is moved to the field once"""
+	if payload.code is None:
+		code, payload.body = split_code(payload.body)
+		payload.code = code and code.name
+	return payload.code
+
+
 def code_in(code: Codes, message: str) -> Codes | None:
 	_code = code.name
 	max_message_scan = 100
@@ -71,17 +100,14 @@ def code_in(code: Codes, message: str) -> Codes | None:
 
 
 def code_scan(message: str) -> Codes | None:
-	for code in Codes:
-		has_code: Codes | None = code_in(code, message)
-		if has_code:
-			return has_code
+	return split_code(message)[0]
 
 
 def get_message(code: Codes, message: str) -> str | None:
-	_code = code.name
-	if not _code:
-		return None
-	return message.replace(full_code(_code), "")
+	_code, body = split_code(message)
+	if _code is not code:
+		return message
+	return body
 
 
 def make_message(code: Codes, message: str) -> str:
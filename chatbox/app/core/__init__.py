@@ -1,5 +1,8 @@
 from .tcp.network_socket import NetworkSocket, NetworkSocketException
 from .tcp.server import SocketTCPServer
+from .tcp.server_selector import SocketTCPServerSelector
+from .tcp.server_async import AsyncSocketTCPServer
+from .tcp.cluster import ClusterSupervisor
 from .tcp.client import SocketTCPClient
 
 from . import model
@@ -3,11 +3,13 @@ import json
 import logging
 import typing as t
 
+from chatbox.app import constants
 from chatbox.app.constants import chat_internal_codes as _c
 from chatbox.app.core import tcp
 from chatbox.app.core.model.message import MessageModel
 from chatbox.app.core.security.objects import Access
 from chatbox.app.core.tcp import objects
+from chatbox.app.core.tcp.codec import CODECS, JSON_CODEC
 
 
 _logger = logging.getLogger(__name__)
@@ -31,12 +33,17 @@ class AuthUser:
 				chat.id = login_data["id"]
 				chat.login_info["id"] = chat.id
 				chat.server_session = login_data["session_id"]
+				chat.session_token = login_data.get("token")
+				chat.login_info["token"] = chat.session_token
+				chat.codec = CODECS.get(login_data.get("codec"), JSON_CODEC)
+				chat.compression = constants.SOCKET_COMPRESSION_LEVEL if login_data.get("compression") in constants.SOCKET_COMPRESSIONS else None
 				chat.state = objects.Client.LOGGED
 				chat.ui.message_echo(f"You are logged in, server session {chat.server_session} your user id is {chat.id}")
 				break
 			elif _c.code_in(_c.Codes.IDENTIFICATION_REQUIRED, message):
-				if not chat.user_id:
-					chat.user_id = _c.get_message(_c.Codes.IDENTIFICATION_REQUIRED, message)
+				user_id = _c.get_message(_c.Codes.IDENTIFICATION_REQUIRED, message)
+				if chat.user_id != user_id:  # first login, or the session token of a reconnect was refused
+					chat.user_id = user_id
 					chat.login_info['user_id'] = chat.user_id
 					_logger.info(f">>> client token is {chat.user_id}")
 				else:
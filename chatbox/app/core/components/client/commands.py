@@ -52,6 +52,7 @@ class Command(Enum):
 	MESSAGE_LIST_GROUP = auto()
 	MESSAGE_LIST_CHANNEL = auto()
 	MESSAGE_DELETE = auto()
+	MESSAGE_SEARCH = auto()
 
 	def __str__(self):
 		return f"{COMMAND_PREFIX}{self.name.lower()}"
@@ -106,6 +107,7 @@ class Commands:
 		Command.MESSAGE_LIST_GROUP: Codes.MESSAGE_LIST_GROUP,
 		Command.MESSAGE_LIST_CHANNEL: Codes.MESSAGE_LIST_CHANNEL,
 		Command.MESSAGE_DELETE: Codes.MESSAGE_DELETE,
+		Command.MESSAGE_SEARCH: Codes.MESSAGE_SEARCH,
 
 	})
 
@@ -5,6 +5,7 @@ from chatbox.app.constants import chat_internal_codes as _c
 
 from chatbox.app.core.components.client.commands import Command
 from chatbox.app.core.components.client.controller.base import BaseControllerClient
+from chatbox.app.core.components.commons.functions import get_command_target
 
 
 _logger = logging.getLogger(__name__)
@@ -12,16 +13,23 @@ _logger = logging.getLogger(__name__)
 
 class ControllerMessageClient(BaseControllerClient):
 
-	def list_user(self, action: Command) -> None:
+	def list_user(self, action: Command, user_input: str) -> None:
+		"""``/message_list_sent`` lists the newest messages, ``/message_list_sent:<before_id>`` the ones older than the cursor"""
+		before_id = get_command_target(user_input)
 		code = _c.Codes[action.name]
-		command = _c.make_message(code, code.name)
+
+		payload = {"before_id": before_id} if before_id else {}
+		command = _c.make_message(code, json.dumps(payload))
 		self.chat.send_to_server(command)
 
 	def list_group_or_channel(self, action: Command, user_input: str) -> None:
-		name = self.get_command_args(user_input)
+		"""``/message_list_group:<name>`` or ``/message_list_group:<name> <before_id>``"""
+		name, _, before_id = self.get_command_args(user_input).strip().partition(" ")
 		code = _c.Codes[action.name]
 
 		payload = {"name": name.strip()}
+		if before_id.strip():
+			payload["before_id"] = before_id.strip()
 		command = _c.make_message(code, json.dumps(payload))
 		self.chat.send_to_server(command)
 
@@ -31,3 +39,11 @@ class ControllerMessageClient(BaseControllerClient):
 		payload = {"message_id": message_id.strip()}
 		command = _c.make_message(_c.Codes.MESSAGE_DELETE, json.dumps(payload))
 		self.chat.send_to_server(command)
+
+	def search(self, user_input: str) -> None:
+		"""``/message_search:<words>`` lists the newest messages containing all the words"""
+		text = self.get_command_args(user_input)
+
+		payload = {"text": text.strip()}
+		command = _c.make_message(_c.Codes.MESSAGE_SEARCH, json.dumps(payload))
+		self.chat.send_to_server(command)
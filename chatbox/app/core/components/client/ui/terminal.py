@@ -1,3 +1,4 @@
+import json
 import time
 import typing as t
 
@@ -28,6 +29,8 @@ class Terminal:
 		self.controller_channel: ControllerChannelClient = ControllerChannelClient(self.chat, self)
 		self.controller_message: ControllerMessageClient = ControllerMessageClient(self.chat, self)
 
+		self.streams: dict[int, _c.Codes] = {}  # list responses being streamed by the server, by stream id
+
 	@staticmethod
 	def message_echo(message: str):
 		print(message)
@@ -97,11 +100,13 @@ class Terminal:
 					self.controller_channel.member_request(user_input, command)
 
 				case Command.MESSAGE_LIST_SENT | Command.MESSAGE_LIST_RECEIVED:
-					self.controller_message.list_user(command)
+					self.controller_message.list_user(command, user_input)
 				case Command.MESSAGE_LIST_GROUP | Command.MESSAGE_LIST_CHANNEL:
 					self.controller_message.list_group_or_channel(command, user_input)
 				case Command.MESSAGE_DELETE:
 					self.controller_message.delete(user_input)
+				case Command.MESSAGE_SEARCH:
+					self.controller_message.search(user_input)
 
 				case Command.ECHO_MESSAGE:
 					self.controller_send_to.all(user_input)
@@ -144,7 +149,57 @@ class Terminal:
 
 	def display_messages(self, code: _c.Codes, payload: ServerMessageModel) -> None:
 		_c.remove_chat_code_from_payload(code, payload)  # noqa
+		try:
+			page = BaseController.json_decode(payload.body)
+		except BaseControllerException as error:
+			self.message_echo(f"Error while decoding Server response, reason : {error}")
+			return
+
+		payload.body = json.dumps(page["messages"])
 		self._display_table_csv_type("messages", payload)
+		before_id = page["cursor"]["before_id"]
+		if before_id and code is not _c.Codes.MESSAGE_SEARCH:
+			target = before_id if code in (_c.Codes.MESSAGE_LIST_SENT, _c.Codes.MESSAGE_LIST_RECEIVED) else f"<name> {before_id}"
+			self.message_echo(f"Older messages: {Command[code.name]}:{target}")
+
+	def display_stream(self, code: _c.Codes, payload: ServerMessageModel) -> None:
+		"""Renders a list response streamed by the server, every chunk of rows as soon as it arrives"""
+		_c.remove_chat_code_from_payload(code, payload)  # noqa
+		try:
+			data = BaseController.json_decode(payload.body)
+		except BaseControllerException as error:
+			self.message_echo(f"Error while decoding Server response, reason : {error}")
+			return
+
+		stream: int = data["stream"]
+		match code:
+			case _c.Codes.STREAM_BEGIN:
+				self.streams[stream] = _c.Codes[data["code"]]
+				self.message_echo(f"These are {self._stream_type(self.streams[stream])}:\n\n")
+			case _c.Codes.STREAM_CHUNK:
+				list_code = self.streams.get(stream)
+				if list_code is None or not data["items"]:
+					return
+				if list_code in (_c.Codes.CHANNEL_LIST_ALL, _c.Codes.CHANNEL_LIST_OWNED, _c.Codes.CHANNEL_LIST_JOINED, _c.Codes.CHANNEL_LIST_UN_JOINED):
+					self.print_box(data["items"])
+				else:
+					self.print_table(data["items"])
+			case _c.Codes.STREAM_END:
+				list_code = self.streams.pop(stream, None)
+				if list_code is None:
+					return
+				if not data["count"]:
+					self.message_echo(f"No {self._stream_type(list_code)} to display")
+				self.message_echo("\n")
+				before_id = data.get("cursor", {}).get("before_id")
+				if before_id and list_code in (_c.Codes.MESSAGE_LIST_SENT, _c.Codes.MESSAGE_LIST_RECEIVED):
+					self.message_echo(f"Older messages: {Command[list_code.name]}:{before_id}")
+				elif before_id and list_code in (_c.Codes.MESSAGE_LIST_GROUP, _c.Codes.MESSAGE_LIST_CHANNEL):
+					self.message_echo(f"Older messages: {Command[list_code.name]}:<name> {before_id}")
+
+	@staticmethod
+	def _stream_type(code: _c.Codes) -> str:
+		return code.name.split("_", 1)[0].lower() + "s"
 
 	def _display_table_csv_type(self, _type: str, payload: ServerMessageModel, add_members: bool = False) -> None:
 		if not payload.body:
@@ -1,9 +1,12 @@
+import concurrent.futures
+import dataclasses
 import json
 import logging
 import typing as t
 
 from chatbox.app.constants import chat_internal_codes as _c
 from chatbox.app.core.components.commons.controller.base import BaseController
+from chatbox.app.core.security.executor import AuthExecutorBusy
 from chatbox.app.core.security.objects import Access
 from chatbox.app.core.tcp import objects
 from chatbox.app.core.model.user import UserModel, UserLoginModel
@@ -13,12 +16,45 @@ from chatbox.app.core.security.password import generate_password_hash, check_pas
 _logger = logging.getLogger(__name__)
 
 
+@dataclasses.dataclass
+class PendingLogin:
+	"""Login waiting for its password hash (new user) or password check (existing ``user``) in the AuthExecutor"""
+	login_info: dict
+	user_name: str
+	user: UserModel | None
+	hashing: concurrent.futures.Future
+
+
 class ControllerAuthUser(BaseController):
 	REQUEST_PASSWORD_AFTER_USER_CREATION: t.Final[bool] = True
 
-	def auth(self, client_conn: objects.Client, payload: str) -> Access:
-		logging_code_type = _c.code_in(_c.Codes.LOGIN, payload) or _c.code_in(_c.Codes.IDENTIFICATION, payload)
-		logged_in = self._login(logging_code_type, client_conn, payload)
+	LOGIN_CODES: t.Final[tuple[str, ...]] = (_c.Codes.LOGIN.name, _c.Codes.IDENTIFICATION.name)
+
+	def auth(self, client_conn: objects.Client, payload: str, code: str | None = None) -> Access | None:
+		"""Logs the client in, the password is hashed in the server AuthExecutor. ``code`` is the opcode of the message,
+		without it ``payload`` starts with its ``make_message`` code.
+
+		Servers with ``AUTH_BLOCKING`` (one thread per client) wait for it. The others return None right away, the login
+		completes and the client gets its reply on an AuthExecutor thread."""
+		if client_conn.login_pending:
+			_logger.warning(f"Client {client_conn} login already in progress, request ignored")
+			return None
+
+		if code is None:
+			code, payload = _c.split_code(payload)
+			code = code and code.name
+		logging_code_type = _c.CODES_BY_NAME[code] if code in self.LOGIN_CODES else None
+		login = self._login_start(logging_code_type, client_conn, payload)
+		if isinstance(login, Access):
+			return self._reply(client_conn, login)
+		if self.chat.AUTH_BLOCKING:
+			return self._reply(client_conn, self._login_finish(client_conn, login))
+
+		client_conn.login_pending = True
+		login.hashing.add_done_callback(lambda _: self._login_done(client_conn, login))
+		return None
+
+	def _reply(self, client_conn: objects.Client, logged_in: Access) -> Access:
 		if not logged_in is Access.GRANTED:
 			client_conn.login_attempts += 1
 			if logged_in == Access.CREATED:
@@ -35,19 +71,34 @@ class ControllerAuthUser(BaseController):
 			self.chat.send_to_client(client_conn, _c.make_message(_c.Codes.IDENTIFICATION_REQUIRED, client_conn.user_id))
 			return Access.DENIED
 
-		payload = {"id": client_conn.user.id, "session_id": self.chat.server_session.session_id}
+		client_conn.session_token = self.chat.session_tokens.issue(client_conn.user.id)
+		login_info = client_conn.login_info or {}
+		codec = self.chat.agree_codec(client_conn, login_info.get("codecs"))
+		compression = self.chat.agree_compression(client_conn, login_info.get("compressions"))
+		client_conn.streaming = login_info.get("streaming") is True
+		payload = {"id": client_conn.user.id, "session_id": self.chat.server_session.session_id, "token": client_conn.session_token,
+				   "codec": codec.NAME, "compression": compression, "streaming": client_conn.streaming}
 		self.chat.send_to_client(client_conn, _c.make_message(_c.Codes.LOGIN_SUCCESS, json.dumps(payload)))
 		return Access.GRANTED
 
 	def logout(self, client_conn: objects.Client, payload: str) -> Access:
 		user_id = self.chat.parse_json(_c.get_message(_c.Codes.LOGOUT, payload))
 		self.chat.send_to_client(client_conn, _c.make_message(_c.Codes.LOGOUT, f"User {user_id} logged out!"))
+		if client_conn.session_token:
+			self.chat.revoke_session_token(client_conn.session_token)
 
 		self.chat.server_session = self.chat.repo_server.remove_user_to_session(self.chat.server_session, client_conn.user)
 		_logger.info(f"Client {client_conn.user} removed from session")
 		return Access.DENIED
 
 	def _login(self, logging_code_type: _c.Codes | None, client_conn: objects.Client, payload: str) -> Access:
+		login = self._login_start(logging_code_type, client_conn, payload)
+		if isinstance(login, Access):
+			return login
+		return self._login_finish(client_conn, login)
+
+	def _login_start(self, logging_code_type: _c.Codes | None, client_conn: objects.Client, payload: str) -> Access | PendingLogin:
+		"""Checks the login request, returns the Access right away unless the password must go through the AuthExecutor"""
 		if not logging_code_type or not client_conn or not payload:
 			return Access.DENIED
 		if client_conn.identifier not in self.chat.clients_unidentified:
@@ -59,13 +110,14 @@ class ControllerAuthUser(BaseController):
 		input_user_id = login_info.get('user_id', None)
 		input_user_name = login_info.get('user_name', None)
 		input_user_password = login_info.get('password', None)
+		input_token = login_info.get('token', None)
 		_logger.info(f"{client_conn.user_name} - with user_id {client_conn.user_id} request {logging_code_type}")
 
-		user_id_in_session = self.chat.server_session.get_user_from_session(input_user_name)
-		if not input_user_id and user_id_in_session:
-			user: UserModel = self.chat.repo_user.get(user_id_in_session)
+		if input_token:
+			user: UserModel | None = self._login_token(input_token, input_user_name)
 			if user:
-				self._identify_user(client_conn, user, login_info, reconnected=True)
+				reconnected = self.chat.server_session.get_user_from_session(user.username) == user.id
+				self._identify_user(client_conn, user, login_info, reconnected=reconnected)
 				return Access.GRANTED
 
 		if not input_user_id or not input_user_name or not input_user_password:
@@ -74,20 +126,60 @@ class ControllerAuthUser(BaseController):
 			return Access.DENIED
 
 		user: UserModel = self.chat.repo_user.get_by_name(input_user_name)
+		try:
+			if not user:
+				hashing = self.chat.auth_executor.submit(generate_password_hash, input_user_password)
+			else:
+				hashing = self.chat.auth_executor.submit(check_password_hash, user.password, input_user_password)
+		except AuthExecutorBusy as error:
+			_logger.warning(f"Client {client_conn} login denied, reason: {error}")
+			return Access.DENIED
+		return PendingLogin(login_info, input_user_name, user, hashing)
+
+	def _login_token(self, token: str, user_name: str | None) -> UserModel | None:
+		"""User of a valid session token, an HMAC check instead of the password hashing. Tokens are single use, the
+		login reply carries a new one"""
+		user_id = self.chat.revoke_session_token(token)
+		if user_id is None:
+			return None
+		user: UserModel = self.chat.repo_user.get(user_id)
+		if not user or user.username != user_name:
+			return None
+		return user
+
+	def _login_finish(self, client_conn: objects.Client, login: PendingLogin) -> Access:
+		"""Waits for the password hashing of ``login`` and logs the client in"""
+		try:
+			hashed = login.hashing.result()
+		except Exception as error:
+			_logger.error(f"Client {client_conn} password hashing failed, reason: {error}")
+			return Access.DENIED
+		if client_conn.identifier not in self.chat.clients_unidentified:  # disconnected while hashing
+			return Access.DENIED
+
+		user: UserModel | None = login.user
 		if not user:
-			password_hash = generate_password_hash(input_user_password)
-			user: UserModel = self.chat.repo_user.create({"username": input_user_name, "password": password_hash})
+			user = self.chat.repo_user.create({"username": login.user_name, "password": hashed})
+			if not user:
+				return Access.DENIED
 			client_conn.user = user
 			if self.REQUEST_PASSWORD_AFTER_USER_CREATION:
 				return Access.CREATED
-		else:
-			check_pass = check_password_hash(user.password, input_user_password)
-			if not check_pass:
-				return Access.DENIED
+		elif not hashed:
+			return Access.DENIED
 
-		self._identify_user( client_conn, user, login_info, reconnected=False)
+		self._identify_user(client_conn, user, login.login_info, reconnected=False)
 		return Access.GRANTED
 
+	def _login_done(self, client_conn: objects.Client, login: PendingLogin) -> None:
+		"""Completes a login of a non-blocking server, on an AuthExecutor thread"""
+		try:
+			self._reply(client_conn, self._login_finish(client_conn, login))
+		except Exception as error:
+			_logger.exception(f"Client {client_conn} login failed, reason: {error}", exc_info=error)
+		finally:
+			client_conn.login_pending = False
+
 	def _identify_user(self, client_conn: objects.Client, user: UserModel, login_info: dict, reconnected: bool) -> None:
 		client_conn.user_name = user.username
 		client_conn.login_info = login_info
@@ -98,6 +190,7 @@ class ControllerAuthUser(BaseController):
 		client_conn.identifier = client_conn.user.id
 		self.chat.clients_identified[client_conn.identifier] = client_conn
 		del self.chat.clients_unidentified[client_conn._identifier]
+		self.chat.outbound.replay(client_conn)
 
 		if reconnected:
 			_logger.info(f"Client {client_conn} identified with credentials {login_info} reconnected in session {self.chat.server_session.id}")
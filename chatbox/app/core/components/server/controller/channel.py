@@ -1,10 +1,11 @@
 import logging
 import json
 
+from chatbox.app import constants
 from chatbox.app.core.components.commons.controller.base import BaseController
 from chatbox.app.constants import chat_internal_codes as _c
 from chatbox.app.core.model.channel import ChannelModel, ChannelMemberModel
-from chatbox.app.core.model.message import ServerMessageModel
+from chatbox.app.core.model.message import MessageRole, ServerMessageModel
 from chatbox.app.core.model.user import UserModel
 from chatbox.app.core.tcp import objects
 
@@ -16,6 +17,10 @@ class ControllerChannel(BaseController):
 
 	def list_all(self, client_conn: objects.Client, payload: ServerMessageModel) -> None:
 		_c.remove_chat_code_from_payload(_c.Codes.CHANNEL_LIST_ALL, payload)  # noqa
+		if client_conn.streaming:
+			chunks = self.chat.repo_channel.iter_all(constants.SOCKET_RESPONSE_CHUNK_ROWS)
+			self.chat.stream_to_client(client_conn, _c.Codes.CHANNEL_LIST_ALL, ([item.to_json() for item in items] for items in chunks))
+			return
 
 		channels: list[ChannelModel] = self.chat.repo_channel.get_many()
 
@@ -62,6 +67,7 @@ class ControllerChannel(BaseController):
 			return
 
 		self.chat.repo_channel_member.create([{"user_id": user.id, "channel_id": record.id}  for user in members])
+		self.chat.refresh_subscribers(MessageRole.CHANNEL, record.id)
 
 		_logger.info(f"user {client_conn.user.username} {client_conn.user.id} created new channel --> {record} with {len(members)} members!")
 		self.chat.send_to_client(client_conn, f"Channel {name} created successfully")
@@ -87,10 +93,12 @@ class ControllerChannel(BaseController):
 		members_to_delete = set(members_current) - set(members_update)
 		members_to_add = set(members_update) - set(members_current)
 
-		for member_delete_id in members_to_delete:  # TODO: implement delete_many!
-			self.chat.repo_channel_member.delete(member_delete_id)
+		for member in record.members:  # TODO: implement delete_many!
+			if member.user_id in members_to_delete:
+				self.chat.repo_channel_member.delete(member.id)
 		if members_to_add:
 			self.chat.repo_channel_member.create([{"user_id": user_id, "channel_id": record.id} for user_id in members_to_add])
+		self.chat.refresh_subscribers(MessageRole.CHANNEL, record.id)
 
 		record: ChannelModel = self.chat.repo_channel.update(record.id, {"name": name, "owner_id": owner})
 		if not record:
@@ -115,6 +123,7 @@ class ControllerChannel(BaseController):
 			return
 
 		deleted = self.chat.repo_channel.delete(record.id)
+		self.chat.refresh_subscribers(MessageRole.CHANNEL, record.id)
 		if not deleted:
 			_logger.info(f"user {client_conn.user.username} {client_conn.user.id} "
 						 f"try to delete  channel {record.name} {record.id} but something went wrong")
@@ -156,6 +165,7 @@ class ControllerChannel(BaseController):
 			return
 
 		self.chat.repo_channel_member.create([{"user_id": user_id, "channel_id": record.id} for user_id in users_to_add_filtered])
+		self.chat.refresh_subscribers(MessageRole.CHANNEL, record.id)
 
 		message = f"{len(users_to_add_filtered)} new users joined Channel {name}"
 		_logger.info(message)
@@ -195,6 +205,7 @@ class ControllerChannel(BaseController):
 			record_id = next((member.id for member in record.members if member.user_id == member_delete_id), None)
 			deleted = self.chat.repo_channel_member.delete(record_id)
 			deleted_total += int(deleted)
+		self.chat.refresh_subscribers(MessageRole.CHANNEL, record.id)
 
 		message = f"{deleted_total} users removed from this Channel {name}"
 		_logger.info(message)
@@ -219,6 +230,7 @@ class ControllerChannel(BaseController):
 				return
 
 		self.chat.repo_channel_member.create({"user_id": owner, "channel_id": record.id})
+		self.chat.refresh_subscribers(MessageRole.CHANNEL, record.id)
 
 		_logger.info(f"user {client_conn.user.username} {client_conn.user.id} successfully join channel --> {record}")
 		self.chat.send_to_client(client_conn, f"You join Channel {name}")
@@ -249,6 +261,7 @@ class ControllerChannel(BaseController):
 			return
 
 		self.chat.repo_channel_member.delete(member_delete_id)
+		self.chat.refresh_subscribers(MessageRole.CHANNEL, record.id)
 
 		_logger.info(f"user {client_conn.user.username} {client_conn.user.id} successfully left channel --> {record}")
 		self.chat.send_to_client(client_conn, f"You left Channel {name}")
@@ -4,7 +4,7 @@ import json
 from chatbox.app.core.components.commons.controller.base import BaseController
 from chatbox.app.constants import chat_internal_codes as _c
 from chatbox.app.core.model.group import GroupModel
-from chatbox.app.core.model.message import ServerMessageModel
+from chatbox.app.core.model.message import MessageRole, ServerMessageModel
 from chatbox.app.core.tcp import objects
 
 
@@ -31,10 +31,11 @@ class ControllerGroup(BaseController):
 		if group_exists:
 			self.chat.send_to_client(client_conn, f"Group {group_name} already exists!")
 			return
-		group: GroupModel = self.chat.repo_group.create({"name": group_name, "owner_id": group_owner, "members": json.dumps(group_members)})
-		if not group:
+		group: GroupModel = self.chat.repo_group.create({"name": group_name, "owner_id": group_owner})
+		if not group or self.chat.repo_group_member.set_members(group.id, group_members) < 0:
 			self.chat.send_to_client(client_conn, f"Error while creating group {group_name}!")
 			return
+		self.chat.refresh_subscribers(MessageRole.GROUP, group.id)
 
 		_logger.info(f"user {client_conn.user.username} {client_conn.user.id} created new group --> {group}")
 		self.chat.send_to_client(client_conn, f"Group {group_name} created successfully")
@@ -56,8 +57,9 @@ class ControllerGroup(BaseController):
 		group_members = self._get_group_members(client_conn, group_info)
 
 
-		group: GroupModel = self.chat.repo_group.update(group_exists.id,
-														{"name": group_name, "owner_id": group_owner, "members": json.dumps(group_members)})
+		updated = self.chat.repo_group_member.set_members(group_exists.id, group_members) >= 0
+		self.chat.refresh_subscribers(MessageRole.GROUP, group_exists.id)
+		group: GroupModel = updated and self.chat.repo_group.update(group_exists.id, {"name": group_name, "owner_id": group_owner})
 		if not group:
 			self.chat.send_to_client(client_conn, f"Error while updating group {group_name}!")
 			return
@@ -80,6 +82,7 @@ class ControllerGroup(BaseController):
 			return
 
 		deleted = self.chat.repo_group.delete(group_exists.id)
+		self.chat.refresh_subscribers(MessageRole.GROUP, group_exists.id)
 		if not deleted:
 			_logger.info(f"user {client_conn.user.username} {client_conn.user.id} "
 						 f"try to delete  group {group_exists.name} {group_exists.id} but something went wrong")
@@ -102,21 +105,17 @@ class ControllerGroup(BaseController):
 			self.chat.send_to_client(client_conn, f"You cannot leave this group {group_name} because you are the owner!")
 			return
 
-		user_to_remove: str = client_conn.user.username
-		if client_conn.user.username not in group_exists.members:
+		if not self.chat.subscribers.is_subscriber(MessageRole.GROUP, group_exists.id, client_conn.user.id):
 			self.chat.send_to_client(client_conn, f"You are not a member of Group {group_name}!")
 			return
 
-		members_current = set(group_exists.members)
-		member_to_remove = {user_to_remove}
-		members_updated = members_current - member_to_remove
-
-		group: GroupModel = self.chat.repo_group.update(group_exists.id,{"members": json.dumps(list(members_updated))})
-		if not group:
+		removed = self.chat.repo_group_member.remove_member(group_exists.id, client_conn.user.id)
+		self.chat.refresh_subscribers(MessageRole.GROUP, group_exists.id)
+		if not removed:
 			self.chat.send_to_client(client_conn, f"Error while leaving group {group_name}!")
 			return
 
-		_logger.info(f"user {client_conn.user.username} {client_conn.user.id} successfully left group --> {group}")
+		_logger.info(f"user {client_conn.user.username} {client_conn.user.id} successfully left group --> {group_exists.name}")
 		self.chat.send_to_client(client_conn, f"You left Group {group_name}")
 
 	def _get_group_data(self, payload: ServerMessageModel) -> tuple[str | int, dict, str]:
@@ -1,11 +1,14 @@
+import functools
 import logging
 import json
+import typing as t
 
+from chatbox.app import constants
 from chatbox.app.core.components.commons.controller.base import BaseController
 from chatbox.app.constants import chat_internal_codes as _c
 from chatbox.app.core.model.channel import ChannelModel
 from chatbox.app.core.model.group import GroupModel
-from chatbox.app.core.model.message import ServerMessageModel, ServerInternalMessageModel
+from chatbox.app.core.model.message import MessageRole, ServerMessageModel, ServerInternalMessageModel
 from chatbox.app.core.tcp import objects
 
 
@@ -17,9 +20,16 @@ class ControllerMessage(BaseController):
 	def list_(self, client_conn: objects.Client, payload: ServerMessageModel, action: _c.Codes) -> None:
 		_c.remove_chat_code_from_payload(action, payload)  # noqa
 
+		page: dict | None = self._get_page(payload)
+		if page is None:
+			self.chat.send_to_client(client_conn, f"Invalid page request {payload.body}, before_id, after_id and limit must be integers")
+			return
+		limit: int = page["limit"]
+		page["limit"] += 1  # one more to tell whether another page exists
+
 		match action:
 			case _c.Codes.MESSAGE_LIST_RECEIVED:
-				items: list[ServerInternalMessageModel] = self.chat.repo_message.get_many_received(client_conn.user.username)
+				get_many = functools.partial(self.chat.repo_message.get_many_received, client_conn.user.username)
 			case _c.Codes.MESSAGE_LIST_GROUP:
 				name: str = self._get_item_name(payload)
 
@@ -27,12 +37,12 @@ class ControllerMessage(BaseController):
 				if not record:
 					self.chat.send_to_client(client_conn, f"You cannot list messages to Group {name}, channel does not exist.")
 					return
-				is_member = record.is_member(client_conn.user.username)
+				is_member = self.chat.subscribers.is_subscriber(MessageRole.GROUP, record.id, client_conn.user.id)
 				if not is_member:
 					self.chat.send_to_client(client_conn, f"You cannot list messages to Group {name}, your are not a member")
 					return
 
-				items: list[ServerInternalMessageModel] = self.chat.repo_message.get_many_group(name)
+				get_many = functools.partial(self.chat.repo_message.get_many_group, name)
 			case _c.Codes.MESSAGE_LIST_CHANNEL:
 				name: str = self._get_item_name(payload)
 
@@ -40,18 +50,79 @@ class ControllerMessage(BaseController):
 				if not record:
 					self.chat.send_to_client(client_conn, f"You cannot list messages to Channel {name}, channel does not exist.")
 					return
-				is_member = record.is_member(client_conn.user.id)
+				is_member = self.chat.subscribers.is_subscriber(MessageRole.CHANNEL, record.id, client_conn.user.id)
 				if not is_member:
 					self.chat.send_to_client(client_conn, f"You cannot list messages to Channel {name}, your are not a member")
 					return
 
-				items: list[ServerInternalMessageModel] = self.chat.repo_message.get_many_channel(name)
+				get_many = functools.partial(self.chat.repo_message.get_many_channel, name)
 
 			case _c.Codes.MESSAGE_LIST_SENT | _:
-				items: list[ServerInternalMessageModel] = self.chat.repo_message.get_many_sent(client_conn.user.username)
+				get_many = functools.partial(self.chat.repo_message.get_many_sent, client_conn.user.username)
+
+		forward = page["after_id"] is not None and page["before_id"] is None  # read from its far end, never streamed
+		if client_conn.streaming and not forward:
+			self._stream_page(client_conn, action, get_many, page, limit)
+			return
+		items: list[ServerInternalMessageModel] = get_many(**page)
+		self._send_page(client_conn, action, items, page, limit)
+
+	def search(self, client_conn: objects.Client, payload: ServerMessageModel) -> None:
+		_c.remove_chat_code_from_payload(_c.Codes.MESSAGE_SEARCH, payload)  # noqa
+
+		page: dict | None = self._get_page(payload)
+		if page is None:
+			self.chat.send_to_client(client_conn, f"Invalid search request {payload.body}, before_id and limit must be integers")
+			return
+		limit: int = page["limit"]
+
+		data: dict = self.json_decode(payload.body)
+		text: str = str(data.get("text") or "").strip() if isinstance(data, dict) else ""
+		if not text:
+			self.chat.send_to_client(client_conn, "Search text not supplied!")
+			return
+
+		user = client_conn.user
+		items: list[ServerInternalMessageModel] = self.chat.repo_message.search(user.username, user.id, text, limit + 1, page["before_id"])
+		self._send_page(client_conn, _c.Codes.MESSAGE_SEARCH, items, {**page, "after_id": None}, limit)
+
+	def _send_page(self, client_conn: objects.Client, action: _c.Codes, items: list[ServerInternalMessageModel], page: dict, limit: int) -> None:
+		"""Sends the page with the cursors of its neighbours, ``items`` holds up to ``limit`` + 1 rows"""
+		forward = page["after_id"] is not None and page["before_id"] is None  # newest first, the extra row is the newest
+		has_more = len(items) > limit
+		items = items[-limit:] if forward else items[:limit]
+		response = {
+			"messages": [item.to_json_small() for item in items],
+			"cursor": {
+				"before_id": items[-1].id if items and (has_more or forward) else None,
+				"after_id": items[0].id if items else page["after_id"],
+			},
+		}
+		self.chat.send_to_client(client_conn, _c.make_message(action, json.dumps(response)))
+
+	def _stream_page(self, client_conn: objects.Client, action: _c.Codes, get_many: t.Callable[..., list[ServerInternalMessageModel]],
+					 page: dict, limit: int) -> None:
+		"""``_send_page`` in chunks, newest first, the cursors of the neighbour pages come with the end of the stream.
+		``page`` asks for ``limit`` + 1 rows"""
+		cursor: dict = {"before_id": None, "after_id": page["after_id"]}
+
+		def chunks() -> t.Iterator[list[dict]]:
+			remaining: int = limit
+			history = self.chat.repo_message.iter_history(get_many, page["limit"], page["before_id"], page["after_id"], constants.SOCKET_RESPONSE_CHUNK_ROWS)
+			for items in history:
+				has_more = len(items) > remaining
+				items = items[:remaining]
+				if items:
+					if remaining == limit:
+						cursor["after_id"] = items[0].id
+					cursor["before_id"] = items[-1].id
+					remaining -= len(items)
+					yield [item.to_json_small() for item in items]
+				if has_more:
+					return
+			cursor["before_id"] = None  # the history ended within the page
 
-		group_names = [item.to_json_small() for item in items]
-		self.chat.send_to_client(client_conn, _c.make_message(action, json.dumps(group_names)))
+		self.chat.stream_to_client(client_conn, action, chunks(), summary=lambda: {"cursor": cursor})
 
 	def delete(self, client_conn: objects.Client, payload: ServerMessageModel) -> None:
 		_c.remove_chat_code_from_payload(_c.Codes.MESSAGE_DELETE, payload)  # noqa
@@ -84,6 +155,30 @@ class ControllerMessage(BaseController):
 			_logger.info(f"user {client_conn.user.username} {client_conn.user.id} could not deleted message {message_id}")
 			self.chat.send_to_client(client_conn, f"Message {message_id} was not deleted!")
 
+	@staticmethod
+	def _get_page(payload: ServerMessageModel) -> dict | None:
+		"""Cursor of the history page requested, ``None`` when invalid. Requests without a JSON object body (legacy
+		clients) get the newest page"""
+		try:
+			data = json.loads(payload.body)
+		except (json.JSONDecodeError, ValueError, TypeError):
+			data = {}
+		if not isinstance(data, dict):
+			data = {}
+
+		try:
+			before_id = data.get("before_id")
+			after_id = data.get("after_id")
+			page = {
+				"limit": int(data.get("limit") or constants.DATABASE_MESSAGE_PAGE_SIZE),
+				"before_id": None if before_id is None else int(before_id),
+				"after_id": None if after_id is None else int(after_id),
+			}
+		except (ValueError, TypeError):
+			return None
+		page["limit"] = max(1, min(page["limit"], constants.DATABASE_MESSAGE_PAGE_SIZE_MAX))
+		return page
+
 	def _get_item_name(self, payload: ServerMessageModel) -> str:
 		data: dict = self.json_decode(payload.body)
 		name: str = data["name"]
@@ -41,16 +41,12 @@ class ControllerSendTo(BaseController):
 			return
 
 		owner_name = payload.owner.name
-		is_member = False
-		for user_name in group.members:
-			if user_name == owner_name:
-				is_member = True
-		if not is_member:
+		if not self.chat.subscribers.is_subscriber(MessageRole.GROUP, group.id, client_conn.user.id):
 			self.chat.send_to_client(client_conn, f"user {owner_name} is not a member of {group.name}")
 			return
 
 		payload.sender = MessageDestination(identifier=group.id, name=group.name, role=MessageRole.GROUP)
-		payload.to = MessageDestination(identifier=group.id, name=group.name, role=MessageRole.GROUP, users=group.members)
+		payload.to = MessageDestination(identifier=group.id, name=group.name, role=MessageRole.GROUP)  # recipients: chat.subscribers
 		self.chat.add_message_to_broadcast(client_conn, payload)
 
 	def channel(self, client_conn: objects.Client, payload: ServerMessageModel):
@@ -63,19 +59,12 @@ class ControllerSendTo(BaseController):
 			return
 
 		owner_name = payload.owner.name
-		is_member = False
-		member_usernames = []
-		for member in channel.members:
-			member_usernames.append(member.user_name)
-			if member.user_name == owner_name:
-				is_member = True
-
-		if not is_member:
+		if not self.chat.subscribers.is_subscriber(MessageRole.CHANNEL, channel.id, client_conn.user.id):
 			self.chat.send_to_client(client_conn, f"user {owner_name} is not a member of {channel.name}")
 			return
 
 		payload.sender = MessageDestination(identifier=channel.id, name=channel.name, role=MessageRole.CHANNEL)
-		payload.to = MessageDestination(identifier=channel.id, name=channel.name, role=MessageRole.CHANNEL, users=member_usernames)
+		payload.to = MessageDestination(identifier=channel.id, name=channel.name, role=MessageRole.CHANNEL)  # recipients: chat.subscribers
 		self.chat.add_message_to_broadcast(client_conn, payload)
 
 	def all(self, client_conn: objects.Client, payload: ServerMessageModel):
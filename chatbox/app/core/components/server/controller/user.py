@@ -1,6 +1,7 @@
 import logging
 import json
 
+from chatbox.app import constants
 from chatbox.app.core.components.commons.controller.base import BaseController
 from chatbox.app.constants import chat_internal_codes as _c
 from chatbox.app.core.model.message import ServerMessageModel
@@ -15,6 +16,9 @@ class ControllerUsers(BaseController):
 
 	def list_(self, client_conn: objects.Client, payload: ServerMessageModel, action: _c.Codes) -> None:
 		_c.remove_chat_code_from_payload(action, payload)  # noqa
+		if client_conn.streaming:
+			self._stream(client_conn, action)
+			return
 
 		match action:
 			case _c.Codes.USER_LIST_LOGGED:
@@ -26,3 +30,15 @@ class ControllerUsers(BaseController):
 
 		group_names = [item.to_json_small() for item in items]
 		self.chat.send_to_client(client_conn, _c.make_message(action, json.dumps(group_names)))
+
+	def _stream(self, client_conn: objects.Client, action: _c.Codes) -> None:
+		chunk_size: int = constants.SOCKET_RESPONSE_CHUNK_ROWS
+		match action:
+			case _c.Codes.USER_LIST_LOGGED:
+				chunks = self.chat.repo_user.iter_logged(list(self.chat.clients_identified.keys()), chunk_size)
+			case _c.Codes.USER_LIST_UN_LOGGED:
+				chunks = self.chat.repo_user.iter_un_logged(list(self.chat.clients_identified.keys()), chunk_size)
+			case _:
+				chunks = self.chat.repo_user.iter_all(chunk_size)
+
+		self.chat.stream_to_client(client_conn, action, ([item.to_json_small() for item in items] for items in chunks))
@@ -1,3 +1,6 @@
+import functools
+import typing as t
+
 from chatbox.app.core import tcp
 from chatbox.app.constants import chat_internal_codes as _c
 from chatbox.app.core.components.commons.controller.base import BaseControllerException
@@ -11,11 +14,19 @@ from chatbox.app.core.model.message import ServerMessageModel
 from chatbox.app.core.tcp import objects
 
 
+Route = t.Callable[[objects.Client, ServerMessageModel], None]
+
+
 class RouterStopRoute(Exception):
 	pass
 
 
 class Router:
+	"""Dispatches the messages of the clients to the route registered for their opcode (``MessageModel.code``), a
+	single dict lookup. Messages without a registered opcode go to ``route_default``, a broadcast to all.
+
+	Extensions plug their own routes in with ``register``, opcodes are ``Codes`` or any other name."""
+
 	def __init__(self, chat: 'tcp.SocketTCPServer'):
 		self.chat: 'tcp.SocketTCPServer' = chat
 
@@ -26,79 +37,73 @@ class Router:
 		self.controller_channel: ControllerChannel = ControllerChannel(self.chat)
 		self.controller_message: ControllerMessage = ControllerMessage(self.chat)
 
+		self.routes: dict[str, Route] = {}
+		self.route_default: Route = self.controller_send_to.all
+		self._register_routes()
+
+	def register(self, code: _c.Codes | str, route: Route) -> None:
+		"""Routes the messages with opcode ``code`` to ``route(client_conn, payload)``, replaces the previous route"""
+		self.routes[code.name if isinstance(code, _c.Codes) else code] = route
+
 	def route(self, client_conn: objects.Client, payload: ServerMessageModel) -> None:
-		_route = self.route_check_client_auth(client_conn) or _c.code_scan(payload.body)
+		_route = self.route_check_client_auth(client_conn) or _c.take_code(payload)
 		try:
-			match _route:
-				case _c.Codes.IDENTIFICATION | _c.Codes.IDENTIFICATION_REQUIRED | _c.Codes.LOGIN_SUCCESS |  _c.Codes.LOGIN_CREATED:
-					return
-				case _c.Codes.LOGIN:
-					self.controller_auth.auth(client_conn, payload.body)
-					return
-				case _c.Codes.LOGOUT:
-					access = self.controller_auth.logout(client_conn, payload.body)
-					if not access.value:
-						raise RouterStopRoute(f"Stop Routing, code {_c.Codes.LOGOUT}")
-					return
-				case _c.Codes.SEND_TO_USER:
-					self.controller_send_to.user(client_conn, payload)
-				case _c.Codes.SEND_TO_GROUP:
-					self.controller_send_to.group(client_conn, payload)
-				case _c.Codes.SEND_TO_CHANNEL:
-					self.controller_send_to.channel(client_conn, payload)
-				case _c.Codes.SEND_TO_ALL:
-					self.controller_send_to.all(client_conn, payload)
-
-				case _c.Codes.USER_LIST_ALL | _c.Codes.USER_LIST_LOGGED | _c.Codes.USER_LIST_UN_LOGGED:
-					self.controller_client.list_(client_conn, payload, _route)
-
-				case _c.Codes.GROUP_LIST:
-					self.controller_group.list_(client_conn, payload)
-				case _c.Codes.GROUP_CREATE:
-					self.controller_group.create(client_conn, payload)
-				case _c.Codes.GROUP_UPDATE:
-					self.controller_group.update(client_conn, payload)
-				case _c.Codes.GROUP_DELETE:
-					self.controller_group.delete(client_conn, payload)
-				case _c.Codes.GROUP_LEAVE:
-					self.controller_group.leave(client_conn, payload)
-
-				case _c.Codes.CHANNEL_LIST_ALL:
-					self.controller_channel.list_all(client_conn, payload)
-				case _c.Codes.CHANNEL_LIST_OWNED:
-					self.controller_channel.list_owned(client_conn, payload)
-				case _c.Codes.CHANNEL_LIST_JOINED:
-					self.controller_channel.list_joined(client_conn, payload)
-				case _c.Codes.CHANNEL_LIST_UN_JOINED:
-					self.controller_channel.list_un_joined(client_conn, payload)
-				case _c.Codes.CHANNEL_CREATE:
-					self.controller_channel.create(client_conn, payload)
-				case _c.Codes.CHANNEL_UPDATE:
-					self.controller_channel.update(client_conn, payload)
-				case _c.Codes.CHANNEL_DELETE:
-					self.controller_channel.delete(client_conn, payload)
-				case _c.Codes.CHANNEL_ADD:
-					self.controller_channel.add(client_conn, payload)
-				case _c.Codes.CHANNEL_REMOVE:
-					self.controller_channel.remove(client_conn, payload)
-				case _c.Codes.CHANNEL_JOIN:
-					self.controller_channel.join(client_conn, payload)
-				case _c.Codes.CHANNEL_LEAVE:
-					self.controller_channel.leave(client_conn, payload)
-
-				case _c.Codes.MESSAGE_LIST_SENT | _c.Codes.MESSAGE_LIST_RECEIVED | _c.Codes.MESSAGE_LIST_GROUP | _c.Codes.MESSAGE_LIST_CHANNEL:
-					self.controller_message.list_(client_conn, payload, _route)
-				case _c.Codes.MESSAGE_DELETE:
-					self.controller_message.delete(client_conn, payload)
-
-				case _:
-					self.controller_send_to.all(client_conn, payload)
-
+			self.routes.get(_route, self.route_default)(client_conn, payload)
 		except BaseControllerException as error:
 			payload.body = f"Something went wrong on server while processing route {_route}, error {error}"
 			self.controller_send_to.user_this(client_conn, payload)
 
 	@staticmethod
-	def route_check_client_auth(client_conn: objects.Client) -> _c.Codes | None:
+	def route_check_client_auth(client_conn: objects.Client) -> str | None:
 		if not client_conn.is_logged():
-			return _c.Codes.LOGIN
+			return _c.Codes.LOGIN.name
+
+	def _register_routes(self) -> None:
+		for code in (_c.Codes.IDENTIFICATION, _c.Codes.IDENTIFICATION_REQUIRED, _c.Codes.LOGIN_SUCCESS, _c.Codes.LOGIN_CREATED):
+			self.register(code, self._ignore)
+		self.register(_c.Codes.LOGIN, lambda client_conn, payload: self.controller_auth.auth(client_conn, payload.body, _c.take_code(payload)))
+		self.register(_c.Codes.LOGOUT, self._logout)
+
+		self.register(_c.Codes.SEND_TO_USER, self.controller_send_to.user)
+		self.register(_c.Codes.SEND_TO_GROUP, self.controller_send_to.group)
+		self.register(_c.Codes.SEND_TO_CHANNEL, self.controller_send_to.channel)
+		self.register(_c.Codes.SEND_TO_ALL, self.controller_send_to.all)
+
+		for code in (_c.Codes.USER_LIST_ALL, _c.Codes.USER_LIST_LOGGED, _c.Codes.USER_LIST_UN_LOGGED):
+			self.register(code, functools.partial(self._with_code, self.controller_client.list_, code))
+
+		self.register(_c.Codes.GROUP_LIST, self.controller_group.list_)
+		self.register(_c.Codes.GROUP_CREATE, self.controller_group.create)
+		self.register(_c.Codes.GROUP_UPDATE, self.controller_group.update)
+		self.register(_c.Codes.GROUP_DELETE, self.controller_group.delete)
+		self.register(_c.Codes.GROUP_LEAVE, self.controller_group.leave)
+
+		self.register(_c.Codes.CHANNEL_LIST_ALL, self.controller_channel.list_all)
+		self.register(_c.Codes.CHANNEL_LIST_OWNED, self.controller_channel.list_owned)
+		self.register(_c.Codes.CHANNEL_LIST_JOINED, self.controller_channel.list_joined)
+		self.register(_c.Codes.CHANNEL_LIST_UN_JOINED, self.controller_channel.list_un_joined)
+		self.register(_c.Codes.CHANNEL_CREATE, self.controller_channel.create)
+		self.register(_c.Codes.CHANNEL_UPDATE, self.controller_channel.update)
+		self.register(_c.Codes.CHANNEL_DELETE, self.controller_channel.delete)
+		self.register(_c.Codes.CHANNEL_ADD, self.controller_channel.add)
+		self.register(_c.Codes.CHANNEL_REMOVE, self.controller_channel.remove)
+		self.register(_c.Codes.CHANNEL_JOIN, self.controller_channel.join)
+		self.register(_c.Codes.CHANNEL_LEAVE, self.controller_channel.leave)
+
+		for code in (_c.Codes.MESSAGE_LIST_SENT, _c.Codes.MESSAGE_LIST_RECEIVED, _c.Codes.MESSAGE_LIST_GROUP, _c.Codes.MESSAGE_LIST_CHANNEL):
+			self.register(code, functools.partial(self._with_code, self.controller_message.list_, code))
+		self.register(_c.Codes.MESSAGE_DELETE, self.controller_message.delete)
+		self.register(_c.Codes.MESSAGE_SEARCH, self.controller_message.search)
+
+	@staticmethod
+	def _with_code(route: t.Callable, code: _c.Codes, client_conn: objects.Client, payload: ServerMessageModel) -> None:
+		route(client_conn, payload, code)
+
+	@staticmethod
+	def _ignore(client_conn: objects.Client, payload: ServerMessageModel) -> None:
+		return
+
+	def _logout(self, client_conn: objects.Client, payload: ServerMessageModel) -> None:
+		access = self.controller_auth.logout(client_conn, payload.body)
+		if not access.value:
+			raise RouterStopRoute(f"Stop Routing, code {_c.Codes.LOGOUT}")
@@ -8,11 +8,18 @@ from chatbox.app.core.model.abstract_base_model import BaseModel
 _logger = logging.getLogger(__name__)
 
 
+@dataclass
+class GroupMemberModel(BaseModel):
+	user_id: int
+	user_name: str
+	group_id: int
+
+
 @dataclass
 class GroupModel(BaseModel):
 	name: str
 	owner_id: id
-	members: list
+	members: list[str]  # user names, read from group_member
 
 	def __str__(self):
 		return f"Group {self.name} created by {self.owner_id}, members {self.members}"
@@ -28,7 +35,4 @@ class GroupModel(BaseModel):
 		}
 
 	def is_member(self, user_name: str) -> bool:
-		for name in self.members:
-			if name == user_name:
-				return True
-		return False
\ No newline at end of file
+		return user_name in self.members
\ No newline at end of file
@@ -32,6 +32,7 @@ class MessageModel(BaseModel):
 	body: str
 	sender: MessageDestination
 	to: MessageDestination
+	code: str | None = field(default=None, kw_only=True)  # opcode routing the message, a Codes name
 
 	def __post_init__(self):
 		if isinstance(self.sender, dict):
@@ -67,8 +68,8 @@ class MessageModel(BaseModel):
 		else:
 			return cls(**message_loaded)
 
-	def to_json(self) -> str:
-		return json.dumps({
+	def get_struct(self) -> dict:
+		struct = {
 			"id": self.id,
 			"created": self.created,
 			"modified": self.modified,
@@ -83,7 +84,13 @@ class MessageModel(BaseModel):
 				"name": self.to.name,
 				"role": self.to.role.name,
 			},
-		})
+		}
+		if self.code is not None:
+			struct["code"] = self.code
+		return struct
+
+	def to_json(self) -> str:
+		return json.dumps(self.get_struct())
 
 
 @dataclass
@@ -94,6 +101,8 @@ class ServerMessageModel(MessageModel):
 		super().__post_init__()
 		if isinstance(self.owner, dict):
 			self.owner = MessageDestination(self.owner["identifier"], self.owner["name"], self.owner["role"])
+		if self.owner and not isinstance(self.owner.role, MessageRole):
+			self.owner = MessageDestination(self.owner.identifier, self.owner.name, MessageRole[self.owner.role])  # noqa
 
 	@classmethod
 	def new_message(cls, owner: MessageDestination, sender: MessageDestination, _to: MessageDestination, body: str) -> t.Self:  # noqa
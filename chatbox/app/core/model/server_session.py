@@ -1,6 +1,7 @@
 import typing as t
 import uuid
 import copy
+import secrets
 from dataclasses import dataclass, field
 
 from chatbox.app.core.model.abstract_base_model import BaseModel
@@ -9,6 +10,7 @@ from chatbox.app.core.model.user import UserModel
 
 class ServerSession(t.TypedDict, total=False):
 	users: dict[str, str]
+	token_secret: str  # signs the SessionTokens issued during the session
 
 
 SERVER_SESSION_DEFAULT: ServerSession = {
@@ -27,7 +29,13 @@ class ServerSessionModel(BaseModel):
 
 	@staticmethod
 	def create_session_data() -> ServerSession:
-		return copy.deepcopy(SERVER_SESSION_DEFAULT)
+		data = copy.deepcopy(SERVER_SESSION_DEFAULT)
+		data["token_secret"] = ServerSessionModel.create_token_secret()
+		return data
+
+	@staticmethod
+	def create_token_secret() -> str:
+		return secrets.token_hex(32)
 
 	def get_user_from_session(self, username: str) -> int | None:
 		user_id = self.data["users"].get(username, None)
@@ -0,0 +1,142 @@
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import typing as t
+
+__all__ = ["AuthExecutor", "AuthExecutorBusy"]
+
+_logger = logging.getLogger(__name__)
+
+
+class AuthExecutorBusy(Exception):
+	pass
+
+
+def _timed_call(fn: t.Callable, args: tuple) -> tuple[float, t.Any]:
+	"""Runs in the hashing process, ``time.monotonic`` is system wide so the parent measures the queue wait with it"""
+	return time.monotonic(), fn(*args)
+
+
+class AuthExecutor:
+	"""Bounded process pool running the password key derivation (``generate_password_hash``, ``check_password_hash``)
+	so a login burst never holds the GIL of the server I/O threads.
+
+	At most ``max_pending`` calls wait or run at once, more are rejected with ``AuthExecutorBusy``. Futures returned by
+	``submit`` are completed on the ``auth`` threads, their callbacks may do blocking work (database, sends) without
+	stalling the pool. The processes start with ``start`` or on the first call.
+	"""
+
+	def __init__(self, workers: int, max_pending: int, start_method: str = "forkserver"):
+		self.workers: int = workers
+		self.max_pending: int = max_pending
+		self.start_method: str = start_method
+
+		self._pool: concurrent.futures.ProcessPoolExecutor | None = None
+		self._completer: concurrent.futures.ThreadPoolExecutor | None = None
+		self._slots: threading.BoundedSemaphore = threading.BoundedSemaphore(max_pending)
+		self._lock: threading.Lock = threading.Lock()
+		self._closed: bool = False
+
+		self.started_at: float | None = None
+		self.submitted: int = 0
+		self.completed: int = 0
+		self.failed: int = 0
+		self.rejected: int = 0
+		self.queue_wait_total: float = 0.0
+		self.queue_wait_max: float = 0.0
+		self.run_total: float = 0.0
+
+	def submit(self, fn: t.Callable, *args) -> concurrent.futures.Future:
+		"""Runs ``fn(*args)`` in a hashing process, ``fn`` and ``args`` must be picklable"""
+		if not self._slots.acquire(blocking=False):
+			with self._lock:
+				self.rejected += 1
+			raise AuthExecutorBusy(f"{self.max_pending} password hashing calls pending")
+
+		future: concurrent.futures.Future = concurrent.futures.Future()
+		submitted = time.monotonic()
+		try:
+			call = self.start().submit(_timed_call, fn, args)
+		except BaseException:
+			self._slots.release()
+			raise
+		with self._lock:
+			self.submitted += 1
+		call.add_done_callback(lambda _call: self._on_done(_call, future, submitted))
+		return future
+
+	def call(self, fn: t.Callable, *args) -> t.Any:
+		"""Same as ``submit`` but waits for the result"""
+		return self.submit(fn, *args).result()
+
+	def stats(self) -> dict[str, int | float]:
+		with self._lock:
+			done = self.completed or 1
+			elapsed = self.started_at and time.monotonic() - self.started_at or 0.0
+			return {
+				"submitted": self.submitted,
+				"completed": self.completed,
+				"failed": self.failed,
+				"rejected": self.rejected,
+				"pending": self.submitted - self.completed - self.failed,
+				"per_second": round(self.completed / elapsed, 2) if elapsed else 0.0,
+				"queue_wait_avg_ms": round(self.queue_wait_total / done * 1_000, 3),
+				"queue_wait_max_ms": round(self.queue_wait_max * 1_000, 3),
+				"run_avg_ms": round(self.run_total / done * 1_000, 3),
+			}
+
+	def close(self) -> None:
+		with self._lock:
+			self._closed = True
+			pool, completer = self._pool, self._completer
+			self._pool = self._completer = None
+		if pool:
+			pool.shutdown(wait=False, cancel_futures=True)
+		if completer:
+			completer.shutdown(wait=False)
+
+	def start(self) -> concurrent.futures.ProcessPoolExecutor:
+		"""Starts the processes ahead of the first login, their interpreter start-up is not paid by a client"""
+		pool = self._pool
+		if pool is not None:
+			return pool
+		with self._lock:
+			if self._closed:
+				raise RuntimeError("AuthExecutor closed")
+			if self._pool is None:
+				self._completer = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="auth")
+				self._pool = concurrent.futures.ProcessPoolExecutor(
+					max_workers=self.workers, mp_context=multiprocessing.get_context(self.start_method))
+				self.started_at = time.monotonic()
+				for _ in range(self.workers):  # processes are spawned on demand, one per call waiting for an idle one
+					self._pool.submit(os.getpid)
+				_logger.info(f"AuthExecutor started {self.workers} {self.start_method} processes, max pending {self.max_pending}")
+			return self._pool
+
+	def _on_done(self, call: concurrent.futures.Future, future: concurrent.futures.Future, submitted: float) -> None:
+		"""Runs on the process pool manager thread, hands the result over to an ``auth`` thread right away"""
+		self._slots.release()
+		done = time.monotonic()
+		try:
+			started, result = call.result()
+		except BaseException as error:
+			with self._lock:
+				self.failed += 1
+			self._complete(future.set_exception, error)
+			return
+
+		with self._lock:
+			self.completed += 1
+			self.queue_wait_total += started - submitted
+			self.queue_wait_max = max(self.queue_wait_max, started - submitted)
+			self.run_total += done - started
+		self._complete(future.set_result, result)
+
+	def _complete(self, setter: t.Callable, value: t.Any) -> None:
+		try:
+			self._completer.submit(setter, value)
+		except (RuntimeError, AttributeError):  # closing, nobody waits on the auth threads anymore
+			setter(value)
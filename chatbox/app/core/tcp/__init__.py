@@ -1,2 +1,4 @@
 from .server import SocketTCPServer
+from .server_selector import SocketTCPServerSelector
+from .server_async import AsyncSocketTCPServer
 from .client import SocketTCPClient
\ No newline at end of file
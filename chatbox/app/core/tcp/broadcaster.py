@@ -0,0 +1,81 @@
+import queue
+import threading
+import time
+import typing as t
+
+from chatbox.app import constants
+from ..model.message import MessageRole, ServerMessageModel
+
+
+class BroadcastShard:
+    """Queue of one broadcaster thread, with its lag: how long the last message waited before being delivered"""
+
+    def __init__(self, index: int, maxsize: int):
+        self.index: int = index
+        self.queue: queue.Queue[tuple[float, ServerMessageModel]] = queue.Queue(maxsize=maxsize)
+        self.delivered: int = 0
+        self.lag: float = 0.0
+
+    def __str__(self):
+        return f"shard-{self.index}"
+
+    def put(self, message: ServerMessageModel) -> None:
+        self.queue.put((time.monotonic(), message))
+
+    def get(self) -> ServerMessageModel:
+        queued_at, message = self.queue.get()  # blocking - t_broadcaster
+        self.lag = time.monotonic() - queued_at
+        return message
+
+    def task_done(self) -> None:
+        self.delivered += 1
+        self.queue.task_done()
+
+    def qsize(self) -> int:
+        return self.queue.qsize()
+
+    def stats(self) -> dict[str, int | float]:
+        return {"shard": self.index, "depth": self.qsize(), "lag": self.lag, "delivered": self.delivered}
+
+
+class BroadcasterPool:
+    """Outbound messages sharded by destination across ``shards`` broadcaster threads.
+
+    All messages to the same user, group or channel land on the same shard, so each conversation keeps its order
+    while unrelated conversations are delivered in parallel. Has the ``put``/``qsize``/``join`` of the single
+    ``queue.Queue`` it replaces.
+    """
+
+    def __init__(self, shards: int = constants.SOCKET_BROADCASTER_SHARDS, maxsize: int = constants.SOCKET_MAX_MESSAGE_QUEUE_PER_WORKER):
+        self.shards: list[BroadcastShard] = [BroadcastShard(index, maxsize) for index in range(max(shards, 1))]
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def start(self, target: t.Callable[[BroadcastShard], None]) -> None:
+        for shard in self.shards:
+            threading.Thread(target=target, args=(shard, ), name=f"broadcaster-{shard}", daemon=True).start()
+
+    def put(self, message: ServerMessageModel) -> None:
+        self.shard_for(message).put(message)
+
+    def qsize(self) -> int:
+        return sum(shard.qsize() for shard in self.shards)
+
+    def join(self) -> None:
+        for shard in self.shards:
+            shard.queue.join()
+
+    def stats(self) -> list[dict[str, int | float]]:
+        """Queue depth, lag in seconds and messages delivered of every shard"""
+        return [shard.stats() for shard in self.shards]
+
+    def shard_for(self, message: ServerMessageModel) -> BroadcastShard:
+        return self.shards[hash(self.shard_key(message)) % len(self.shards)]
+
+    @staticmethod
+    def shard_key(message: ServerMessageModel) -> tuple[str, str]:
+        to = message.to
+        if to.role in (MessageRole.USER, MessageRole.GROUP, MessageRole.CHANNEL):
+            return to.role.name, str(to.identifier)
+        return to.role.name, ""
@@ -7,6 +7,8 @@ import time
 
 from chatbox.app import constants
 from chatbox.app.constants import chat_internal_codes as _c
+from .codec import CODECS, JSON_CODEC, Codec
+from .framing import FrameReader, Framing, framing_handshake
 from .network_socket import NetworkSocket
 from . import objects
 from ..components.client.auth import AuthUser
@@ -19,7 +21,7 @@ _logger = logging.getLogger(__name__)
 class SocketTCPClient(NetworkSocket):   # noqa
     SOCKET_TYPE: str = "tcp_client"
 
-    def __init__(self, host: str, port: int, user_name: str | None = None, password: str | None = None):
+    def __init__(self, host: str, port: int, user_name: str | None = None, password: str | None = None, session_token: str | None = None):
         super().__init__(host, port)
 
         self.id: int | None = None
@@ -27,10 +29,14 @@ class SocketTCPClient(NetworkSocket):   # noqa
         self.password: str | None = password
         self.credential: tuple[str, str] | None = None
         self.user_id: str | None = None
+        self.session_token: str | None = session_token  # given on login, presented instead of the password when reconnecting
 
         self.state: str = objects.Client.PUBLIC
         self.server_session: str | None = None
         self._connected_to_server: bool = False  # currently connected to the server
+        self.reader: FrameReader = FrameReader()
+        self.codec: Codec = JSON_CODEC  # agreed at login, encodes the frames sent
+        self.compression: int | None = None  # zlib level agreed at login, None sends frames as is
 
         self.messages: queue.Queue[ServerMessageModel] = queue.Queue(maxsize=constants.SOCKET_MAX_MESSAGE_QUEUE_PER_WORKER)
 
@@ -40,16 +46,24 @@ class SocketTCPClient(NetworkSocket):   # noqa
         if not self.user_name:
             self.user_name = self.ui.input_username()
         self.credential = (self.user_name, self.password)
+        self.state = objects.Client.PUBLIC
+        self.codec = JSON_CODEC
+        self.compression = None
         self.login_info: objects.LoginInfo = {
             'id': self.id,
             'user_name': self.user_name,
             'password': self.password,
-            'user_id': self.user_id
+            'user_id': self.user_id,
+            'token': self.session_token,
+            'codecs': [name for name in constants.SOCKET_CODECS if name in CODECS],
+            'compressions': list(constants.SOCKET_COMPRESSIONS),
+            'streaming': constants.SOCKET_RESPONSE_STREAMING,
         }
         super().__call__(*args, **kwargs)
 
     def start(self):
         self.start_connecting_to_server()
+        self.request_framing(Framing[constants.SOCKET_FRAMING])
 
         self.send_to_server(_c.make_message(_c.Codes.LOGIN, json.dumps(self.login_info)))
 
@@ -76,7 +90,8 @@ class SocketTCPClient(NetworkSocket):   # noqa
         self.connected_to_server = True
 
     def stop_connecting_to_server(self):
-        self.ui.message_echo("Closing Server Connection ...")
+        if self.connected_to_server:  # terminate runs again from __del__, announce it once
+            self.ui.message_echo("Closing Server Connection ...")
         self.connected_to_server = False
 
     def thread_receiver(self):
@@ -145,24 +160,44 @@ class SocketTCPClient(NetworkSocket):   # noqa
                 self.ui.display_groups(payload)
             case _c.Codes.CHANNEL_LIST_ALL | _c.Codes.CHANNEL_LIST_OWNED | _c.Codes.CHANNEL_LIST_JOINED | _c.Codes.CHANNEL_LIST_UN_JOINED:
                 self.ui.display_channels(_display_type, payload)
-            case _c.Codes.MESSAGE_LIST_SENT | _c.Codes.MESSAGE_LIST_RECEIVED | _c.Codes.MESSAGE_LIST_GROUP | _c.Codes.MESSAGE_LIST_CHANNEL:
+            case _c.Codes.MESSAGE_LIST_SENT | _c.Codes.MESSAGE_LIST_RECEIVED | _c.Codes.MESSAGE_LIST_GROUP | _c.Codes.MESSAGE_LIST_CHANNEL | _c.Codes.MESSAGE_SEARCH:
                 self.ui.display_messages(_display_type, payload)
+            case _c.Codes.STREAM_BEGIN | _c.Codes.STREAM_CHUNK | _c.Codes.STREAM_END:
+                self.ui.display_stream(_display_type, payload)
             case _:
                 self.ui.message_display(payload)
 
     def receive_message(self, connection: socket.socket, buffer_size: int = constants.SOCKET_STREAM_LENGTH) -> ServerMessageModel | None:
-        message: str = self.receive(connection, buffer_size)
-        if not message:
+        frame: bytes | None = self.receive_frame(connection, self.reader, buffer_size)
+        if not frame:
             return
 
-        message: ServerMessageModel = ServerMessageModel.from_json(message)
+        message: ServerMessageModel = self.decode_model(frame, self.reader.flags, ServerMessageModel)
         return message
 
     def send(self, message: str) -> int:  # noqa
-        return super().send(self.socket, message)
+        return super().send(self.socket, message, self.reader.framing)
+
+    def request_framing(self, framing: Framing) -> None:
+        """Handshake the framing with the server, must run before any other frame is exchanged"""
+        if framing is Framing.DELIMITER:
+            return  # legacy peers do not handshake
+
+        self.socket.sendall(framing_handshake(framing))
+        self.flush(self.socket)
+        while self.reader.handshake_pending():
+            if not self.reader.fill(self.socket):
+                raise ConnectionResetError("Server closed connection during framing handshake")
+
+        accepted: Framing | None = self.reader.take_handshake()
+        if accepted is None:
+            raise ConnectionError("Server did not answer the framing handshake")
+        self.reader.framing = accepted
+        _logger.info(f"{self} framing {accepted.name} agreed with the server")
 
     def send_message(self, message: MessageModel) -> int:   # noqa
-        return self.send(message.to_json())
+        _c.take_code(message)  # the opcode travels in the envelope, the server routes without parsing the body
+        return self.send_frame(self.socket, self.encode_model(message, self.codec, self.reader.framing, self.compression))
 
     def send_to_server(self, payload: str) -> None:
         sender = MessageDestination(self.id, self.user_name, role=MessageRole.USER)
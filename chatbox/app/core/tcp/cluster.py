@@ -0,0 +1,309 @@
+import json
+import logging
+import os
+import selectors
+import signal
+import socket
+import threading
+import time
+import typing as t
+
+from chatbox.app import constants
+from .framing import FrameReader, Framing, encode_frame
+from ..model.message import MessageRole, ServerMessageModel
+
+if t.TYPE_CHECKING:
+    from .server import SocketTCPServer
+
+_logger = logging.getLogger(__name__)
+
+
+class ClusterBus:
+    """Worker end of the cluster IPC bus.
+
+    Every message a worker broadcasts is published on the bus, the ``ClusterHub`` relays it to the other workers
+    which deliver it to their own clients. Frames use ``Framing.LENGTH`` and carry the message with its recipients,
+    or the new subscribers of a group or channel so every worker keeps the same ``SubscriberRegistry``, or a revoked
+    session token, or an ``EntityCache`` invalidation.
+    """
+
+    def __init__(self, connection: socket.socket, worker_id: int = 0):
+        self.connection: socket.socket = connection
+        self.worker_id: int = worker_id
+        self.reader: FrameReader = FrameReader()
+        self.reader.framing = Framing.LENGTH
+        self._lock: threading.Lock = threading.Lock()
+
+    def __str__(self):
+        return f"{self.__class__.__name__}::worker-{self.worker_id}"
+
+    def attach(self, server: 'SocketTCPServer') -> None:
+        """Publishes the broadcasts of the server and delivers to its clients the ones relayed by other workers"""
+        server.cluster_bus = self
+        threading.Thread(target=self.thread_listener, args=(server, ), name=f"cluster-bus-{self.worker_id}", daemon=True).start()
+
+    def publish(self, message: ServerMessageModel) -> None:
+        payload = json.dumps({"message": message.get_struct(), "users": list(message.to.users)})
+        if not self._send(payload):
+            _logger.error(f"{self} could not publish message {message.id} on the cluster bus")
+
+    def publish_subscribers(self, role: MessageRole, identifier: int, user_ids: t.Iterable[int]) -> None:
+        payload = json.dumps({"subscribers": {"role": role.name, "identifier": identifier, "users": sorted(user_ids)}})
+        if not self._send(payload):
+            _logger.error(f"{self} could not publish subscribers of {role.name} {identifier} on the cluster bus")
+
+    def publish_revoked(self, nonce: str, expires: int) -> None:
+        payload = json.dumps({"revoked": {"nonce": nonce, "expires": expires}})
+        if not self._send(payload):
+            _logger.error(f"{self} could not publish revoked session token {nonce} on the cluster bus")
+
+    def publish_invalidated(self, cache: str, key_type: str, key: str | int) -> None:
+        payload = json.dumps({"invalidated": {"cache": cache, "type": key_type, "key": key}})
+        if not self._send(payload):
+            _logger.error(f"{self} could not publish invalidation of {cache} {key_type} {key} on the cluster bus")
+
+    def _send(self, payload: str) -> bool:
+        try:
+            with self._lock:
+                self.connection.sendall(encode_frame(payload.encode(constants.ENCODING), Framing.LENGTH))
+        except OSError as error:
+            _logger.error(f"{self} write on the cluster bus failed, reason: {error}")
+            return False
+        return True
+
+    def receive(self) -> ServerMessageModel | None:
+        frame: bytes | None = self.reader.read_frame(self.connection)  # blocking - t_cluster_bus
+        if not frame:
+            return None
+        return self.load(frame)
+
+    def thread_listener(self, server: 'SocketTCPServer') -> None:
+        try:
+            while True:
+                frame: bytes | None = self.reader.read_frame(self.connection)  # blocking - t_cluster_bus
+                if not frame:
+                    break
+                data: dict = json.loads(frame)
+                if subscribers := data.get("subscribers"):
+                    server.subscribers.set(MessageRole[subscribers["role"]], subscribers["identifier"], subscribers["users"])
+                    continue
+                if revoked := data.get("revoked"):
+                    server.session_tokens.revoke_nonce(revoked["nonce"], revoked["expires"])
+                    continue
+                if invalidated := data.get("invalidated"):
+                    server.invalidate_cache(invalidated["cache"], invalidated["type"], invalidated["key"])
+                    continue
+                server.broadcast(self._load(data))
+        except (OSError, ValueError) as error:
+            _logger.error(f"{self} listener stopped, reason: {error}")
+        _logger.warning(f"{self} cluster bus closed")
+
+    @classmethod
+    def load(cls, frame: bytes) -> ServerMessageModel:
+        return cls._load(json.loads(frame))
+
+    @staticmethod
+    def _load(data: dict) -> ServerMessageModel:
+        message = ServerMessageModel(**data["message"])
+        message.to = message.to._replace(users=data["users"])
+        return message
+
+
+class ClusterHub:
+    """Supervisor end of the cluster IPC bus, relays every frame published by a worker to all the other workers.
+
+    Worker connections are non-blocking: what a stalled worker does not accept is kept in its pending buffer and
+    written once it is writable again, so it never holds up the relay to the others.
+    """
+
+    def __init__(self, max_pending: int = constants.CLUSTER_HUB_MAX_PENDING):
+        self.selector: selectors.BaseSelector = selectors.DefaultSelector()
+        self.workers: dict[int, socket.socket] = {}
+        self.pending: dict[int, bytearray] = {}
+        self.max_pending: int = max_pending
+
+    def add_worker(self, worker_id: int, connection: socket.socket) -> None:
+        self.remove_worker(worker_id)
+        reader = FrameReader()
+        reader.framing = Framing.LENGTH
+        connection.setblocking(False)
+        self.workers[worker_id] = connection
+        self.pending[worker_id] = bytearray()
+        self.selector.register(connection, selectors.EVENT_READ, (worker_id, reader))
+
+    def remove_worker(self, worker_id: int) -> None:
+        connection = self.workers.pop(worker_id, None)
+        if connection is None:
+            return
+        self.pending.pop(worker_id, None)
+        self.selector.unregister(connection)
+        connection.close()
+
+    def relay(self, timeout: float | None = None) -> int:
+        """Relays the frames received within timeout, returns how many were relayed"""
+        relayed = 0
+        for key, mask in self.selector.select(timeout):
+            worker_id, reader = key.data
+            if self.workers.get(worker_id) is not key.fileobj:  # removed while relaying this batch
+                continue
+            if mask & selectors.EVENT_WRITE and not self._flush(worker_id):
+                continue
+            if not mask & selectors.EVENT_READ:
+                continue
+            try:
+                if not reader.fill(key.fileobj):
+                    self.remove_worker(worker_id)
+                    continue
+            except BlockingIOError:
+                continue
+            except OSError as error:
+                _logger.error(f"Cluster bus could not read from worker-{worker_id}, reason: {error}")
+                self.remove_worker(worker_id)
+                continue
+
+            while (frame := reader.next_frame()) is not None:
+                data = encode_frame(frame, Framing.LENGTH)
+                for other_id in list(self.workers):
+                    if other_id != worker_id:
+                        self._send(other_id, data)
+                relayed += 1
+        return relayed
+
+    def _send(self, worker_id: int, data: bytes) -> None:
+        pending = self.pending[worker_id]
+        if len(pending) + len(data) > self.max_pending:
+            _logger.error(f"Cluster bus dropped worker-{worker_id}, more than {self.max_pending} bytes not relayed")
+            self.remove_worker(worker_id)
+            return
+        was_empty = not pending
+        pending += data
+        if was_empty:
+            self._flush(worker_id)
+
+    def _flush(self, worker_id: int) -> bool:
+        """Writes as much of the pending buffer as the worker accepts, waits for EVENT_WRITE for the rest.
+        Returns False if the worker was removed"""
+        connection, pending = self.workers[worker_id], self.pending[worker_id]
+        try:
+            sent = connection.send(pending) if pending else 0
+        except BlockingIOError:
+            sent = 0
+        except OSError as error:
+            _logger.error(f"Cluster bus could not relay to worker-{worker_id}, reason: {error}")
+            self.remove_worker(worker_id)
+            return False
+
+        del pending[:sent]
+        events = selectors.EVENT_READ | selectors.EVENT_WRITE if pending else selectors.EVENT_READ
+        key = self.selector.get_key(connection)
+        if key.events != events:
+            self.selector.modify(connection, events, key.data)
+        return True
+
+    def close(self) -> None:
+        for worker_id in list(self.workers):
+            self.remove_worker(worker_id)
+        self.selector.close()
+
+    def detach(self) -> None:
+        """Closes the copies of the hub inherited by a forked worker.
+        Nothing is unregistered: the epoll instance is shared with the supervisor."""
+        for connection in self.workers.values():
+            connection.close()
+        self.workers.clear()
+        self.selector.close()
+
+
+class ClusterSupervisor:
+    """Forks ``workers`` servers sharing the same port with ``SO_REUSEPORT``, the kernel load-balances new connections
+    across them. The supervisor relays broadcasts between workers through a ``ClusterHub`` and respawns the workers
+    that die."""
+
+    def __init__(self, server_class: type['SocketTCPServer'], host: str, port: int, workers: int):
+        self.server_class: type[SocketTCPServer] = server_class
+        self.host: str = host
+        self.port: int = port
+        self.total_workers: int = workers
+        self.hub: ClusterHub = ClusterHub()
+        self.pids: dict[int, int] = {}  # pid -> worker id
+        self._running: bool = False
+
+    def __str__(self):
+        return f"{self.__class__.__name__}::{self.server_class.__name__}x{self.total_workers} @<{self.host}:{self.port}>"
+
+    def __call__(self, *args, **kwargs):
+        self._running = True
+        signal.signal(signal.SIGTERM, self._on_signal)
+        for worker_id in range(self.total_workers):
+            self.spawn(worker_id)
+
+        try:
+            while self._running:
+                self.hub.relay(timeout=constants.SOCKET_SELECTOR_TIMEOUT)  # blocking - supervisor
+                self.reap()
+        finally:
+            self.terminate()
+
+    def spawn(self, worker_id: int) -> None:
+        supervisor_end, worker_end = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            supervisor_end.close()
+            self.hub.detach()
+            exit_code = 0
+            try:
+                self.run_worker(worker_id, worker_end)
+            except BaseException as error:
+                _logger.exception(f"worker-{worker_id} crashed, reason: {error}", exc_info=error)
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+
+        worker_end.close()
+        self.pids[pid] = worker_id
+        self.hub.add_worker(worker_id, supervisor_end)
+        _logger.info(f"{self} worker-{worker_id} started, pid {pid}")
+
+    def run_worker(self, worker_id: int, bus_connection: socket.socket) -> None:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        server = self.server_class(self.host, self.port)
+        server.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        ClusterBus(bus_connection, worker_id).attach(server)
+        server()
+
+    def reap(self) -> None:
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            worker_id = self.pids.pop(pid, None)
+            if worker_id is None:
+                continue
+            self.hub.remove_worker(worker_id)
+            _logger.warning(f"{self} worker-{worker_id} pid {pid} exited with status {status}")
+            if self._running:
+                time.sleep(constants.CLUSTER_RESPAWN_DELAY)
+                self.spawn(worker_id)
+
+    def terminate(self) -> None:
+        self._running = False
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(self.pids):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.pids.clear()
+        self.hub.close()
+
+    def _on_signal(self, signum, _frame) -> None:
+        _logger.warning(f"{self} received signal {signum}, stopping workers")
+        self._running = False
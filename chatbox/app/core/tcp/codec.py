@@ -0,0 +1,240 @@
+import logging
+import struct
+import typing as t
+
+from chatbox.app import constants
+from chatbox.app.constants import chat_internal_codes as _c
+from .framing import FRAME_FLAG_CODEC
+from ..model.message import MessageModel, MessageDestination, MessageRole
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+__all__ = ["Codec", "CodecError", "JSONCodec", "FastJSONCodec", "BinaryCodec", "CODECS", "JSON_CODEC", "register_codec", "codec_of"]
+
+_logger = logging.getLogger(__name__)
+
+M = t.TypeVar("M", bound=MessageModel)
+
+class CodecError(ValueError):
+    pass
+
+
+class Codec:
+    """Turns a ``MessageModel`` into the payload of a frame and back.
+
+    Every codec has a name, negotiated by the peers at login, and an ``ID`` sent in the ``FRAME_FLAG_CODEC`` bits of
+    the header of each length-prefixed frame: a peer decodes a frame with the codec that encoded it, whatever was
+    agreed so far.
+    """
+    NAME: str = ""
+    ID: int = 0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.NAME})"
+
+    def encode(self, message: MessageModel) -> bytes:
+        raise NotImplementedError("Method not implemented!")
+
+    def decode(self, payload: bytes, model: type[M]) -> M | None:
+        """The message of ``payload``, None if it cannot be decoded"""
+        raise NotImplementedError("Method not implemented!")
+
+
+class JSONCodec(Codec):
+    """The ``to_json`` documents of the legacy peers"""
+    NAME: str = "json"
+    ID: int = 0
+
+    def encode(self, message: MessageModel) -> bytes:
+        return message.to_json().encode(constants.ENCODING)
+
+    def decode(self, payload: bytes, model: type[M]) -> M | None:
+        return model.from_json(payload.decode(constants.ENCODING))
+
+
+class FastJSONCodec(JSONCodec):
+    """Same documents as ``JSONCodec`` written and parsed by ``orjson``, used in its place when installed"""
+
+    def encode(self, message: MessageModel) -> bytes:
+        return orjson.dumps(message.get_struct())
+
+    def decode(self, payload: bytes, model: type[M]) -> M | None:
+        try:
+            return model(**orjson.loads(payload))
+        except (orjson.JSONDecodeError, TypeError, KeyError) as error:
+            _logger.exception(f"Error while loading json message {payload[:255]}, reason {error}", exc_info=error)
+            return None
+
+
+#: presence bits, id, interned opcode (or the size of its name), created size, modified size, body size
+BINARY_MESSAGE: t.Final[str] = "!BqHHHI"
+#: per destination: role value, identifier kind, integer identifier, name size, string identifier size
+BINARY_DESTINATION: t.Final[str] = "BBqHH"
+BINARY_HEADER: t.Final[struct.Struct] = struct.Struct(BINARY_MESSAGE + BINARY_DESTINATION * 2)
+BINARY_HEADER_OWNER: t.Final[struct.Struct] = struct.Struct(BINARY_MESSAGE + BINARY_DESTINATION * 3)
+
+_HAS_ID: t.Final[int] = 0x01
+_HAS_CREATED: t.Final[int] = 0x02
+_HAS_MODIFIED: t.Final[int] = 0x04
+_HAS_OWNER: t.Final[int] = 0x08
+_HAS_CODE_NAME: t.Final[int] = 0x10  # opcode that is not a Codes, its name is the last string
+
+_IDENTIFIER_NONE: t.Final[int] = 0
+_IDENTIFIER_INT: t.Final[int] = 1
+_IDENTIFIER_STR: t.Final[int] = 2
+_NAME_NONE: t.Final[int] = 0x80  # bit of the identifier kind
+
+_ENCODING: t.Final[str] = constants.ENCODING
+_ROLES: t.Final[dict[int, MessageRole]] = {role.value: role for role in MessageRole}
+_CODE_NAMES: dict[int, str] = {}  # interned opcode -> Codes name, filled on first use (chat_internal_codes imports the models)
+
+
+class BinaryCodec(Codec):
+    """Struct-packed header followed by the UTF-8 strings it gives the sizes of.
+
+    The header holds the id, the ``Codes`` value of the opcode, the sizes of the strings and, per destination (sender,
+    to and owner if any), the ``MessageRole`` value and an integer identifier. Created, modified, body and the names
+    follow in that order, string identifiers right after the name of their destination.
+    """
+    NAME: str = "binary"
+    ID: int = 1
+
+    def encode(self, message: MessageModel) -> bytes:
+        _id, created, modified, code, owner = message.id, message.created, message.modified, message.code, getattr(message, "owner", None)
+        presence, code_id = 0, 0
+        if _id is not None:
+            presence |= _HAS_ID
+        else:
+            _id = 0
+        if created is not None:
+            presence |= _HAS_CREATED
+            created = str(created).encode(_ENCODING)
+        else:
+            created = b""
+        if modified is not None:
+            presence |= _HAS_MODIFIED
+            modified = str(modified).encode(_ENCODING)
+        else:
+            modified = b""
+        body = message.body.encode(_ENCODING)
+        sender, sender_strings = _pack_destination(message.sender)
+        to, to_strings = _pack_destination(message.to)
+        strings = [created, modified, body, *sender_strings, *to_strings]
+        if code is not None:
+            code_interned = _c.CODES_BY_NAME.get(code)
+            if code_interned is None:
+                presence |= _HAS_CODE_NAME
+                code = code.encode(_ENCODING)
+                code_id = len(code)
+            else:
+                code_id = code_interned.value
+        try:
+            if owner is None:
+                header = BINARY_HEADER.pack(presence, _id, code_id, len(created), len(modified), len(body), *sender, *to)
+            else:
+                owner, owner_strings = _pack_destination(owner)
+                strings += owner_strings
+                header = BINARY_HEADER_OWNER.pack(presence | _HAS_OWNER, _id, code_id, len(created), len(modified), len(body), *sender, *to, *owner)
+        except struct.error as error:
+            raise CodecError(f"{message} cannot be encoded by {self}, reason {error}") from error
+        if presence & _HAS_CODE_NAME:
+            strings.append(code)
+        return header + b"".join(strings)
+
+    def decode(self, payload: bytes, model: type[M]) -> M | None:
+        try:
+            presence = payload[0]
+            header = BINARY_HEADER_OWNER if presence & _HAS_OWNER else BINARY_HEADER
+            fields = header.unpack_from(payload)
+            _, _id, code_id, created_size, modified_size, body_size = fields[:6]
+
+            offset = header.size
+            end = offset + created_size
+            created = payload[offset:end].decode(_ENCODING) if presence & _HAS_CREATED else None
+            offset, end = end, end + modified_size
+            modified = payload[offset:end].decode(_ENCODING) if presence & _HAS_MODIFIED else None
+            offset, end = end, end + body_size
+            body = payload[offset:end].decode(_ENCODING)
+
+            sender, end = _unpack_destination(payload, end, *fields[6:11])
+            to, end = _unpack_destination(payload, end, *fields[11:16])
+            owner = None
+            if presence & _HAS_OWNER:
+                owner, end = _unpack_destination(payload, end, *fields[16:21])
+
+            if presence & _HAS_CODE_NAME:
+                offset, end = end, end + code_id
+                code = payload[offset:end].decode(_ENCODING)
+            elif code_id:
+                if not _CODE_NAMES:
+                    _CODE_NAMES.update((_code.value, _code.name) for _code in _c.Codes)
+                code = _CODE_NAMES[code_id]
+            else:
+                code = None
+            if end != len(payload):
+                raise ValueError(f"{len(payload)} bytes payload, {end} bytes expected")
+
+            if owner is None:
+                return model(_id if presence & _HAS_ID else None, created, modified, body, sender, to, code=code)  # noqa
+            return model(_id if presence & _HAS_ID else None, created, modified, body, sender, to, code=code, owner=owner)  # noqa
+        except (IndexError, KeyError, ValueError, TypeError, struct.error) as error:
+            _logger.exception(f"Error while loading binary message {payload[:255]}, reason {error}", exc_info=error)
+            return None
+
+
+def _pack_destination(destination: MessageDestination) -> tuple[tuple, tuple[bytes, ...]]:
+    """Header fields and strings of a destination"""
+    identifier, name = destination.identifier, destination.name
+    if name is None:
+        kind, name = _NAME_NONE, b""
+    else:
+        kind, name = 0, name.encode(_ENCODING)
+
+    if identifier is None:
+        return (destination.role.value, kind | _IDENTIFIER_NONE, 0, len(name), 0), (name, )
+    if isinstance(identifier, int):
+        return (destination.role.value, kind | _IDENTIFIER_INT, identifier, len(name), 0), (name, )
+    identifier = str(identifier).encode(_ENCODING)
+    return (destination.role.value, kind | _IDENTIFIER_STR, 0, len(name), len(identifier)), (name, identifier)
+
+
+def _unpack_destination(payload: bytes, offset: int, role: int, kind: int, identifier: int | str | None, name_size: int,
+                        identifier_size: int) -> tuple[MessageDestination, int]:
+    """Destination of the header fields and the strings at ``offset``, and the offset of the next string"""
+    end = offset + name_size
+    name = None if kind & _NAME_NONE else payload[offset:end].decode(_ENCODING)
+    kind &= ~_NAME_NONE
+    if kind == _IDENTIFIER_STR:
+        offset, end = end, end + identifier_size
+        identifier = payload[offset:end].decode(_ENCODING)
+    elif kind == _IDENTIFIER_NONE:
+        identifier = None
+    return MessageDestination(identifier, name, _ROLES[role]), end
+
+
+#: codecs a peer can decode, by name
+CODECS: dict[str, Codec] = {}
+_CODECS_BY_ID: dict[int, Codec] = {}
+
+
+def register_codec(codec: Codec) -> Codec:
+    """Makes the codec available to the negotiation at login, replaces the codec with the same name"""
+    if codec.ID & ~FRAME_FLAG_CODEC:
+        raise CodecError(f"{codec} id {codec.ID} does not fit in the frame flags")
+    CODECS[codec.NAME] = _CODECS_BY_ID[codec.ID] = codec
+    return codec
+
+
+def codec_of(flags: int) -> Codec:
+    """Codec of a frame, from its header flags"""
+    codec = _CODECS_BY_ID.get(flags & FRAME_FLAG_CODEC)
+    if codec is None:
+        raise CodecError(f"Unknown codec id {flags & FRAME_FLAG_CODEC}")
+    return codec
+
+
+JSON_CODEC: Codec = register_codec(FastJSONCodec() if orjson else JSONCodec())
+register_codec(BinaryCodec())
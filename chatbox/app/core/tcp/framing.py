@@ -0,0 +1,232 @@
+import socket
+import struct
+import typing as t
+import zlib
+from enum import IntEnum
+
+from chatbox.app import constants
+
+
+class Framing(IntEnum):
+    DELIMITER = 0  # legacy, frames end with constants.SOCKET_MESSAGE_DELIMITER
+    LENGTH = 1     # frames start with FRAME_HEADER
+
+
+#: length of the payload, flags, opcode
+FRAME_HEADER: t.Final[struct.Struct] = struct.Struct("!IHH")
+#: low bits of the header flags, id of the ``Codec`` that encoded the payload. Delimiter frames are always JSON
+FRAME_FLAG_CODEC: t.Final[int] = 0x000F
+#: header flag of payloads deflated with zlib, only sent to peers that agreed on the compression at login
+FRAME_FLAG_COMPRESSED: t.Final[int] = 0x0010
+#: sent by a client right after connecting, the server answers with the same bytes and the framing it accepted.
+#: Legacy frames are JSON documents and can never start with a NUL byte.
+FRAMING_HANDSHAKE_MAGIC: t.Final[bytes] = b"\x00CHATBOX"
+FRAMING_HANDSHAKE_SIZE: t.Final[int] = len(FRAMING_HANDSHAKE_MAGIC) + 1
+
+
+class FrameError(ValueError):
+    pass
+
+
+def framing_handshake(framing: Framing) -> bytes:
+    return FRAMING_HANDSHAKE_MAGIC + bytes((framing, ))
+
+
+def encode_frame(payload: bytes, framing: Framing, flags: int = 0, opcode: int = 0) -> bytes:
+    if framing is Framing.LENGTH:
+        return FRAME_HEADER.pack(len(payload), flags, opcode) + payload
+    return payload + constants.SOCKET_MESSAGE_DELIMITER
+
+
+def compress_payload(payload: bytes, framing: Framing, level: int | None,
+                     threshold: int = constants.SOCKET_COMPRESSION_THRESHOLD) -> tuple[bytes, int]:
+    """The payload deflated at zlib ``level`` and ``FRAME_FLAG_COMPRESSED``, or the payload as is and no flag when the
+    peer did not agree on a compression (``level`` None), the framing has no header flags, the payload is smaller
+    than ``threshold`` or does not shrink"""
+    if level is None or framing is not Framing.LENGTH or len(payload) < threshold:
+        return payload, 0
+    compressed = zlib.compress(payload, level)
+    if len(compressed) >= len(payload):
+        return payload, 0
+    return compressed, FRAME_FLAG_COMPRESSED
+
+
+def decompress_payload(payload: bytes, flags: int) -> bytes:
+    """Inflates the payload of a frame flagged ``FRAME_FLAG_COMPRESSED``, returns any other payload as is"""
+    if not flags & FRAME_FLAG_COMPRESSED:
+        return payload
+    inflater = zlib.decompressobj()
+    try:
+        inflated = inflater.decompress(payload, constants.SOCKET_MAX_FRAME_SIZE)
+    except zlib.error as error:
+        raise FrameError(f"Compressed frame of {len(payload)} bytes cannot be inflated, reason {error}") from error
+    if inflater.unconsumed_tail:
+        raise FrameError(f"Compressed frame inflates over the maximum of {constants.SOCKET_MAX_FRAME_SIZE} bytes")
+    if not inflater.eof:
+        raise FrameError(f"Compressed frame of {len(payload)} bytes is truncated")
+    return inflated
+
+
+class FrameReader:
+    """Per-connection reader that splits a TCP byte stream into frames.
+
+    Bytes are received with ``recv_into`` straight into a preallocated ``bytearray``, the delimiter search resumes
+    from the last scanned offset, so every byte of the stream is scanned once and each complete frame is copied out
+    of the buffer exactly once through a ``memoryview`` slice.
+    With ``Framing.LENGTH`` the header tells the size of the frame up front: the buffer is reserved once for the
+    whole frame and the payload is never scanned.
+    """
+    __slots__ = ("delimiter", "initial_size", "framing", "flags", "opcode", "_buffer", "_view", "_start", "_end", "_scanned", "_frame_size")
+
+    def __init__(self, delimiter: bytes = constants.SOCKET_MESSAGE_DELIMITER, initial_size: int = constants.SOCKET_READER_BUFFER_SIZE):
+        self.delimiter: bytes = delimiter
+        self.initial_size: int = initial_size
+        self.framing: Framing = Framing.DELIMITER
+        self.flags: int = 0   # header flags of the last frame returned
+        self.opcode: int = 0  # header opcode of the last frame returned
+
+        self._buffer: bytearray = bytearray(initial_size)
+        self._view: memoryview = memoryview(self._buffer)
+        self._start: int = 0    # first byte not yet consumed
+        self._end: int = 0      # last byte received
+        self._scanned: int = 0  # offset where the next delimiter search resumes
+        self._frame_size: int = 0  # size of the length-prefixed frame being received, header included
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffer)
+
+    def read_frame(self, connection: socket.socket, buffer_size: int = constants.SOCKET_STREAM_LENGTH) -> bytes | None:
+        """Blocks until a complete frame is available, returns the rest of the buffer if the peer closed the stream"""
+        while True:
+            frame = self.next_frame()
+            if frame is not None:
+                return frame
+            if not self.fill(connection, buffer_size):
+                return self._drain()
+
+    def fill(self, connection: socket.socket, buffer_size: int = constants.SOCKET_STREAM_LENGTH, flags: int = 0) -> int:
+        """Receives at most ``buffer_size`` bytes from the connection, returns 0 when the peer closed the stream"""
+        buffer_size = max(buffer_size, self._frame_size - len(self))
+        self._reserve(buffer_size)
+        received = connection.recv_into(self._view[self._end:self._end + buffer_size], buffer_size, flags)
+        self._end += received
+        return received
+
+    def feed(self, data: bytes) -> int:
+        """Appends bytes received by other means than ``fill``, e.g. from an ``asyncio.StreamReader``"""
+        size = len(data)
+        self._reserve(size)
+        self._view[self._end:self._end + size] = data
+        self._end += size
+        return size
+
+    def next_frame(self) -> bytes | None:
+        """Returns the next complete frame already buffered, if any"""
+        if self._end == self._start:
+            return None
+        if self.framing is Framing.LENGTH:
+            return self._next_frame_length()
+
+        index = self._buffer.find(self.delimiter, self._scanned, self._end)
+        if index == -1:
+            # a delimiter may be split across two reads, re-scan only its possible head
+            self._scanned = max(self._start, self._end - len(self.delimiter) + 1)
+            return None
+
+        frame = bytes(self._view[self._start:index])
+        self._consume(index + len(self.delimiter))
+        return frame
+
+    def _next_frame_length(self) -> bytes | None:
+        if len(self) < FRAME_HEADER.size:
+            return None
+
+        length, flags, opcode = FRAME_HEADER.unpack_from(self._buffer, self._start)
+        if length > constants.SOCKET_MAX_FRAME_SIZE:
+            raise FrameError(f"Frame of {length} bytes exceeds the maximum of {constants.SOCKET_MAX_FRAME_SIZE} bytes")
+
+        self._frame_size = FRAME_HEADER.size + length
+        end = self._start + self._frame_size
+        if end > self._end:
+            return None
+
+        frame = bytes(self._view[self._start + FRAME_HEADER.size:end])
+        self.flags, self.opcode, self._frame_size = flags, opcode, 0
+        self._consume(end)
+        return frame
+
+    def release(self) -> None:
+        """Frees the buffer while no bytes are pending, the next ``fill`` allocates it again.
+        Keeps idle connections of event-loop servers at a constant, tiny footprint."""
+        if self._end != self._start or not self.capacity:
+            return
+        self._view.release()
+        self._buffer = bytearray()
+        self._view = memoryview(self._buffer)
+        self._start = self._end = self._scanned = 0
+
+    # ------------------------------------
+    # Handshake
+    # ------------------------------------
+    def handshake_pending(self) -> bool:
+        """True until enough bytes are buffered to tell whether the peer opened with a framing handshake"""
+        if self._end == self._start:
+            return True
+        head = bytes(self._view[self._start:min(self._end, self._start + FRAMING_HANDSHAKE_SIZE)])
+        return len(head) < FRAMING_HANDSHAKE_SIZE and FRAMING_HANDSHAKE_MAGIC.startswith(head)
+
+    def take_handshake(self) -> Framing | None:
+        """Consumes the framing handshake at the head of the buffer, ``None`` if the peer did not send one"""
+        if len(self) < FRAMING_HANDSHAKE_SIZE or not self._buffer.startswith(FRAMING_HANDSHAKE_MAGIC, self._start):
+            return None
+
+        mode = self._buffer[self._start + len(FRAMING_HANDSHAKE_MAGIC)]
+        self._consume(self._start + FRAMING_HANDSHAKE_SIZE)
+        try:
+            return Framing(mode)
+        except ValueError:
+            return Framing.DELIMITER
+
+    def _consume(self, offset: int) -> None:
+        self._start = self._scanned = offset
+        if self._start == self._end:
+            self._start = self._end = self._scanned = 0
+            if self.capacity > self.initial_size:
+                self._resize(self.initial_size)
+
+    def _drain(self) -> bytes | None:
+        if self._end == self._start:
+            return None
+        frame = bytes(self._view[self._start:self._end])
+        self._consume(self._end)
+        return frame
+
+    def _reserve(self, size: int) -> None:
+        if self.capacity - self._end >= size:
+            return
+
+        pending = self._end - self._start
+        if self._start and pending <= self.capacity // 2:
+            # compact: move the unconsumed bytes (at most half the buffer) back to the front
+            self._buffer[:pending] = self._buffer[self._start:self._end]
+            self._scanned -= self._start
+            self._start, self._end = 0, pending
+            if self.capacity - self._end >= size:
+                return
+
+        self._resize(max(self.capacity * 2, self.initial_size, pending + size))
+
+    def _resize(self, size: int) -> None:
+        buffer = bytearray(size)
+        pending = self._end - self._start
+        buffer[:pending] = self._view[self._start:self._end]
+
+        self._view.release()
+        self._buffer = buffer
+        self._view = memoryview(self._buffer)
+        self._scanned -= self._start
+        self._start, self._end = 0, pending
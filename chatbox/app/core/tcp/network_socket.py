@@ -6,9 +6,10 @@ import logging
 import time
 
 from chatbox.app import constants
+from .codec import Codec, CodecError, M, codec_of
+from .framing import FrameError, FrameReader, Framing, compress_payload, decompress_payload, encode_frame
 from .objects import Address
 from ..model.message import MessageModel
-from ...constants import SOCKET_MESSAGE_DELIMITER
 
 
 _logger = logging.getLogger(__name__)
@@ -21,6 +22,7 @@ class NetworkSocketException(Exception):
 class NetworkSocket:
     SOCKET_TYPES: tuple[str, ...] = ("tcp_server", "tcp_client")
     SOCKET_TYPE: str = "tcp_socket_abstract"
+    SOCKET_LISTEN_BACKLOG: int = constants.SOCKET_MAX_CONNECTIONS
     socket_options: list[tuple[int, int, int]] = [
         #: SO_REUSEADDR flag tells the kernel to reuse a local socket in TIME_WAIT state,
         (socket.SOL_SOCKET, socket.SO_REUSEADDR, 1),
@@ -51,8 +53,6 @@ class NetworkSocket:
         self.socket_wait_forever: threading.Event = threading.Event()  # socket is waiting forever.
         self.sys_error = None
 
-        self.buffer: bytes = b''
-
 
     def __del__(self):
         self.terminate()
@@ -90,7 +90,7 @@ class NetworkSocket:
         try:
             if self.SOCKET_TYPE == "tcp_server":
                 self.socket.bind(tuple(self.address))
-                self.socket.listen(constants.SOCKET_MAX_CONNECTIONS)
+                self.socket.listen(self.SOCKET_LISTEN_BACKLOG)
             elif self.SOCKET_TYPE == "tcp_client":
                 self.socket.connect(tuple(self.address))
             else:
@@ -280,29 +280,30 @@ Stack Trace:
     # ······························
     # Socket BroadCasting
     # ······························
-    def receive(self, connection: socket.socket, buffer_size: int = constants.SOCKET_STREAM_LENGTH) -> str | None:
-        try:
-            while SOCKET_MESSAGE_DELIMITER not in self.buffer:
-                data: bytes = connection.recv(buffer_size)
-                if not data:
-                    break
-                self.buffer += data
-
-            message, separator, data_next = self.buffer.partition(SOCKET_MESSAGE_DELIMITER)
-            self.buffer = data_next
+    def receive(self, connection: socket.socket, reader: FrameReader, buffer_size: int = constants.SOCKET_STREAM_LENGTH) -> str | None:
+        message: bytes | None = self.receive_frame(connection, reader, buffer_size)
+        if not message:
+            return None
+        return self.decode_message(message)
 
+    def receive_frame(self, connection: socket.socket, reader: FrameReader, buffer_size: int = constants.SOCKET_STREAM_LENGTH) -> bytes | None:
+        """Next frame of the connection, its header flags are left in ``reader.flags``"""
+        try:
+            return reader.read_frame(connection, buffer_size)
         except socket.error as error:
             _logger.exception(f"{self} - Socket error on receive handler, reason: {error}", exc_info=error)
         except Exception as error:
             _logger.exception(f"{self} - Exception error on receive handler, reason: {error}", exc_info=error)
-        else:
-            if not message:
-                return None
-            return self.decode_message(message)
+        return None
 
-    def send(self, connection: socket.socket, message: str) -> int:
+    def send(self, connection: socket.socket, message: str, framing: Framing = Framing.DELIMITER) -> int:
+        return self.send_frame(connection, encode_frame(self.encode_message(message), framing))
+
+    def send_frame(self, connection: socket.socket, frame: bytes) -> int:
+        """Sends an already encoded frame, lets fan-outs share one buffer across every recipient"""
         try:
-            total_sent = connection.send(self.encode_message(message) + SOCKET_MESSAGE_DELIMITER)
+            connection.sendall(frame)
+            total_sent = len(frame)
         except socket.error as error:
             _logger.exception(f"{self} - Socket error on send handler, reason: {error}", exc_info=error)
             total_sent = -1
@@ -312,6 +313,14 @@ Stack Trace:
 
         return total_sent
 
+    @staticmethod
+    def flush(connection: socket.socket) -> None:
+        """Push out bytes held back by TCP_CORK, used for handshakes the peer is waiting on"""
+        corked = connection.getsockopt(socket.IPPROTO_TCP, socket.TCP_CORK)
+        if corked:
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 0)
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, corked)
+
     # ^^^^^^^^^ NotImplemented Methods ^^^^^^^^^
     def broadcast(self, message: MessageModel) -> None:
         raise NotImplementedError("Method not implemented!")
@@ -356,6 +365,24 @@ Stack Trace:
     def decode_message(message: bytes) -> str:
         return message.decode(constants.ENCODING)
 
+    @staticmethod
+    def encode_model(message: MessageModel, codec: Codec, framing: Framing, compression: int | None = None) -> bytes:
+        """Frame of the message encoded with ``codec`` and deflated at zlib level ``compression`` when large enough,
+        the codec id and the compression travel in the header flags"""
+        payload, flags = compress_payload(codec.encode(message), framing, compression)
+        return encode_frame(payload, framing, flags=codec.ID | flags)
+
+    @staticmethod
+    def decode_model(frame: bytes, flags: int, model: type[M]) -> M | None:
+        """Message of the frame, inflated and decoded with the codec named by its header ``flags``"""
+        try:
+            codec = codec_of(flags)
+            frame = decompress_payload(frame, flags)
+        except (CodecError, FrameError) as error:
+            _logger.error(f"Frame dropped, reason {error}")
+            return None
+        return codec.decode(frame, model)
+
     @staticmethod
     def parse_json(message: str) -> dict | None:
         try:
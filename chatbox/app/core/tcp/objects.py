@@ -1,9 +1,13 @@
 import socket
 import dataclasses
+import threading
 import uuid
 import typing as t
 
 from chatbox.app.core.model.user import UserModel
+from chatbox.app.core.tcp.codec import Codec, JSON_CODEC
+from chatbox.app.core.tcp.framing import FrameReader
+from chatbox.app.core.tcp.outbound import OutboundQueue
 
 
 class Address(t.NamedTuple):
@@ -11,7 +15,7 @@ class Address(t.NamedTuple):
     port: int
 
 
-LoginInfo = t.TypedDict('LoginInfo', {'id': t.Optional[int], 'user_name': t.Optional[str], 'password': t.Optional[str], 'user_id': t.Optional[str]})
+LoginInfo = t.TypedDict('LoginInfo', {'id': t.Optional[int], 'user_name': t.Optional[str], 'password': t.Optional[str], 'user_id': t.Optional[str], 'token': t.NotRequired[t.Optional[str]], 'codecs': t.NotRequired[list[str]], 'compressions': t.NotRequired[list[str]], 'streaming': t.NotRequired[bool]})
 
 
 @dataclasses.dataclass
@@ -34,6 +38,13 @@ class Client(Connection):
     login_info: str = dataclasses.field(default=None)
     user: UserModel = dataclasses.field(default=None)
     login_attempts: int = dataclasses.field(default=0)
+    login_pending: bool = dataclasses.field(default=False)  # password hashing in the AuthExecutor
+    session_token: str | None = dataclasses.field(default=None, repr=False)  # last SessionTokens token issued
+    reader: FrameReader = dataclasses.field(default_factory=FrameReader, repr=False, compare=False)
+    codec: Codec = dataclasses.field(default=JSON_CODEC, repr=False, compare=False)  # agreed at login, encodes the frames sent
+    compression: int | None = dataclasses.field(default=None, repr=False, compare=False)  # zlib level agreed at login, None sends frames as is
+    streaming: bool = dataclasses.field(default=False, repr=False, compare=False)  # list responses streamed in chunks, asked at login
+    outbound: OutboundQueue = dataclasses.field(default_factory=OutboundQueue, repr=False, compare=False)
 
     PUBLIC: t.ClassVar[str] = 'PUBLIC'   # TODO: Use enum???
     LOGGED: t.ClassVar[str] = 'LOGGED'
@@ -60,3 +71,63 @@ class Client(Connection):
 
     def is_logged(self) -> bool:
         return self.state == Client.LOGGED
+
+
+class ClientIndex(dict[int, Client]):
+    """``user id -> Client`` of the identified clients, also indexed by user name.
+
+    Writes go through a lock so both indexes always agree, reads are plain dict lookups.
+    Only ``[]=``, ``del``, ``pop`` and ``discard`` keep the user name index up to date.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock: threading.Lock = threading.Lock()
+        self._by_name: dict[str, Client] = {}
+
+    def __setitem__(self, user_id: int, client: Client) -> None:
+        with self._lock:
+            previous = dict.get(self, user_id)
+            if previous is not None:
+                self._unindex(previous)
+            dict.__setitem__(self, user_id, client)
+            self._by_name[client.user_name] = client
+
+    def __delitem__(self, user_id: int) -> None:
+        with self._lock:
+            self._unindex(dict.pop(self, user_id))
+
+    def pop(self, user_id: int, *default: t.Any) -> Client | t.Any:
+        with self._lock:
+            if not dict.__contains__(self, user_id):
+                return dict.pop(self, user_id, *default)
+            client = dict.pop(self, user_id)
+            self._unindex(client)
+            return client
+
+    def discard(self, client: Client) -> bool:
+        """Removes the client only if it is still the one indexed for its user, a newer connection of the same user
+        is kept"""
+        with self._lock:
+            if dict.get(self, client.identifier) is not client:
+                return False
+            dict.__delitem__(self, client.identifier)
+            self._unindex(client)
+            return True
+
+    def get_by_name(self, user_name: str) -> Client | None:
+        return self._by_name.get(user_name)
+
+    def resolve(self, user_names: t.Iterable[str]) -> dict[int, Client]:
+        """Connected clients of the given users, costs one lookup per user name"""
+        by_name = self._by_name
+        return {client.identifier: client for user_name in user_names if (client := by_name.get(user_name)) is not None}
+
+    def resolve_ids(self, user_ids: t.Iterable[int]) -> dict[int, Client]:
+        """Connected clients of the given user ids, costs one lookup per user id"""
+        get = super().get
+        return {user_id: client for user_id in user_ids if (client := get(user_id)) is not None}
+
+    def _unindex(self, client: Client) -> None:
+        if self._by_name.get(client.user_name) is client:
+            del self._by_name[client.user_name]
@@ -0,0 +1,355 @@
+import collections
+import logging
+import selectors
+import socket
+import threading
+import typing as t
+from enum import Enum
+
+from chatbox.app import constants
+from .codec import JSON_CODEC, Codec, codec_of
+from .framing import FRAME_FLAG_COMPRESSED, FRAME_HEADER, FrameError, Framing, compress_payload, decompress_payload, encode_frame
+from ..model.message import ServerMessageModel
+
+if t.TYPE_CHECKING:
+    from . import objects
+    from .server import SocketTCPServer
+
+_logger = logging.getLogger(__name__)
+
+
+class SlowConsumerPolicy(Enum):
+    DROP_OLDEST = "drop_oldest"  # drop the oldest queued frames down to the low watermark
+    DISCONNECT = "disconnect"    # shut the connection down, the client reconnects and lists what it missed
+    SPILL = "spill"              # park new frames in the OfflineStore until the queue drains to the low watermark
+
+
+class OutboundQueue:
+    """Frames waiting to be written to one client, in order.
+
+    ``size`` counts the bytes not written yet. Crossing ``high_watermark`` marks the client as congested, the
+    ``OutboundWriter`` applies its ``SlowConsumerPolicy`` until the queue drains below ``low_watermark``. ``drained``
+    is notified after every flush, for producers that wait for room instead of having their frames dropped.
+    """
+    __slots__ = ("high_watermark", "low_watermark", "lock", "drained", "frames", "size", "offset", "congested", "closed", "dropped", "writable")
+
+    def __init__(self, high_watermark: int = constants.SOCKET_OUTBOUND_HIGH_WATERMARK,
+                 low_watermark: int = constants.SOCKET_OUTBOUND_LOW_WATERMARK):
+        self.high_watermark: int = high_watermark
+        self.low_watermark: int = low_watermark
+        self.lock: threading.Lock = threading.Lock()
+        self.drained: threading.Condition = threading.Condition(self.lock)
+        self.frames: collections.deque[bytes] = collections.deque()
+        self.size: int = 0
+        self.offset: int = 0          # bytes of frames[0] already written
+        self.congested: bool = False
+        self.closed: bool = False
+        self.dropped: int = 0
+        self.writable: bool = False   # registered in the writer selector, waiting for the socket to drain
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def append(self, frame: bytes) -> None:
+        self.frames.append(frame)
+        self.size += len(frame)
+
+    def overflows(self, frame: bytes) -> bool:
+        return self.size + len(frame) > self.high_watermark
+
+    def has_room(self, size: int) -> bool:
+        """``size`` more bytes are queued without dropping or spilling any frame"""
+        return not self.congested and (not self.frames or self.size + size <= self.high_watermark)
+
+    def drop_oldest(self, until: int) -> None:
+        """Drops whole frames until at most ``until`` bytes are queued, a frame already partly written is kept"""
+        keep_head = 1 if self.offset else 0
+        while len(self.frames) > keep_head and self.size > until:
+            self.size -= len(self.frames[keep_head])
+            del self.frames[keep_head]
+            self.dropped += 1
+
+    def buffers(self, limit: int = constants.SOCKET_OUTBOUND_MAX_IOV) -> list[memoryview | bytes]:
+        buffers: list[memoryview | bytes] = []
+        for index, frame in enumerate(self.frames):
+            if index == limit:
+                break
+            buffers.append(memoryview(frame)[self.offset:] if index == 0 and self.offset else frame)
+        return buffers
+
+    def advance(self, sent: int) -> None:
+        """Forgets ``sent`` bytes written from the head of the queue"""
+        self.size -= sent
+        sent += self.offset
+        while self.frames and sent >= len(self.frames[0]):
+            sent -= len(self.frames.popleft())
+        self.offset = sent
+
+    def clear(self) -> None:
+        self.frames.clear()
+        self.size = self.offset = 0
+
+
+class OfflineStore:
+    """Frames spilled by congested clients, kept per user (bounded) until the user drains its queue or logs in again"""
+
+    def __init__(self, max_frames: int = constants.SOCKET_OFFLINE_STORE_MAX_FRAMES):
+        self.max_frames: int = max_frames
+        self._lock: threading.Lock = threading.Lock()
+        self._frames: dict[str, collections.deque[tuple[Framing, bytes]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(frames) for frames in self._frames.values())
+
+    def spill(self, user_name: str, framing: Framing, frame: bytes) -> bool:
+        with self._lock:
+            frames = self._frames.setdefault(user_name, collections.deque())
+            if len(frames) >= self.max_frames:
+                return False
+            frames.append((framing, frame))
+            return True
+
+    def pending(self, user_name: str) -> bool:
+        return bool(self._frames.get(user_name))
+
+    def take(self, user_name: str, framing: Framing, codec: Codec, max_bytes: int, compression: int | None = None) -> list[bytes]:
+        """Oldest spilled frames of the user, up to ``max_bytes``, encoded with ``framing``, ``codec`` and
+        ``compression``"""
+        taken: list[bytes] = []
+        with self._lock:
+            frames = self._frames.get(user_name)
+            while frames and max_bytes > 0:
+                spilled_framing, frame = frames.popleft()
+                frame = self.convert(frame, spilled_framing, framing, codec, compression)
+                if frame is None:
+                    continue
+                taken.append(frame)
+                max_bytes -= len(frame)
+            if frames is not None and not frames:
+                del self._frames[user_name]
+        return taken
+
+    @classmethod
+    def convert(cls, frame: bytes, spilled_framing: Framing, framing: Framing, codec: Codec, compression: int | None = None) -> bytes | None:
+        """The spilled frame for a client that logged in again with another framing, codec or compression, None if it
+        cannot be decoded anymore"""
+        spilled_flags = FRAME_HEADER.unpack_from(frame)[1] if spilled_framing is Framing.LENGTH else 0
+        spilled_codec = codec_of(spilled_flags) if spilled_framing is Framing.LENGTH else JSON_CODEC
+        spilled_compressed = bool(spilled_flags & FRAME_FLAG_COMPRESSED)
+        if spilled_framing is framing and spilled_codec is codec and (compression is not None or not spilled_compressed):
+            return frame
+
+        try:
+            payload = decompress_payload(cls.frame_payload(frame, spilled_framing), spilled_flags)
+        except FrameError as error:
+            _logger.error(f"Spilled frame dropped, reason {error}")
+            return None
+        if spilled_codec is not codec:
+            message = spilled_codec.decode(payload, ServerMessageModel)
+            if message is None:
+                return None
+            payload = codec.encode(message)
+        payload, flags = compress_payload(payload, framing, compression)
+        return encode_frame(payload, framing, flags=codec.ID | flags)
+
+    @staticmethod
+    def frame_payload(frame: bytes, framing: Framing) -> bytes:
+        if framing is Framing.LENGTH:
+            return frame[FRAME_HEADER.size:]
+        return frame[:-len(constants.SOCKET_MESSAGE_DELIMITER)]
+
+
+class OutboundWriter:
+    """Writes the ``OutboundQueue`` of every client of a server from a single thread.
+
+    Queues are flushed with non-blocking ``sendmsg`` (several frames per syscall, partial writes resume where they
+    stopped). Sockets that would block are watched for ``EVENT_WRITE``, so fan-out only pays for queueing and never
+    waits on the slowest reader. A client is scheduled when its queue stops being empty, and the thread is woken up
+    once per batch of scheduled clients, not once per frame.
+    """
+
+    def __init__(self, server: 'SocketTCPServer', policy: SlowConsumerPolicy = SlowConsumerPolicy(constants.SOCKET_SLOW_CONSUMER_POLICY)):
+        self.server: SocketTCPServer = server
+        self.policy: SlowConsumerPolicy = policy
+        self.offline_store: OfflineStore = OfflineStore()
+        self.selector: selectors.BaseSelector = selectors.DefaultSelector()
+        self.disconnected: int = 0
+        self._thread: threading.Thread | None = None
+        self._scheduled: collections.deque[objects.Client] = collections.deque()
+        self._woken: bool = False  # a wakeup is pending, clients scheduled meanwhile are flushed with it
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self._wakeup_sender.setblocking(False)
+        self.selector.register(self._wakeup_receiver, selectors.EVENT_READ, None)
+
+    def start(self) -> None:
+        thread = threading.Thread(target=self.thread_writer, name="outbound-writer", daemon=True)
+        thread.start()
+        self._thread = thread  # published once started, close() may run on another thread meanwhile
+
+    def close(self) -> None:
+        """Wakes the writer thread up once the server stopped listening and waits for it to exit"""
+        if self._thread is None:
+            return
+        self._wake_up()
+        self._thread.join(timeout=constants.SOCKET_SELECTOR_TIMEOUT)
+
+    def send(self, client_conn: 'objects.Client', frame: bytes) -> int:
+        """Queues the frame for the client, returns the bytes queued, 0 if spilled or dropped and -1 if disconnected"""
+        queued, idle = self.enqueue(client_conn, frame)
+        if idle:  # otherwise already scheduled or watched for EVENT_WRITE
+            self.schedule(client_conn)
+        return queued
+
+    def enqueue(self, client_conn: 'objects.Client', frame: bytes) -> tuple[int, bool]:
+        """Queues the frame for the client without scheduling its write, applies the ``SlowConsumerPolicy`` past the
+        high watermark. Returns the bytes queued (0 if spilled or dropped, -1 if disconnected) and whether the queue
+        was empty before"""
+        queue = client_conn.outbound
+        with queue.lock:
+            if queue.closed:
+                return -1, False
+            idle = not queue.frames
+            if queue.congested or queue.overflows(frame):
+                queued = self._apply_policy(client_conn, frame)
+                if queued < 1:
+                    return queued, False
+            queue.append(frame)
+        return len(frame), idle
+
+    def take(self, client_conn: 'objects.Client') -> list[bytes] | None:
+        """Every frame queued for the client, for servers writing it from their own event loop instead of the writer
+        thread. None once the client is disconnected"""
+        queue = client_conn.outbound
+        with queue.lock:
+            if queue.closed:
+                return None
+            if queue.congested and queue.size <= queue.low_watermark:
+                self._refill(client_conn)
+            frames = list(queue.frames)
+            queue.clear()
+            queue.drained.notify_all()
+            return frames
+
+    def wait_for_room(self, client_conn: 'objects.Client', size: int, timeout: float = constants.SOCKET_RESPONSE_STREAM_TIMEOUT) -> bool:
+        """Blocks until ``size`` bytes fit in the client queue, so a producer that can wait is slowed down by a slow
+        client instead of having its frames dropped. False if the client disconnected or did not drain in time"""
+        queue = client_conn.outbound
+        with queue.lock:
+            return queue.drained.wait_for(lambda: queue.closed or queue.has_room(size), timeout) and not queue.closed
+
+    def schedule(self, client_conn: 'objects.Client') -> None:
+        self._scheduled.append(client_conn)
+        if not self._woken:
+            self._woken = True
+            self._wake_up()
+
+    def _wake_up(self) -> None:
+        try:
+            self._wakeup_sender.send(b"\0")
+        except (BlockingIOError, OSError):  # already woken up or closing
+            pass
+
+    def replay(self, client_conn: 'objects.Client') -> None:
+        """Queues frames spilled for the user while it was congested or on a previous connection"""
+        if self.offline_store.pending(client_conn.user_name):
+            with client_conn.outbound.lock:
+                client_conn.outbound.congested = True  # refilled from the offline store as the queue drains
+            self.schedule(client_conn)
+
+    def discard(self, client_conn: 'objects.Client') -> None:
+        """Stops writing to a client that disconnected, the writer thread unregisters its socket"""
+        queue = client_conn.outbound
+        with queue.lock:
+            queue.closed = True
+            queue.clear()
+            queue.drained.notify_all()
+        if queue.writable:
+            self.schedule(client_conn)
+
+    def thread_writer(self) -> None:
+        while self.server.server_listening:
+            for key, _ in self.selector.select(timeout=constants.SOCKET_SELECTOR_TIMEOUT):  # blocking - t_writer
+                if key.data is None:
+                    self._flush_scheduled()
+                else:
+                    self.flush(key.data)
+
+    def flush(self, client_conn: 'objects.Client') -> None:
+        queue = client_conn.outbound
+        with queue.lock:
+            writable = False
+            while not queue.closed:
+                if queue.congested and queue.size <= queue.low_watermark:
+                    self._refill(client_conn)
+                if not queue.frames:
+                    break
+                try:
+                    sent = client_conn.connection.sendmsg(queue.buffers(), [], socket.MSG_DONTWAIT | socket.MSG_NOSIGNAL)
+                except (BlockingIOError, InterruptedError):
+                    writable = True
+                    break
+                except OSError as error:
+                    _logger.warning(f"{client_conn} outbound write failed, reason: {error}")
+                    queue.closed = True
+                    queue.clear()
+                    break
+                queue.advance(sent)
+            self._watch(client_conn, writable)
+            queue.drained.notify_all()
+
+    def _apply_policy(self, client_conn: 'objects.Client', frame: bytes) -> int:
+        queue = client_conn.outbound
+        queue.congested = True
+        match self.policy:
+            case SlowConsumerPolicy.SPILL if client_conn.is_logged():
+                if self.offline_store.spill(client_conn.user_name, client_conn.reader.framing, frame):
+                    return 0
+            case SlowConsumerPolicy.DROP_OLDEST | SlowConsumerPolicy.SPILL:
+                queue.drop_oldest(until=max(queue.low_watermark - len(frame), 0))
+                queue.congested = False
+                return len(frame)
+
+        _logger.warning(f"{client_conn} slow consumer with {queue.size} bytes queued, disconnecting")
+        self.disconnected += 1
+        queue.closed = True
+        queue.clear()
+        queue.drained.notify_all()
+        try:
+            client_conn.connection.shutdown(socket.SHUT_RDWR)  # the receiver sees EOF and removes the client
+        except OSError:
+            pass
+        return -1
+
+    def _refill(self, client_conn: 'objects.Client') -> None:
+        queue = client_conn.outbound
+        budget = queue.high_watermark - queue.size
+        for frame in self.offline_store.take(client_conn.user_name, client_conn.reader.framing, client_conn.codec, budget, client_conn.compression):
+            queue.append(frame)
+        queue.congested = self.offline_store.pending(client_conn.user_name)
+
+    def _flush_scheduled(self) -> None:
+        self._woken = False  # before draining, a client scheduled from now on wakes the thread up again
+        try:
+            while self._wakeup_receiver.recv(constants.SOCKET_STREAM_LENGTH):
+                pass
+        except BlockingIOError:
+            pass
+
+        while self._scheduled:
+            client_conn = self._scheduled.popleft()
+            if not client_conn.outbound.writable or client_conn.outbound.closed:
+                self.flush(client_conn)
+
+    def _watch(self, client_conn: 'objects.Client', writable: bool) -> None:
+        queue = client_conn.outbound
+        if queue.writable is writable:
+            return
+        try:
+            if writable:
+                self.selector.register(client_conn.connection, selectors.EVENT_WRITE, client_conn)
+            else:
+                self.selector.unregister(client_conn.connection)
+        except (KeyError, ValueError, OSError):
+            pass
+        queue.writable = writable
@@ -0,0 +1,138 @@
+import collections
+import logging
+import threading
+import time
+import typing as t
+from enum import Enum
+
+from chatbox.app import constants
+from ..model.message import ServerMessageModel
+
+if t.TYPE_CHECKING:
+    from ...database.repository.message import MessageRepository
+
+_logger = logging.getLogger(__name__)
+
+
+class Durability(Enum):
+    ASYNC = "async"  # messages are delivered right away and written by the next batch
+    FLUSH = "flush"  # messages are delivered once the batch holding them is committed (group commit)
+
+
+class MessageWriteBehind:
+    """Write-behind persistence of the delivered messages.
+
+    Messages are collected into batches, closed by ``batch_size`` or after ``window`` seconds, and each batch is
+    written with a single ``executemany`` in one transaction by the "message-writer" thread. With ``Durability.FLUSH``
+    the writer commits as soon as messages are pending, messages queued meanwhile join the next commit.
+
+    At most ``max_pending`` messages wait in memory: a batch that fails stays pending and is retried, the oldest
+    messages are dropped past ``max_pending``. A dropped message is never reported as committed.
+    """
+
+    def __init__(self, repository: 'MessageRepository', session_id: int, lock: threading.Lock,
+                 durability: Durability = Durability(constants.DATABASE_MESSAGE_DURABILITY),
+                 batch_size: int = constants.DATABASE_MESSAGE_BATCH_SIZE,
+                 window: float = constants.DATABASE_MESSAGE_BATCH_WINDOW,
+                 max_pending: int = constants.DATABASE_MESSAGE_MAX_PENDING):
+        self.repository: MessageRepository = repository
+        self.session_id: int = session_id
+        self.lock: threading.Lock = lock  # writer lock of the database connection pool
+        self.durability: Durability = durability
+        self.batch_size: int = max(batch_size, 1)
+        self.window: float = window
+        self.max_pending: int = max(max_pending, self.batch_size)
+
+        self.running: bool = False
+        self._thread: threading.Thread | None = None
+        self.written: int = 0
+        self.batches: int = 0
+        self.dropped: int = 0
+        self._pending: collections.deque[tuple[ServerMessageModel, threading.Event | None]] = collections.deque()
+        self._condition: threading.Condition = threading.Condition()
+        self._flushing: threading.Lock = threading.Lock()  # one batch written at a time keeps the insert order
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        self.running = True
+        thread = threading.Thread(target=self.thread_writer, name="message-writer", daemon=True)
+        thread.start()
+        self._thread = thread  # published once started, close() may run on another thread meanwhile
+
+    def close(self) -> None:
+        """Stops the writer thread and writes what is still pending"""
+        with self._condition:
+            self.running = False
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=constants.DATABASE_MESSAGE_FLUSH_TIMEOUT)
+        self.flush()
+
+    def submit(self, message: ServerMessageModel) -> threading.Event | None:
+        """Queues the message, with ``Durability.FLUSH`` returns an event set once the message is committed"""
+        committed = threading.Event() if self.durability is Durability.FLUSH else None
+        with self._condition:
+            self._pending.append((message, committed))
+            self._drop_overflow()
+            if self.durability is Durability.FLUSH or len(self._pending) >= self.batch_size:
+                self._condition.notify()
+        return committed
+
+    def thread_writer(self) -> None:
+        while self.running:
+            with self._condition:
+                self._condition.wait_for(self._batch_ready, timeout=self.window)  # blocking - t_writer
+            if not self.flush() and self._pending:  # the batch failed, retry after a window
+                time.sleep(self.window)
+
+    def flush(self) -> int:
+        """Writes every pending batch, returns the messages written"""
+        written = 0
+        with self._flushing:
+            while True:
+                with self._condition:
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                if not batch or not self._write(batch):
+                    return written
+                written += len(batch)
+
+    def stats(self) -> dict[str, int]:
+        return {"pending": len(self._pending), "written": self.written, "batches": self.batches, "dropped": self.dropped}
+
+    def _batch_ready(self) -> bool:
+        if not self.running or len(self._pending) >= self.batch_size:
+            return True
+        return self.durability is Durability.FLUSH and bool(self._pending)
+
+    def _write(self, batch: list[tuple[ServerMessageModel, threading.Event | None]]) -> bool:
+        try:
+            with self.lock:
+                created = self.repository.create_new_messages(self.session_id, [message for message, _ in batch])
+        except Exception as error:
+            _logger.exception(f"Batch of {len(batch)} messages could not be written, reason: {error}", exc_info=error)
+            created = -1
+
+        if created < 0:
+            self._requeue(batch)
+            return False
+
+        self.written += len(batch)
+        self.batches += 1
+        for _, committed in batch:
+            if committed is not None:
+                committed.set()
+        return True
+
+    def _requeue(self, batch: list[tuple[ServerMessageModel, threading.Event | None]]) -> None:
+        with self._condition:
+            self._pending.extendleft(reversed(batch))
+            self._drop_overflow()
+
+    def _drop_overflow(self) -> None:
+        """Drops the oldest messages past ``max_pending``, the caller holds ``_condition``"""
+        while len(self._pending) > self.max_pending:
+            message, _ = self._pending.popleft()
+            self.dropped += 1
+            _logger.error(f"Message to {message.to} dropped, {len(self._pending)} messages waiting to be written")
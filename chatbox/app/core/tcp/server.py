@@ -1,19 +1,34 @@
+import functools
+import itertools
+import json
 import logging
 import socket
 import threading
-import queue
+import typing as t
 import uuid
 
 from chatbox.app import constants
 from chatbox.app.constants import DIR_DATABASE_SCHEMA_MAIN, DIR_DATABASE_MAIN, DIR_DATABASE_DATA_MAIN
+from chatbox.app.constants import chat_internal_codes as _c
+from .broadcaster import BroadcasterPool, BroadcastShard
+from .cluster import ClusterBus
+from .outbound import OutboundWriter
+from .persistence import MessageWriteBehind
+from .subscribers import SubscriberRegistry
+from .codec import CODECS, JSON_CODEC, Codec
+from .framing import Framing, compress_payload, encode_frame, framing_handshake
 from .network_socket import NetworkSocket
 from ..components.server.router import Router, RouterStopRoute
 from ..model.message import MessageDestination, MessageRole, ServerMessageModel
 from ..model.server_session import ServerSessionModel
+from ..security.executor import AuthExecutor
+from ..security.token import SessionTokens
 from . import objects
+from ...database.migrations import migrate
+from ...database.orm.cache import EntityCache
 from ...database.orm.sqlite_conn import SQLITEConnection
 from ...database.repository.channel import ChannelRepository, ChannelMemberRepository
-from ...database.repository.group import GroupRepository
+from ...database.repository.group import GroupRepository, GroupMemberRepository
 from ...database.repository.server_session import ServerSessionRepository
 from ...database.repository.user import UserRepository, UserLoginRepository
 from ...database.repository.message import MessageRepository
@@ -23,18 +38,31 @@ _logger = logging.getLogger(__name__)
 
 class SocketTCPServer(NetworkSocket):
     SOCKET_TYPE: str = "tcp_server"
+    IO_MODE: str = "thread"  # one receiver thread per client
+    FRAMINGS_SUPPORTED: tuple[Framing, ...] = (Framing.DELIMITER, Framing.LENGTH)
+    CODECS_SUPPORTED: tuple[str, ...] = constants.SOCKET_CODECS
+    COMPRESSIONS_SUPPORTED: tuple[str, ...] = constants.SOCKET_COMPRESSIONS
+    AUTH_BLOCKING: bool = True  # the receiver thread of the client waits for its password hashing
 
     def __init__(self, host: str, port: int):
         super().__init__(host, port)
 
         self._server_listening: bool = False
-        self.client_messages: queue.Queue[ServerMessageModel] = queue.Queue(maxsize=constants.SOCKET_MAX_MESSAGE_QUEUE_PER_WORKER)
+        self.server_started: threading.Event = threading.Event()  # background threads running, accepting connections
+        self.client_messages: BroadcasterPool = BroadcasterPool(constants.SOCKET_BROADCASTER_SHARDS, constants.SOCKET_MAX_MESSAGE_QUEUE_PER_WORKER)
+        self.outbound: OutboundWriter = OutboundWriter(self)
         self.clients_unidentified: dict[int, objects.Client] = {}
-        self.clients_identified: dict[int, objects.Client] = {}
+        self.clients_identified: objects.ClientIndex = objects.ClientIndex()
+        self.subscribers: SubscriberRegistry = SubscriberRegistry()  # group and channel members, loaded with the database
+        self.auth_executor: AuthExecutor = AuthExecutor(
+            constants.AUTH_EXECUTOR_WORKERS, constants.AUTH_EXECUTOR_MAX_PENDING, constants.AUTH_EXECUTOR_START_METHOD)
         # Routers
         self.router: Router = Router(self)
         # metadata
         self.total_client_connected: int = 0
+        self.streams: t.Iterator[int] = itertools.count(1)  # ids of the list responses streamed to the clients
+        # set when running as a worker of a ClusterSupervisor
+        self.cluster_bus: ClusterBus | None = None
         # DATABASE
         self.server_session: ServerSessionModel | None = None
         self._init_database()
@@ -51,15 +79,25 @@ class SocketTCPServer(NetworkSocket):
 
     def _init_database(self):
         self.database: SQLITEConnection = self._connect_to_database()
+        migrate(self.database)
         # TODO: make a repo pool !
+        self.caches: dict[str, EntityCache] = {name: self._entity_cache() for name in ("user", "group", "channel")}
+        for name, cache in self.caches.items():
+            cache.listener = functools.partial(self.publish_cache_invalidation, name)
         self.repo_server: ServerSessionRepository = ServerSessionRepository(self.database)
-        self.repo_user: UserRepository = UserRepository(self.database)
+        self.repo_user: UserRepository = UserRepository(self.database, cache=self.caches["user"])
         self.repo_user_login: UserLoginRepository = UserLoginRepository(self.database)
         self.repo_message: MessageRepository = MessageRepository(self.database)
-        self.repo_group: GroupRepository = GroupRepository(self.database)
-        self.repo_channel_member: ChannelMemberRepository = ChannelMemberRepository(self.database)
-        self.repo_channel: ChannelRepository = ChannelRepository(self.database, repo_channel_member=self.repo_channel_member)
+        cache_group, cache_channel = self.caches["group"], self.caches["channel"]
+        self.repo_group_member: GroupMemberRepository = GroupMemberRepository(self.database, cache_group=cache_group)
+        self.repo_group: GroupRepository = GroupRepository(self.database, repo_group_member=self.repo_group_member, cache=cache_group)
+        self.repo_channel_member: ChannelMemberRepository = ChannelMemberRepository(self.database, cache_channel=cache_channel)
+        self.repo_channel: ChannelRepository = ChannelRepository(self.database, repo_channel_member=self.repo_channel_member, cache=cache_channel)
+        self.subscribers.load(MessageRole.GROUP, self.repo_group_member.list_member_ids())
+        self.subscribers.load(MessageRole.CHANNEL, self.repo_channel_member.list_member_ids())
         self.server_session: ServerSessionModel = self.repo_server.get_session_or_create()
+        self.session_tokens: SessionTokens = SessionTokens(self.repo_server.get_token_secret(self.server_session), constants.AUTH_TOKEN_TTL)
+        self.message_writer: MessageWriteBehind = MessageWriteBehind(self.repo_message, self.server_session.id, self.database.writer_lock)
 
     @staticmethod
     def _connect_to_database() -> SQLITEConnection:
@@ -68,8 +106,12 @@ class SocketTCPServer(NetworkSocket):
     def start(self):
         exception: BaseException | None = None
 
+        self.message_writer.start()
+        self.auth_executor.start()
         self.start_listening()
-        threading.Thread(target=self.thread_broadcaster, daemon=True).start()
+        self.outbound.start()
+        self.client_messages.start(self.thread_broadcaster)
+        self.server_started.set()
         while self.server_listening:
             try:
                 client, address = self.socket.accept()   # blocking - main thread
@@ -94,8 +136,42 @@ class SocketTCPServer(NetworkSocket):
         else:
             _logger.warning(f"Exit naturally, total_client_connected={self.total_client_connected}")
 
+    @staticmethod
+    def _entity_cache() -> EntityCache:
+        return EntityCache(constants.DATABASE_ENTITY_CACHE_MAX_ENTRIES, constants.DATABASE_ENTITY_CACHE_TTL)
+
+    def cache_stats(self) -> dict[str, dict[str, int]]:
+        """Hits and misses of the entity caches in front of the user, group and channel repositories"""
+        return {name: cache.stats() for name, cache in self.caches.items()}
+
+    def broadcaster_stats(self) -> list[dict[str, int | float]]:
+        """Queue depth, lag and messages delivered of every broadcaster shard"""
+        return self.client_messages.stats()
+
+    def publish_cache_invalidation(self, cache: str, key_type: str, key: str | int) -> None:
+        """The other cluster workers drop the entry invalidated here through the bus, instead of serving it until its
+        ttl runs out"""
+        if self.cluster_bus:
+            self.cluster_bus.publish_invalidated(cache, key_type, key)
+
+    def invalidate_cache(self, cache: str, key_type: str, key: str | int) -> None:
+        """Applies an invalidation published by another cluster worker, without publishing it again"""
+        entity_cache = self.caches.get(cache)
+        if entity_cache is None:
+            return
+        if key_type == "name":
+            entity_cache.invalidate_name(key, notify=False)
+        else:
+            entity_cache.invalidate(key, notify=False)
+
     def close_before(self):
         self.stop_listening()
+        self.outbound.close()
+        self.message_writer.close()
+        self.auth_executor.close()
+        _logger.info(f"Entity cache stats {self.cache_stats()}")
+        _logger.info(f"Auth executor stats {self.auth_executor.stats()}")
+        _logger.info(f"Broadcaster stats {self.broadcaster_stats()}")
 
     def thread_client_receiver(self, client_conn: objects.Client):
         _logger.info(f'{client_conn} receiving ....')
@@ -104,6 +180,10 @@ class SocketTCPServer(NetworkSocket):
         try:
             with client_conn.connection:
                 try:
+                    if not self.accept_framing_handshake(client_conn):  # blocking - t_receiver
+                        return
+                    self.register_client(client_conn)
+
                     while True:
                         message: ServerMessageModel = self.receive_message(client_conn)  # blocking - t_receiver
                         if not message:
@@ -132,20 +212,47 @@ class SocketTCPServer(NetworkSocket):
         except BaseException as base_error:
             _logger.debug(f'while handling client encountered a BaseException, reason {base_error}')
         finally:
-            if client_conn.identifier in self.clients_unidentified:
-                del self.clients_unidentified[client_conn.identifier]
-                _logger.debug(f"Delete {client_conn.identifier} from clients_unidentified")
-            if client_conn.identifier in self.clients_identified:
-                del self.clients_identified[client_conn.identifier]
-                _logger.debug(f"Delete {client_conn.identifier} identifier = {getattr(client_conn, '_identifier')} from clients_identified")
-
-    def thread_broadcaster(self) -> None:
+            self.remove_client(client_conn)
+
+    def thread_broadcaster(self, shard: BroadcastShard) -> None:
         while self.server_listening:
-            message_to_broadcast: ServerMessageModel = self.client_messages.get()   # blocking - t_broadcaster
-            self.repo_message.create_new_message(self.server_session.id, message_to_broadcast)  # TODO: check peformance.
+            message_to_broadcast: ServerMessageModel = shard.get()   # blocking - t_broadcaster
+            try:
+                self.deliver_message(message_to_broadcast)
+            except Exception as error:
+                _logger.exception(f"{shard} could not deliver message to {message_to_broadcast.to}, reason: {error}", exc_info=error)
+            finally:
+                shard.task_done()
+
+    def deliver_message(self, message: ServerMessageModel) -> None:
+        committed = self.message_writer.submit(message)
+        if committed is not None and not committed.wait(constants.DATABASE_MESSAGE_FLUSH_TIMEOUT):
+            _logger.error(f"Message to {message.to} not delivered, not committed within {constants.DATABASE_MESSAGE_FLUSH_TIMEOUT}s")
+            return
 
-            self.broadcast(message_to_broadcast)
-            self.client_messages.task_done()
+        self.broadcast(message)
+        if self.cluster_bus:
+            self.cluster_bus.publish(message)
+
+    def revoke_session_token(self, token: str) -> int | None:
+        """Revokes the session token here and, through the bus, on the other cluster workers. Returns its user id if
+        the token was valid until now"""
+        revoked = self.session_tokens.revoke(token)
+        if not revoked:
+            return None
+        user_id, nonce, expires = revoked
+        if self.cluster_bus:
+            self.cluster_bus.publish_revoked(nonce, expires)
+        return user_id
+
+    def refresh_subscribers(self, role: MessageRole, identifier: int) -> frozenset[int]:
+        """Reloads the subscribers of the group or channel after its members changed (or it was deleted), the other
+        cluster workers get them through the bus"""
+        repository = self.repo_group_member if role is MessageRole.GROUP else self.repo_channel_member
+        user_ids = self.subscribers.set(role, identifier, repository.list_member_ids(identifier).get(identifier, ()))
+        if self.cluster_bus:
+            self.cluster_bus.publish_subscribers(role, identifier, user_ids)
+        return user_ids
 
     # TODO:
     # 1. There is something a RuntimeError (dictionary change size during iteration)
@@ -155,29 +262,41 @@ class SocketTCPServer(NetworkSocket):
         match to.role:
             case MessageRole.USER:
                 clients_to_send = {}
-                user = next((user for identifier, user in self.clients_identified.items() if identifier == to.identifier), None)
+                user = self.clients_identified.get(to.identifier)
                 if user:
                     clients_to_send[to.identifier] = user
+            case MessageRole.GROUP | MessageRole.CHANNEL if to.users:  # recipients resolved by the sender (legacy peers)
+                clients_to_send = self.clients_identified.resolve(to.users)
             case MessageRole.GROUP | MessageRole.CHANNEL:
-                members = to.users
-                clients_to_send = {identifier: user for identifier, user in self.clients_identified.items() if user.user_name in members}
+                clients_to_send = self.clients_identified.resolve_ids(self.subscribers.get(to.role, to.identifier))
 
             case MessageRole.ALL:
                 clients_to_send = {**self.clients_identified, **self.clients_unidentified}
             case _:
                 clients_to_send = {**self.clients_identified, **self.clients_unidentified}
 
-        for identifier in clients_to_send:
-            client_conn: objects.Client = clients_to_send[identifier]
-            client_socket: socket.socket = client_conn.connection
-            self.send_message(client_socket, message)
+        payloads: dict[Codec, bytes] = {}  # every recipient gets the same content, serialize it once per codec
+        frames: dict[tuple[Framing, Codec, int | None], bytes] = {}
+        for client_conn in clients_to_send.values():
+            framing, codec, compression = client_conn.reader.framing, client_conn.codec, client_conn.compression
+            frame = frames.get((framing, codec, compression))
+            if frame is None:
+                payload = payloads.get(codec)
+                if payload is None:
+                    payload = payloads[codec] = codec.encode(message)
+                payload, flags = compress_payload(payload, framing, compression)
+                frame = frames[framing, codec, compression] = encode_frame(payload, framing, flags=codec.ID | flags)
+            self.send_frame_to_client(client_conn, frame)
 
     def receive_message(self, client_conn: objects.Client, buffer_size: int = constants.SOCKET_STREAM_LENGTH) -> ServerMessageModel | None:
-        message: str = self.receive(client_conn.connection, buffer_size)
-        if not message:
+        frame: bytes | None = self.receive_frame(client_conn.connection, client_conn.reader, buffer_size)
+        return self.load_message(client_conn, frame, client_conn.reader.flags)
+
+    def load_message(self, client_conn: objects.Client, frame: bytes | None, flags: int = 0) -> ServerMessageModel | None:
+        if not frame:
             return
 
-        message: ServerMessageModel = ServerMessageModel.from_json(message)
+        message: ServerMessageModel = self.decode_model(frame, flags, ServerMessageModel)
         if not message:
             return
         message.owner = MessageDestination(
@@ -187,8 +306,69 @@ class SocketTCPServer(NetworkSocket):
         )
         return message
 
-    def send_message(self, connection: socket.socket, message: ServerMessageModel) -> int:
-        return self.send(connection, message.to_json())
+    def send_message(self, client_conn: objects.Client, message: ServerMessageModel) -> int:
+        return self.send_frame_to_client(client_conn, self.encode_model(message, client_conn.codec, client_conn.reader.framing,
+                                                                        client_conn.compression))
+
+    def send_frame_to_client(self, client_conn: objects.Client, frame: bytes) -> int:
+        """Queues the frame on the client outbound queue, the OutboundWriter thread writes it"""
+        return self.outbound.send(client_conn, frame)
+
+    def accept_framing_handshake(self, client_conn: objects.Client) -> bool:
+        """Agrees the framing with the client, peers that open without a handshake keep the legacy delimiter framing.
+        Returns False if the client closed the connection before sending anything."""
+        reader = client_conn.reader
+        while reader.handshake_pending():
+            if not reader.fill(client_conn.connection):
+                return False
+
+        self.reply_framing_handshake(client_conn)
+        return True
+
+    def reply_framing_handshake(self, client_conn: objects.Client) -> None:
+        """Answers the framing handshake buffered in the client reader, if the client sent one"""
+        framing: Framing | None = self.agree_framing(client_conn)
+        if framing is None:
+            return
+
+        client_conn.connection.sendall(framing_handshake(framing))
+        self.flush(client_conn.connection)
+
+    def agree_framing(self, client_conn: objects.Client) -> Framing | None:
+        """Takes the framing handshake buffered in the client reader and switches the reader to the framing accepted,
+        returns ``None`` for legacy clients that did not send one"""
+        reader = client_conn.reader
+        framing: Framing | None = reader.take_handshake()
+        if framing is None:
+            return None
+        if framing not in self.FRAMINGS_SUPPORTED:
+            framing = Framing.DELIMITER
+
+        reader.framing = framing
+        _logger.info(f"{client_conn} framing {framing.name} accepted")
+        return framing
+
+    def agree_codec(self, client_conn: objects.Client, offered: list[str] | None) -> Codec:
+        """Picks the first codec offered by the client at login that the server supports. Codec ids travel in the
+        header flags of length-prefixed frames, clients of the legacy delimiter framing keep JSON"""
+        codec: Codec = JSON_CODEC
+        if client_conn.reader.framing is Framing.LENGTH and isinstance(offered, list):
+            codec = next((CODECS[name] for name in offered if name in self.CODECS_SUPPORTED and name in CODECS), JSON_CODEC)
+
+        client_conn.codec = codec
+        _logger.info(f"{client_conn} codec {codec.NAME} accepted")
+        return codec
+
+    def agree_compression(self, client_conn: objects.Client, offered: list[str] | None) -> str | None:
+        """Picks the first compression offered by the client at login that the server supports, None to send the
+        frames as is. The compression is flagged in the header of length-prefixed frames only"""
+        compression: str | None = None
+        if client_conn.reader.framing is Framing.LENGTH and isinstance(offered, list):
+            compression = next((name for name in offered if name in self.COMPRESSIONS_SUPPORTED), None)
+
+        client_conn.compression = constants.SOCKET_COMPRESSION_LEVEL if compression else None
+        _logger.info(f"{client_conn} compression {compression} accepted")
+        return compression
 
     def start_listening(self):
         self.server_listening = True
@@ -200,12 +380,21 @@ class SocketTCPServer(NetworkSocket):
         self.total_client_connected += 1
 
         new_connection = self.create_client_object(client, address)
-        self.clients_unidentified[new_connection.identifier] = new_connection
 
         _logger.info(f'New connection {new_connection} accepted, creating receiving client thread')
         t_receiver = threading.Thread(target=self.thread_client_receiver, args=(new_connection,), daemon=True)
         t_receiver.start()
 
+    def register_client(self, client_conn: objects.Client) -> None:
+        self.clients_unidentified[client_conn.identifier] = client_conn
+
+    def remove_client(self, client_conn: objects.Client) -> None:
+        if self.clients_unidentified.pop(client_conn.identifier, None) is not None:
+            _logger.debug(f"Delete {client_conn.identifier} from clients_unidentified")
+        if self.clients_identified.discard(client_conn):
+            _logger.debug(f"Delete {client_conn.identifier} identifier = {getattr(client_conn, '_identifier')} from clients_identified")
+        self.outbound.discard(client_conn)
+
     # ------------------------------------
     # Business Logic
     # ------------------------------------
@@ -214,11 +403,42 @@ class SocketTCPServer(NetworkSocket):
         self.client_messages.put(message)
 
     def send_to_client(self, client_conn: objects.Client, payload: str) -> None:
+        self.send_message(client_conn, self.server_message(client_conn, payload))
+
+    def server_message(self, client_conn: objects.Client, payload: str) -> ServerMessageModel:
         sender = MessageDestination(self.server_session.session_id, name=self.name, role=MessageRole.SERVER)
         to = MessageDestination(client_conn.user and client_conn.user.id or client_conn.user_id, name=self.name, role=MessageRole.USER)
-        message = ServerMessageModel.new_message(sender, sender, to, payload)
-
-        self.send_message(client_conn.connection, message)
+        return ServerMessageModel.new_message(sender, sender, to, payload)
+
+    def stream_to_client(self, client_conn: objects.Client, code: _c.Codes, chunks: t.Iterable[list[dict]],
+                         summary: t.Callable[[], dict] | None = None) -> int:
+        """Sends the list response ``code`` as a STREAM_BEGIN message, one STREAM_CHUNK message per chunk of rows, sent
+        as soon as ``chunks`` produces it, and a STREAM_END message with the row count and the ``summary`` of the
+        rows. The next chunk is only pulled once the previous one fits in the client outbound queue, so only the chunk
+        being sent is held in memory and a slow client never has stream frames dropped. Returns the rows sent"""
+        stream: int = next(self.streams)
+        if not self.send_stream_message(client_conn, _c.make_message(_c.Codes.STREAM_BEGIN, json.dumps({"stream": stream, "code": code.name}))):
+            return 0
+        count: int = 0
+        try:
+            for rows in chunks:
+                if not self.send_stream_message(client_conn, _c.make_message(_c.Codes.STREAM_CHUNK, json.dumps({"stream": stream, "items": rows}))):
+                    break  # disconnected or not draining, stop reading the rows
+                count += len(rows)
+        finally:  # the client renders what it got so far even if the query failed half way
+            end = {"stream": stream, "count": count, **(summary() if summary else {})}
+            self.send_stream_message(client_conn, _c.make_message(_c.Codes.STREAM_END, json.dumps(end)))
+        return count
+
+    def send_stream_message(self, client_conn: objects.Client, payload: str) -> bool:
+        """Queues the message once it fits in the client outbound queue. False if the client disconnected or did not
+        drain within ``SOCKET_RESPONSE_STREAM_TIMEOUT``"""
+        frame = self.encode_model(self.server_message(client_conn, payload), client_conn.codec, client_conn.reader.framing,
+                                  client_conn.compression)
+        if not self.outbound.wait_for_room(client_conn, len(frame)):
+            _logger.warning(f"{client_conn} did not drain its outbound queue, stream stopped")
+            return False
+        return self.send_frame_to_client(client_conn, frame) > 0
 
     # ------------------------------------
     # Getter and setters
@@ -0,0 +1,173 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+
+from chatbox.app import constants
+from .framing import Framing, FrameError, framing_handshake
+from .server import SocketTCPServer
+from ..components.server.router import RouterStopRoute
+from ..model.message import ServerMessageModel
+from . import objects
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+_logger = logging.getLogger(__name__)
+
+
+class AsyncSocketTCPServer(SocketTCPServer):
+    """``SocketTCPServer`` serving its clients from an asyncio event loop (``asyncio.start_server``).
+
+    Socket I/O runs as coroutines on the loop thread, ``Router.route`` (controllers and repositories are blocking)
+    runs in a bounded thread pool, so a slow handler never stalls the loop. Messages of a client are still routed
+    one at a time and in order. Frames sent to a client go through its ``OutboundQueue`` like in the other modes, a
+    coroutine per client writes them and waits for the transport to drain before taking more. Speaks the same wire
+    protocol as ``SocketTCPServer``.
+    """
+    IO_MODE: str = "asyncio"
+    AUTH_BLOCKING: bool = False  # logins complete on the AuthExecutor threads, the loop keeps serving
+    SOCKET_LISTEN_BACKLOG: int = constants.SOCKET_SELECTOR_BACKLOG
+
+    def __init__(self, host: str, port: int, workers: int = constants.SOCKET_ASYNC_EXECUTOR_WORKERS):
+        super().__init__(host, port)
+
+        self.executor: concurrent.futures.ThreadPoolExecutor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="router")
+        self.writers: dict[int, tuple[asyncio.StreamWriter, asyncio.Event]] = {}  # by Client.memory_id, identifier changes at login
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._stop: asyncio.Event | None = None
+        self._stopped: threading.Event = threading.Event()
+
+    def start(self):
+        self.message_writer.start()
+        self.auth_executor.start()
+        self.start_listening()
+        self.client_messages.start(self.thread_broadcaster)
+
+        loop_factory = constants.SOCKET_ASYNC_USE_UVLOOP and uvloop and uvloop.new_event_loop or None
+        try:
+            with asyncio.Runner(loop_factory=loop_factory) as runner:
+                runner.run(self.serve())
+        except KeyboardInterrupt as error:
+            _logger.warning(f"Interrupted by User while serving client connections, reason: {error}")
+        finally:
+            self.stop_listening()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self._stopped.set()
+        _logger.warning(f"Exit naturally, total_client_connected={self.total_client_connected}")
+
+    def close_before(self):
+        super().close_before()
+        if not self.loop or self._stopped.is_set():
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._stop.set)
+        except RuntimeError:  # loop already closed
+            return
+        self._stopped.wait(timeout=constants.SOCKET_SELECTOR_TIMEOUT)
+
+    async def serve(self) -> None:
+        self._stop = asyncio.Event()
+        self.loop = asyncio.get_running_loop()
+
+        server = await asyncio.start_server(self.handle_client, sock=self.socket)
+        self.server_started.set()
+        _logger.info(f"{self} serving on {self.loop.__class__.__name__}")
+        async with server:
+            await self._stop.wait()  # blocking - loop
+
+    async def handle_client(self, stream_reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.total_client_connected += 1
+        client_conn = self.create_client_object(writer.get_extra_info("socket"), objects.Address(*writer.get_extra_info("peername")[:2]))
+        _logger.info(f'New connection {client_conn} accepted')
+
+        outbound: asyncio.Task | None = None
+        try:
+            if not await self.accept_framing_handshake_async(client_conn, stream_reader, writer):
+                return
+            ready = asyncio.Event()
+            self.writers[client_conn.memory_id] = writer, ready
+            outbound = asyncio.create_task(self.write_outbound(client_conn, writer, ready))
+            self.register_client(client_conn)
+
+            while True:
+                message: ServerMessageModel | None = await self.receive_message_async(client_conn, stream_reader)
+                if not message:
+                    break
+
+                try:
+                    await self.loop.run_in_executor(self.executor, self.router.route, client_conn, message)
+                except RouterStopRoute:
+                    break
+
+            _logger.warning(f"{client_conn} receive a close network socket message, closing socket... ")
+        except (ConnectionError, FrameError) as error:
+            _logger.error(f"{client_conn} closing connection ... [I/O_ERROR_CONNECTION] - Connection error, reason: {error}")
+        except Exception as error:
+            _logger.error(f"{client_conn} closing connection ... {error.__class__.__name__} - Something went wrong, reason: {error}")
+        finally:
+            self.writers.pop(client_conn.memory_id, None)
+            self.remove_client(client_conn)
+            if outbound:
+                outbound.cancel()
+            writer.close()
+
+    async def accept_framing_handshake_async(self, client_conn: objects.Client, stream_reader: asyncio.StreamReader,
+                                             writer: asyncio.StreamWriter) -> bool:
+        """Coroutine version of ``accept_framing_handshake``"""
+        reader = client_conn.reader
+        while reader.handshake_pending():
+            data = await stream_reader.read(constants.SOCKET_STREAM_LENGTH)
+            if not data:
+                return False
+            reader.feed(data)
+
+        framing: Framing | None = self.agree_framing(client_conn)
+        if framing is not None:
+            writer.write(framing_handshake(framing))
+            await writer.drain()
+            self.flush(client_conn.connection)
+        return True
+
+    async def receive_message_async(self, client_conn: objects.Client, stream_reader: asyncio.StreamReader,
+                                    buffer_size: int = constants.SOCKET_STREAM_LENGTH) -> ServerMessageModel | None:
+        reader = client_conn.reader
+        while (frame := reader.next_frame()) is None:
+            data = await stream_reader.read(buffer_size)
+            if not data:
+                return None
+            reader.feed(data)
+
+        return self.load_message(client_conn, frame, reader.flags)
+
+    async def write_outbound(self, client_conn: objects.Client, writer: asyncio.StreamWriter, ready: asyncio.Event) -> None:
+        """Writes the frames queued for the client in the order they were sent. Waits for the transport to drain
+        before taking more, meanwhile new frames stay in the ``OutboundQueue`` and its watermarks bound them"""
+        try:
+            while True:
+                await ready.wait()
+                ready.clear()
+                while frames := self.outbound.take(client_conn):
+                    writer.writelines(frames)
+                    await writer.drain()
+                if frames is None:
+                    return
+        except ConnectionError as error:
+            _logger.warning(f"{client_conn} outbound write failed, reason: {error}")
+
+    def send_frame_to_client(self, client_conn: objects.Client, frame: bytes) -> int:
+        """Thread safe, queues the frame on the client outbound queue and wakes its writer up if the queue was empty"""
+        entry = self.writers.get(client_conn.memory_id)
+        if entry is None or self.loop is None:
+            return -1
+
+        queued, idle = self.outbound.enqueue(client_conn, frame)
+        if idle:
+            try:
+                self.loop.call_soon_threadsafe(entry[1].set)
+            except RuntimeError:  # loop already closed
+                return -1
+        return queued
@@ -0,0 +1,218 @@
+import collections
+import concurrent.futures
+import logging
+import queue
+import selectors
+import socket
+import threading
+
+from chatbox.app import constants
+from .server import SocketTCPServer
+from ..components.server.router import RouterStopRoute
+from ..model.message import ServerMessageModel
+from . import objects
+
+_logger = logging.getLogger(__name__)
+
+
+class SelectorLoop:
+    """Event loop thread owning a share of the client sockets of a ``SocketTCPServerSelector``.
+
+    Sockets are only read when the selector reports them readable, with ``MSG_DONTWAIT``, so the loop never blocks on
+    a single client. Messages are routed on the server router pool (controllers and repositories are blocking), one
+    at a time and in order per client. An idle client costs a selector key, its ``Client`` object and an empty
+    ``FrameReader``. Clients are keyed by ``Client.memory_id``, their identifier changes at login.
+    """
+
+    def __init__(self, server: 'SocketTCPServerSelector', name: str):
+        self.server: SocketTCPServerSelector = server
+        self.name: str = name
+        self.selector: selectors.BaseSelector = selectors.DefaultSelector()
+        self.clients: dict[int, objects.Client] = {}
+        self._handshaking: set[int] = set()  # clients that did not send their first bytes yet
+        self._pending: queue.SimpleQueue[objects.Client] = queue.SimpleQueue()
+        self._closing: queue.SimpleQueue[objects.Client] = queue.SimpleQueue()  # stopped by their route, closed by the loop
+        self._routing_lock: threading.Lock = threading.Lock()
+        self._routing: dict[int, collections.deque[ServerMessageModel]] = {}  # messages of the clients being routed
+
+        # new clients are handed over by the accepting thread, the selector is only ever touched by the loop thread.
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self._wakeup_sender.setblocking(False)
+        self.selector.register(self._wakeup_receiver, selectors.EVENT_READ, None)
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def add_client(self, client_conn: objects.Client) -> None:
+        self.clients[client_conn.memory_id] = client_conn  # counted right away, so the server balances new clients
+        self._pending.put(client_conn)
+        self.wakeup()
+
+    def wakeup(self) -> None:
+        try:
+            self._wakeup_sender.send(b"\0")
+        except (BlockingIOError, OSError):  # already woken up or closing
+            pass
+
+    def run(self) -> None:
+        _logger.info(f"{self.name} running")
+        try:
+            while self.server.server_listening:
+                for key, _ in self.selector.select(timeout=constants.SOCKET_SELECTOR_TIMEOUT):  # blocking - t_selector
+                    if key.data is None:
+                        self._register_pending()
+                    else:
+                        self.on_readable(key.data)
+        finally:
+            self.close()
+
+    def on_readable(self, client_conn: objects.Client) -> None:
+        reader = client_conn.reader
+        try:
+            received = reader.fill(client_conn.connection, flags=socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            return
+        except OSError as error:
+            _logger.error(f"{client_conn} connection error in {self.name}, reason: {error}")
+            self.close_client(client_conn)
+            return
+
+        if not received:
+            _logger.warning(f"{client_conn} receive a close network socket message, closing socket... ")
+            self.close_client(client_conn)
+            return
+
+        try:
+            if client_conn.memory_id in self._handshaking:
+                if reader.handshake_pending():
+                    return
+                self._handshaking.discard(client_conn.memory_id)
+                self.server.reply_framing_handshake(client_conn)
+                self.server.register_client(client_conn)
+
+            while (frame := reader.next_frame()) is not None:
+                message = self.server.load_message(client_conn, frame, reader.flags)
+                if message:
+                    self.dispatch(client_conn, message)
+        except BaseException as error:
+            _logger.error(f"{client_conn} closing connection ... {error.__class__.__name__} - Something went wrong in {self.name}, reason: {error}")
+            self.close_client(client_conn)
+            return
+
+        reader.release()
+
+    def dispatch(self, client_conn: objects.Client, message: ServerMessageModel) -> None:
+        """Routes the message on the router pool, after the messages of the client still being routed"""
+        with self._routing_lock:
+            messages = self._routing.get(client_conn.memory_id)
+            if messages is not None:
+                messages.append(message)
+                return
+            self._routing[client_conn.memory_id] = collections.deque((message, ))
+        try:
+            self.server.executor.submit(self.route, client_conn)
+        except RuntimeError:  # server closing, the pool is shut down
+            pass
+
+    def route(self, client_conn: objects.Client) -> None:
+        """Router thread, routes the messages of the client until none is left"""
+        while True:
+            with self._routing_lock:
+                messages = self._routing.get(client_conn.memory_id)
+                if not messages:  # done, or closed by the loop meanwhile
+                    self._routing.pop(client_conn.memory_id, None)
+                    return
+                message = messages.popleft()
+            try:
+                self.server.router.route(client_conn, message)
+            except RouterStopRoute:
+                self.stop_client(client_conn)
+                return
+            except Exception as error:
+                _logger.error(f"{client_conn} closing connection ... {error.__class__.__name__} - Something went wrong in {self.name}, reason: {error}")
+                self.stop_client(client_conn)
+                return
+
+    def stop_client(self, client_conn: objects.Client) -> None:
+        """Hands the client over to the loop thread to be closed, messages it still sends are dropped meanwhile"""
+        with self._routing_lock:
+            self._routing[client_conn.memory_id] = collections.deque()  # kept, so dispatch never routes the client again
+        self._closing.put(client_conn)
+        self.wakeup()
+
+    def close_client(self, client_conn: objects.Client) -> None:
+        self.clients.pop(client_conn.memory_id, None)
+        self._handshaking.discard(client_conn.memory_id)
+        with self._routing_lock:
+            self._routing.pop(client_conn.memory_id, None)
+        try:
+            self.selector.unregister(client_conn.connection)
+        except (KeyError, ValueError):
+            pass
+        client_conn.connection.close()
+        self.server.remove_client(client_conn)
+
+    def close(self) -> None:
+        for client_conn in list(self.clients.values()):
+            self.close_client(client_conn)
+        self.selector.close()
+        self._wakeup_receiver.close()
+        self._wakeup_sender.close()
+
+    def _register_pending(self) -> None:
+        try:
+            while self._wakeup_receiver.recv(constants.SOCKET_STREAM_LENGTH):
+                pass
+        except BlockingIOError:
+            pass
+
+        while True:
+            try:
+                client_conn = self._closing.get_nowait()
+            except queue.Empty:
+                break
+            if client_conn.memory_id in self.clients:
+                self.close_client(client_conn)
+
+        while True:
+            try:
+                client_conn = self._pending.get_nowait()
+            except queue.Empty:
+                return
+            self._handshaking.add(client_conn.memory_id)
+            self.selector.register(client_conn.connection, selectors.EVENT_READ, client_conn)
+
+
+class SocketTCPServerSelector(SocketTCPServer):
+    """``SocketTCPServer`` where a few ``SelectorLoop`` threads (epoll on Linux) own every client socket,
+    instead of one receiver thread per client."""
+    IO_MODE: str = "epoll"
+    AUTH_BLOCKING: bool = False  # logins complete on the AuthExecutor threads, the loop keeps serving
+    SOCKET_LISTEN_BACKLOG: int = constants.SOCKET_SELECTOR_BACKLOG
+
+    def __init__(self, host: str, port: int, loops: int = constants.SOCKET_SELECTOR_LOOPS, workers: int = constants.SOCKET_SELECTOR_ROUTER_WORKERS):
+        super().__init__(host, port)
+        self.executor: concurrent.futures.ThreadPoolExecutor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="router")
+        self.loops: list[SelectorLoop] = [SelectorLoop(self, f"selector-loop-{index}") for index in range(max(loops, 1))]
+
+    def start_before(self):
+        self.start_listening()
+        for loop in self.loops:
+            threading.Thread(target=loop.run, name=loop.name, daemon=True).start()
+
+    def close_before(self):
+        super().close_before()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for loop in self.loops:
+            loop.wakeup()
+
+    def accept_new_connection(self, client: socket.socket, address: objects.Address) -> None:
+        self.total_client_connected += 1
+
+        new_connection = self.create_client_object(client, address)
+        loop = min(self.loops, key=len)
+
+        _logger.info(f'New connection {new_connection} accepted, handing it over to {loop.name}')
+        loop.add_client(new_connection)
@@ -0,0 +1,45 @@
+import threading
+import typing as t
+
+from ..model.message import MessageRole
+
+EMPTY: t.Final[frozenset[int]] = frozenset()
+
+
+class SubscriberRegistry:
+    """``(role, group or channel id) -> user ids`` of every group and channel, kept in memory for the send path.
+
+    Writers replace the whole frozenset under a lock (copy on write), so the send path reads a consistent snapshot
+    with a plain dict lookup: membership checks and recipients resolution cost no database read.
+    """
+
+    def __init__(self):
+        self._subscribers: dict[tuple[MessageRole, int], frozenset[int]] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def load(self, role: MessageRole, members: t.Mapping[int, t.Iterable[int]]) -> None:
+        """Replaces every entry of ``role`` with ``members``, ``id -> user ids``"""
+        with self._lock:
+            self._subscribers = {key: user_ids for key, user_ids in self._subscribers.items() if key[0] is not role}
+            for identifier, user_ids in members.items():
+                if user_ids := frozenset(user_ids):
+                    self._subscribers[(role, identifier)] = user_ids
+
+    def get(self, role: MessageRole, identifier: int) -> frozenset[int]:
+        return self._subscribers.get((role, identifier), EMPTY)
+
+    def is_subscriber(self, role: MessageRole, identifier: int, user_id: int) -> bool:
+        return user_id in self._subscribers.get((role, identifier), EMPTY)
+
+    def set(self, role: MessageRole, identifier: int, user_ids: t.Iterable[int]) -> frozenset[int]:
+        """Replaces the subscribers of the group or channel, an empty set (e.g. once deleted) drops the entry"""
+        user_ids = frozenset(user_ids)
+        with self._lock:
+            if user_ids:
+                self._subscribers[(role, identifier)] = user_ids
+            else:
+                self._subscribers.pop((role, identifier), None)
+        return user_ids
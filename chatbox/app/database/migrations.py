@@ -0,0 +1,80 @@
+import logging
+import sqlite3
+import typing as t
+from dataclasses import dataclass
+
+from chatbox.app.database.orm.sqlite_conn import SQLITEConnection, SQLITEConnectionException, SQLExecution
+
+_logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+	"""Upgrade of a database created by an older schema, ``script`` runs only while ``pending`` says so"""
+	name: str
+	pending: t.Callable[[SQLITEConnection], bool]
+	script: str
+
+
+def _table_columns(database: SQLITEConnection, table: str) -> set[str]:
+	return {column["name"] for column in database.get_many(f"PRAGMA table_info(`{table}`)")}
+
+
+def _index_exists(database: SQLITEConnection, index: str) -> bool:
+	return database.get("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name", {"name": index}) is not None
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+	Migration(
+		name="group_member",
+		pending=lambda database: "members" in _table_columns(database, "group"),
+		script="""
+			BEGIN;
+			INSERT OR IGNORE INTO `group_member` (`group_id`, `user_id`)
+				SELECT `group`.id, user.id
+				FROM `group`, json_each(`group`.members) AS member
+				INNER JOIN user ON user.username = member.value
+				WHERE json_valid(`group`.members)
+				ORDER BY `group`.id, member.key;
+			ALTER TABLE `group` DROP COLUMN `members`;
+			COMMIT;
+		""",
+	),
+	Migration(
+		name="message_history_indexes",  # superseded by the (..., id) indexes of the keyset pagination
+		pending=lambda database: _index_exists(database, "message__owner_name"),
+		script="""
+			BEGIN;
+			DROP INDEX IF EXISTS `message__owner_name`;
+			DROP INDEX IF EXISTS `message__from_name`;
+			DROP INDEX IF EXISTS `message__from_role`;
+			DROP INDEX IF EXISTS `message__to_name`;
+			COMMIT;
+		""",
+	),
+	Migration(
+		name="message_fts",  # messages written before the full-text index existed
+		pending=lambda database: (
+			database.get("SELECT 1 FROM `message` LIMIT 1") is not None
+			and database.get("SELECT 1 FROM `message_fts_docsize` LIMIT 1") is None
+		),
+		script="INSERT INTO `message_fts` (`message_fts`) VALUES ('rebuild');",
+	),
+)
+
+
+def migrate(database: SQLITEConnection, migrations: t.Iterable[Migration] = MIGRATIONS) -> list[str]:
+	"""Runs the pending migrations, in order, returns the names of the ones applied"""
+	applied: list[str] = []
+	for migration in migrations:
+		with database.writer_lock:
+			if not migration.pending(database):
+				continue
+			_logger.warning(f"Migrating database {database.database}: {migration.name}")
+			try:
+				database(migration.script, execution_type=SQLExecution.EXECUTE_SCRIPT)
+			except sqlite3.Error as error:
+				database.connection.rollback()
+				raise SQLITEConnectionException(f"{SQLITEConnectionException.ERROR_RUNTIME} - migration {migration.name} failed, reason: {error}") from None
+		applied.append(migration.name)
+	return applied
@@ -6,6 +6,7 @@ from datetime import datetime
 
 from chatbox.app.constants import DATETIME_DEFAULT
 from chatbox.app.database.orm.abstract_connector import Connector
+from chatbox.app.database.orm.cache import EntityCache
 from chatbox.app.database.orm.sqlite_conn import SQLITEConnection, SQLITEConnectionException
 from chatbox.app.database.orm.types import Item, T, DatabaseOperations
 
@@ -28,7 +29,9 @@ class RepositoryBase(Connector):
 	_get_query_by_name = "SELECT `__table`.* __jn_cols FROM `__table` __join WHERE `__table`.__name = :__name ORDER BY `__table`.`created` DESC LIMIT 1"
 	_get_query_where = "SELECT `__table`.* __jn_cols FROM `__table` __join WHERE __where ORDER BY `__table`.`created` DESC LIMIT :limit OFFSET :offset"
 	_get_many_query = "SELECT `__table`.* __jn_cols FROM `__table` __join LIMIT :limit OFFSET :offset"
+	_iter_query = "SELECT `__table`.* __jn_cols FROM `__table` __join WHERE (__where) AND `__table`.id > :after_id ORDER BY `__table`.id LIMIT :limit"
 	_create_query = "INSERT INTO `__table` (__columns) VALUES (__params)"
+	_create_returning_query = "INSERT INTO `__table` (__columns) VALUES (__params) RETURNING *"
 	_update_query = f"UPDATE `__table` SET {QUERY_REPLACE_KEY_EQUAL} WHERE id = :id"
 	_delete_query = "DELETE FROM `__table` WHERE id = :id"
 
@@ -44,11 +47,15 @@ class RepositoryBase(Connector):
 
 	_dynamic_columns: tuple[str] = tuple()
 
+	# (repository class, query template, parameter keys) -> compiled SQL, shared by every instance of the process
+	_compiled_queries: t.ClassVar[dict[tuple[type, str, tuple[str, ...] | None], str]] = {}
+
 	__raw_query: str | None = None
 
-	def __init__(self, database: SQLITEConnection):
+	def __init__(self, database: SQLITEConnection, cache: EntityCache | None = None):
 		super().__init__()
 		self.__database: SQLITEConnection = database
+		self.cache: EntityCache | None = cache  # read-through for get and get_by_name, invalidated by the writes
 
 	def __enter__(self, raw_query: str):
 		self.__raw_query = raw_query
@@ -88,22 +95,30 @@ class RepositoryBase(Connector):
 	def get(self, _id: int) -> T | None:
 		if DatabaseOperations.READ not in self._operations:
 			raise RuntimeError(f"{self._table} cannot {DatabaseOperations.READ.name}!")
+		if self.cache is not None and (item := self.cache.get(_id)) is not None:
+			return item
+		generation: int | None = self.cache.generation if self.cache is not None else None
 
 		try:
-			return self._build_object(self.db.get(self.__query_build(self._get_query), {"id": _id}))
+			item = self._build_object(self.db.get(self.__query_build(self._get_query), {"id": _id}))
 		except SQLITEConnectionException as error:
 			_logger.exception(f"Error while get {self._table} {_id}, reason {error}", exc_info=error)
 			return None
+		return self._cache_store(item, generation)
 
 	def get_by_name(self, name: int | str) -> T | None:
 		if DatabaseOperations.READ not in self._operations:
 			raise RuntimeError(f"{self._table} cannot {DatabaseOperations.READ.name}!")
+		if self.cache is not None and (item := self.cache.get_by_name(name)) is not None:
+			return item
+		generation: int | None = self.cache.generation if self.cache is not None else None
 
 		try:
-			return self._build_object(self.db.get(self.__query_build(self._get_query_by_name), {self._name: name}))
+			item = self._build_object(self.db.get(self.__query_build(self._get_query_by_name), {self._name: name}))
 		except SQLITEConnectionException as error:
 			_logger.exception(f"Error while get {self._table} by name {name}, reason {error}", exc_info=error)
 			return None
+		return self._cache_store(item, generation)
 
 	def get_where(self, where: str, params: dict, limit: int = 100, offset: int = 0) -> list[T]:
 		if DatabaseOperations.READ not in self._operations:
@@ -126,6 +141,30 @@ class RepositoryBase(Connector):
 			_logger.exception(f"Error while get-many {self._table}, limit = {limit}, offset = {offset}, reason {error}", exc_info=error)
 			return []
 
+	def iter_where(self, where: str = "1", params: dict | None = None, chunk_size: int = 100, limit: int | None = None) -> t.Iterator[list[T]]:
+		"""Rows matching ``where`` in id order, by chunks of ``chunk_size``, up to ``limit`` rows (every row if None).
+		Each chunk is its own keyset query, no connection is held while the caller works on a chunk"""
+		if DatabaseOperations.READ_MANY not in self._operations:
+			raise RuntimeError(f"{self._table} cannot {DatabaseOperations.READ_MANY.name}!")
+		query = self.__query_build(self._iter_query.replace("__where", where))
+		params = {**(params or {}), "limit": chunk_size, "after_id": 0}
+
+		while limit is None or limit > 0:
+			if limit is not None:
+				params["limit"] = min(chunk_size, limit)
+				limit -= params["limit"]
+			try:
+				rows: list[Item] = self.db.get_many(query, params)
+			except SQLITEConnectionException as error:
+				_logger.exception(f"Error while iterating {self._table} using where {where}, after id {params['after_id']}, reason {error}", exc_info=error)
+				return
+			if not rows:
+				return
+			params["after_id"] = rows[-1]["id"]
+			yield self._build_objects(rows)
+			if len(rows) < params["limit"]:
+				return
+
 	def get_many_raw(self, query: str, params: dict | tuple | list) -> list[T]:
 		if DatabaseOperations.READ_MANY not in self._operations:
 			raise RuntimeError(f"{self._table} cannot {DatabaseOperations.READ_MANY.name}!")
@@ -144,16 +183,48 @@ class RepositoryBase(Connector):
 			data = (data, )
 
 		try:
-			self.db.create(self.__query_build(self._create_query), data)
+			items: list[Item] = self.db.create_returning(self.__query_build(self._create_returning_query), data)
 		except SQLITEConnectionException as error:
 			_logger.exception(f"Error while creating new {self._table}, data {data}, reason {error}", exc_info=error)
 			return None
 		else:
 			self.created = self.db.created
-			created_id: int | None = self.db.cursor.lastrowid
-			if not created_id:
+			self._cache_invalidate_rows(data)
+			if not items:
 				return None
-			return self.get(created_id)
+			return self._build_created(items[-1])
+
+	def create_many(self, data: t.Sequence[dict]) -> int:
+		"""Inserts all the rows with one executemany in a single transaction, returns the rows created or -1 on error"""
+		if DatabaseOperations.WRITE_CREATE_MANY not in self._operations:
+			raise RuntimeError(f"{self._table} cannot {DatabaseOperations.WRITE_CREATE_MANY.name}!")
+		if not data:
+			return 0
+
+		try:
+			self.db.create(self.__query_build(self._create_query), data)
+		except SQLITEConnectionException as error:
+			_logger.exception(f"Error while creating {len(data)} new {self._table}, reason {error}", exc_info=error)
+			return -1
+		else:
+			self.created = self.db.created
+			self._cache_invalidate_rows(data)
+			return self.created
+
+	def create_many_returning(self, data: t.Sequence[dict]) -> list[T]:
+		"""Inserts all the rows in a single transaction, returns the objects of every row created"""
+		if DatabaseOperations.WRITE_CREATE_MANY not in self._operations:
+			raise RuntimeError(f"{self._table} cannot {DatabaseOperations.WRITE_CREATE_MANY.name}!")
+
+		try:
+			items: list[Item] = self.db.create_returning(self.__query_build(self._create_returning_query), data)
+		except SQLITEConnectionException as error:
+			_logger.exception(f"Error while creating {len(data)} new {self._table}, reason {error}", exc_info=error)
+			return []
+		else:
+			self.created = self.db.created
+			self._cache_invalidate_rows(data)
+			return [self._build_created(item) for item in items]
 
 	def update(self, _id: int, data: dict) -> T | None:
 		if DatabaseOperations.WRITE_UPDATE not in self._operations:
@@ -168,6 +239,8 @@ class RepositoryBase(Connector):
 			return None
 		else:
 			self.updated = self.db.updated
+			if self.cache is not None:
+				self.cache.invalidate(_id)
 			return self.get(_id)
 
 	def delete(self, _id: int) -> bool:
@@ -181,8 +254,23 @@ class RepositoryBase(Connector):
 			return False
 		else:
 			self.deleted = self.db.deleted
+			if self.cache is not None:
+				self.cache.invalidate(_id)
 			return True
 
+	def _cache_store(self, item: T | None, generation: int | None) -> T | None:
+		if item is not None and self.cache is not None:
+			self.cache.put(item.id, getattr(item, self._name), item, generation)
+		return item
+
+	def _cache_invalidate_rows(self, data: t.Iterable[dict]) -> None:
+		"""A new row may take the name of a cached one, ``get_by_name`` returns the newest"""
+		if self.cache is None:
+			return
+		for row in data:
+			if self._name in row:
+				self.cache.invalidate_name(row[self._name])
+
 	def _build_object(self, data: Item) -> T | None:
 		if not data:
 			return
@@ -202,6 +290,11 @@ class RepositoryBase(Connector):
 		except KeyError as error:
 			_logger.exception(f"Error while building object for table {self._table}, reason {error}", exc_info=error)
 
+	def _build_created(self, data: Item) -> T | None:
+		if self._join:
+			return self.get(data["id"])  # joined columns are not part of the RETURNING row
+		return self._build_object(data)
+
 	def _build_objects(self, data: t.Iterable[Item]) -> list:
 		return [item for item in [self._build_object(item_raw) for item_raw in data]]
 
@@ -216,11 +309,16 @@ class RepositoryBase(Connector):
 		if self.__raw_query is not None and isinstance(self.__raw_query, str):
 			return self.__raw_query
 
-		query = self.__inject_table_data(query)
-		query = self.__inject_parameters(params, query)
+		key = (self.__class__, query, params and tuple(params) or None)
+		compiled: str | None = self._compiled_queries.get(key)
+		if compiled is not None:
+			return compiled
 
-		_logger.debug("Build Query : %s", query)
-		return query
+		compiled = self.__inject_parameters(params, self.__inject_table_data(query))
+		self._compiled_queries[key] = compiled
+
+		_logger.debug("Build Query : %s", compiled)
+		return compiled
 
 	def __inject_table_data(self, query):
 		for key in sorted(list(QUERY_REPLACE_KEYS)):
@@ -0,0 +1,97 @@
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+
+from chatbox.app.database.orm.types import T
+
+
+class EntityCache:
+	"""Bounded LRU of repository objects, indexed by id and by name, entries expire ``ttl`` seconds after being read
+	from the database.
+
+	Repositories invalidate the entries they write, ``listener`` is told of these invalidations so the caches of the
+	other cluster workers drop the entry too. Rows changed behind their back (e.g. cascading deletes) are bounded by
+	``ttl``. ``generation`` guards the read-through: an object read before an invalidation is not stored"""
+
+	def __init__(self, max_entries: int, ttl: float):
+		self.max_entries: int = max_entries
+		self.ttl: float = ttl
+
+		self._entries: OrderedDict[int, tuple[float, str | int, T]] = OrderedDict()  # id -> (expires at, name, object), LRU first
+		self._names: dict[str | int, int] = {}
+		self._lock: threading.Lock = threading.Lock()
+		self.generation: int = 0
+		self.listener: t.Callable[[str, str | int], None] | None = None  # ("id" | "name", key) of every local invalidation
+
+		self.hits: int = 0
+		self.misses: int = 0
+		self.evictions: int = 0
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def get(self, _id: int) -> T | None:
+		with self._lock:
+			return self._get(_id)
+
+	def get_by_name(self, name: str | int) -> T | None:
+		with self._lock:
+			_id = self._names.get(name)
+			if _id is None:
+				self.misses += 1
+				return None
+			return self._get(_id)
+
+	def put(self, _id: int, name: str | int, item: T, generation: int) -> None:
+		"""Stores ``item`` unless an invalidation happened since ``generation`` was read"""
+		with self._lock:
+			if generation != self.generation:
+				return
+			self._pop(_id)
+			self._entries[_id] = (time.monotonic() + self.ttl, name, item)
+			self._names[name] = _id
+			while len(self._entries) > self.max_entries:
+				self._pop(next(iter(self._entries)))
+				self.evictions += 1
+
+	def invalidate(self, _id: int, notify: bool = True) -> None:
+		with self._lock:
+			self.generation += 1
+			self._pop(_id)
+		if notify and self.listener:
+			self.listener("id", _id)
+
+	def invalidate_name(self, name: str | int, notify: bool = True) -> None:
+		with self._lock:
+			self.generation += 1
+			_id = self._names.get(name)
+			if _id is not None:
+				self._pop(_id)
+		if notify and self.listener:
+			self.listener("name", name)
+
+	def clear(self) -> None:
+		with self._lock:
+			self.generation += 1
+			self._entries.clear()
+			self._names.clear()
+
+	def stats(self) -> dict[str, int]:
+		return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+	def _get(self, _id: int) -> T | None:
+		entry: tuple[float, str | int, T] | None = self._entries.get(_id)
+		if entry is None or entry[0] < time.monotonic():
+			if entry is not None:
+				self._pop(_id)
+			self.misses += 1
+			return None
+		self._entries.move_to_end(_id)
+		self.hits += 1
+		return entry[2]
+
+	def _pop(self, _id: int) -> None:
+		entry: tuple[float, str | int, T] | None = self._entries.pop(_id, None)
+		if entry is not None and self._names.get(entry[1]) == _id:
+			del self._names[entry[1]]
@@ -1,9 +1,13 @@
+import contextlib
 import os
+import queue
 import sqlite3
 import logging
+import threading
 import typing as t
 from enum import Enum
 
+from chatbox.app import constants
 from chatbox.app.database.orm.abstract_connector import Connector
 from chatbox.app.database.orm.types import SQLParams, Item
 
@@ -52,16 +56,35 @@ class SQLITEConnectionException(Exception):
 
 
 class SQLITEConnection(Connector):
+	"""Pool of connections to one SQLite database: a single writer and ``readers`` read-only connections.
 
-	def __init__(self, database: str, schema: t.Optional[str | os.PathLike] = None, data: t.Optional[str | os.PathLike] = None):
+	File databases run in WAL mode, readers never wait on the writer and writes are serialized by ``writer_lock``.
+	Every operation checks out its own cursor, ``created``, ``updated``, ``deleted`` and ``lastrowid`` are kept per thread.
+	In-memory databases cannot be shared between connections, they fall back to the writer connection for reads.
+
+	``connection`` and ``cursor`` are the writer connection and its cursor, used by ``__call__``.
+	"""
+
+	def __init__(
+		self,
+		database: str,
+		schema: t.Optional[str | os.PathLike] = None,
+		data: t.Optional[str | os.PathLike] = None,
+		readers: int = constants.DATABASE_READERS,
+	):
 		super().__init__()
 		self.database: str = database
+		self.in_memory: bool = database == ":memory:" or database.startswith("file::memory:") or not database
+		self._local: threading.local = threading.local()
 
 		sqlite3.enable_callback_tracebacks(True)
 		sqlite3.threadsafety = 3
-		self.connection: sqlite3.Connection = sqlite3.connect(database, check_same_thread=False)
-		self.connection.row_factory = sqlite3.Row
+		self.writer_lock: threading.RLock = threading.RLock()
+		self.connection: sqlite3.Connection = self._connect()
 		self.cursor: sqlite3.Cursor = self.connection.cursor()
+		if not self.in_memory:
+			self.connection.execute(f"PRAGMA journal_mode = {constants.DATABASE_JOURNAL_MODE}")
+			self.connection.execute(f"PRAGMA synchronous = {constants.DATABASE_SYNCHRONOUS}")
 
 		self.schema: t.Final[str | os.PathLike] = schema
 		if self.schema:
@@ -70,38 +93,95 @@ class SQLITEConnection(Connector):
 		if self.data:
 			self._init_data()
 
+		self.readers: list[sqlite3.Connection] = []
+		if not self.in_memory:
+			self.readers = [self._connect(read_only=True) for _ in range(max(readers, 0))]
+		self._readers_idle: queue.SimpleQueue[sqlite3.Connection] = queue.SimpleQueue()
+		for reader in self.readers:
+			self._readers_idle.put(reader)
 
 	def __del__(self):   # pragma: no cover
+		for reader in getattr(self, "readers", []):
+			reader.close()
 		self.connection.close()
 
 	def __call__(self,
 		query: str,
 		parameters: SQLParams | t.Iterable[SQLParams] = None,
-		execution_type: SQLExecution = SQLExecution.EXECUTE_ONE
+		execution_type: SQLExecution = SQLExecution.EXECUTE_ONE,
+		cursor: sqlite3.Cursor | None = None,
 	) -> t.Self:
-
+		cursor = cursor or self.cursor
 		try:
 			match execution_type:
 				case SQLExecution.EXECUTE_ONE:
-					self.cursor.execute(query, parameters or {})
+					cursor.execute(query, parameters or {})
 				case SQLExecution.EXECUTE_MANY:
-					self.cursor.executemany(query, parameters or [{}, ])
+					cursor.executemany(query, parameters or [{}, ])
 				case SQLExecution.EXECUTE_SCRIPT:
-					self.cursor.executescript(query)
+					cursor.executescript(query)
 				case _:
 					raise SQLITEConnectionException(f"{SQLITEConnectionException.ERROR_RUNTIME} - execution {execution_type} is not supported.")
 		except UnicodeEncodeError as error:
 			_logger.exception(f"Error while performing SQL operation {execution_type.name}, query {query}, params {parameters}, reason : {error}", exc_info=error)
 		return self
 
+	@property
+	def created(self) -> int:
+		return getattr(self._local, "created", -1)
+
+	@created.setter
+	def created(self, value: int) -> None:
+		self._local.created = value
+
+	@property
+	def updated(self) -> int:
+		return getattr(self._local, "updated", -1)
+
+	@updated.setter
+	def updated(self, value: int) -> None:
+		self._local.updated = value
+
+	@property
+	def deleted(self) -> int:
+		return getattr(self._local, "deleted", -1)
+
+	@deleted.setter
+	def deleted(self, value: int) -> None:
+		self._local.deleted = value
+
+	@property
+	def lastrowid(self) -> int | None:
+		"""Row id of the last row inserted by ``create`` in the calling thread"""
+		return getattr(self._local, "lastrowid", None)
+
+	@contextlib.contextmanager
+	def reader(self) -> t.Iterator[sqlite3.Connection]:
+		"""Checks out an idle reader connection, the writer one for in-memory databases"""
+		if not self.readers:
+			with self.writer_lock:
+				yield self.connection
+			return
+
+		connection = self._readers_idle.get()  # blocking - until a reader is idle
+		try:
+			yield connection
+		finally:
+			self._readers_idle.put(connection)
+
 	def get(self, query: str, parameters: SQLParams = None) -> Item | None:
-		self._run_query(query, parameters, crud_operation=SQLCRUDOperation.READ)
-		item = self.cursor.fetchone()
+		with self.reader() as connection:
+			cursor = connection.cursor()
+			self._run_query(query, parameters, crud_operation=SQLCRUDOperation.READ, cursor=cursor)
+			item = cursor.fetchone()
 		return item and dict(item) or None
 
 	def get_many(self, query: str, parameters: SQLParams = None) -> list[Item]:
-		self._run_query(query, parameters, crud_operation=SQLCRUDOperation.READ_MANY)
-		return [dict(item) for item in self.cursor.fetchall()]
+		with self.reader() as connection:
+			cursor = connection.cursor()
+			self._run_query(query, parameters, crud_operation=SQLCRUDOperation.READ_MANY, cursor=cursor)
+			items = cursor.fetchall()
+		return [dict(item) for item in items]
 
 	def create(self, query: str, parameters: tuple[SQLParams] | list[SQLParams] | t.Iterable[SQLParams] = None) -> t.Self:
 		execution_type = SQLExecution.EXECUTE_MANY
@@ -109,10 +189,25 @@ class SQLITEConnection(Connector):
 			parameters = parameters[0]
 			execution_type = SQLExecution.EXECUTE_ONE
 
-		self._run_query(query, parameters, crud_operation=SQLCRUDOperation.CREATE, execution_type=execution_type)
-		self.created = self.cursor.rowcount
+		cursor = self._write(query, parameters, crud_operation=SQLCRUDOperation.CREATE, execution_type=execution_type)
+		self.created = cursor.rowcount
+		self._local.lastrowid = cursor.lastrowid
 		return self
 
+	def create_returning(self, query: str, parameters: t.Sequence[SQLParams]) -> list[Item]:
+		"""``create`` of an ``INSERT ... RETURNING`` query, returns the rows inserted, in order, in one transaction"""
+		items: list[Item] = []
+		with self.writer_lock:
+			cursor = self.connection.cursor()
+			with self._transaction(self.connection, SQLCRUDOperation.CREATE):
+				for row_parameters in parameters:  # executemany does not return the RETURNING rows
+					self(query, row_parameters, cursor=cursor)
+					items.extend(dict(item) for item in cursor.fetchall())
+
+		self.created = len(items)
+		self._local.lastrowid = items and items[-1].get("id") or None
+		return items
+
 	def update(self, query: str, parameters: SQLParams = None) -> t.Self:
 		def _inject_modified_timestamp():
 			query_block = query.split("SET")
@@ -120,29 +215,56 @@ class SQLITEConnection(Connector):
 			return " ".join(query_block)
 		query = _inject_modified_timestamp()
 
-		self._run_query(query, parameters, crud_operation=SQLCRUDOperation.UPDATE)
-		self.updated = self.cursor.rowcount
+		self.updated = self._write(query, parameters, crud_operation=SQLCRUDOperation.UPDATE).rowcount
 		return self
 
 	def delete(self, query: str, parameters: SQLParams = None) -> t.Self:
-		self._run_query(query, parameters, crud_operation=SQLCRUDOperation.DELETE)
-		self.deleted = self.cursor.rowcount
+		self.deleted = self._write(query, parameters, crud_operation=SQLCRUDOperation.DELETE).rowcount
 		return self
 
-	def _run_query(self,
+	def _write(self,
 		query: str,
 		parameters: SQLParams | t.Iterable[SQLParams],
 		crud_operation: SQLCRUDOperation,
 		execution_type: SQLExecution = SQLExecution.EXECUTE_ONE
+	) -> sqlite3.Cursor:
+		with self.writer_lock:
+			cursor = self.connection.cursor()
+			self._run_query(query, parameters, crud_operation=crud_operation, execution_type=execution_type, cursor=cursor)
+		return cursor
+
+	def _run_query(self,
+		query: str,
+		parameters: SQLParams | t.Iterable[SQLParams],
+		crud_operation: SQLCRUDOperation,
+		execution_type: SQLExecution = SQLExecution.EXECUTE_ONE,
+		cursor: sqlite3.Cursor | None = None,
 	) -> None:
+		with self._transaction(cursor and cursor.connection or self.connection, crud_operation):
+			self(query, parameters, execution_type, cursor=cursor)
+
+	@staticmethod
+	@contextlib.contextmanager
+	def _transaction(connection: sqlite3.Connection, crud_operation: SQLCRUDOperation) -> t.Iterator[None]:
 		try:
-			with self.connection:
-				self(query, parameters, execution_type)
+			with connection:
+				yield
 		except sqlite3.Error as sqlite_error:
 			error_type = SQLITEConnectionException.error_type(crud_operation)
 			_logger.exception(f"{error_type}, reason: {sqlite_error}", exc_info=sqlite_error)
 			raise SQLITEConnectionException(f"{error_type} - {sqlite_error}") from None
 
+	def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+		connection: sqlite3.Connection = sqlite3.connect(self.database, check_same_thread=False)
+		connection.row_factory = sqlite3.Row
+		if not self.in_memory:
+			connection.execute(f"PRAGMA cache_size = {constants.DATABASE_CACHE_SIZE}")
+			connection.execute(f"PRAGMA mmap_size = {constants.DATABASE_MMAP_SIZE}")
+			connection.execute(f"PRAGMA busy_timeout = {constants.DATABASE_BUSY_TIMEOUT}")
+		if read_only:
+			connection.execute("PRAGMA query_only = ON")
+		return connection
+
 	def _init_schema(self):
 		try:
 			with open(self.schema, "r") as file:
@@ -1,8 +1,11 @@
 import logging
 import typing as t
 
+from chatbox.app import constants
 from chatbox.app.core.model.channel import ChannelModel, ChannelMemberModel
 from chatbox.app.database.orm.abstract_base_repository import RepositoryBase
+from chatbox.app.database.orm.cache import EntityCache
+from chatbox.app.database.orm.sqlite_conn import SQLITEConnectionException
 from chatbox.app.database.orm.types import Item, DatabaseOperations
 
 _logger = logging.getLogger(__name__)
@@ -14,8 +17,8 @@ class ChannelRepository(RepositoryBase):
 	_model: ChannelModel = ChannelModel
 	_dynamic_columns: tuple[str] = ("members", )
 
-	def __init__(self, *args, repo_channel_member: 'ChannelMemberRepository'):
-		super().__init__(*args)
+	def __init__(self, *args, repo_channel_member: 'ChannelMemberRepository', **kwargs):
+		super().__init__(*args, **kwargs)
 
 		self.repo_channel_member: ChannelMemberRepository = repo_channel_member
 
@@ -24,9 +27,24 @@ class ChannelRepository(RepositoryBase):
 			return
 
 		members: list[ChannelMemberModel] = self.repo_channel_member.list_channel_members(data["id"])
-		data["members"] = members
+		data["members"] = members  # every member, as _build_objects loads them
 		return super()._build_object(data)
 
+	def _build_objects(self, data: t.Iterable[Item]) -> list[ChannelModel]:
+		"""Loads the members of all the channels with a single query instead of one per channel"""
+		data = list(data)
+		members = self.repo_channel_member.list_channels_members([item["id"] for item in data])
+
+		channels: list[ChannelModel] = []
+		for item in data:
+			item["members"] = members.get(item["id"], [])
+			channels.append(super()._build_object(item))
+		return channels
+
+	def iter_all(self, chunk_size: int = 100, limit: int | None = 100) -> t.Iterator[list[ChannelModel]]:
+		"""The channels of ``get_many`` by chunks, the members of a chunk are loaded with one query"""
+		return self.iter_where(chunk_size=chunk_size, limit=limit)
+
 	def list_user_channel(self, owner_id: id) -> list[ChannelModel]:
 		where = f"`owner_id` = :owner_id"
 		params = {"owner_id": owner_id}
@@ -63,9 +81,59 @@ class ChannelMemberRepository(RepositoryBase):
 			DatabaseOperations.DELETE_MANY,
 	)
 
-	def list_channel_members(self, channel_id: id) -> list[ChannelMemberModel]:
-		where = f"`channel_id` = :channel_id"
-		params = {"channel_id": channel_id}
+	def __init__(self, *args, cache_channel: EntityCache | None = None, **kwargs):
+		super().__init__(*args, **kwargs)
 
-		items = self.get_where(where, params)
-		return items
+		self.cache_channel: EntityCache | None = cache_channel  # channels embed their members, changes invalidate them
+
+	def create(self, data: t.Iterable[dict] | dict) -> ChannelMemberModel | None:
+		data = [data] if isinstance(data, dict) else list(data)
+		try:
+			return super().create(data)
+		finally:
+			self._invalidate_channels({row["channel_id"] for row in data})
+
+	def delete(self, _id: int) -> bool:
+		member: ChannelMemberModel | None = self.get(_id) if self.cache_channel is not None else None
+		try:
+			return super().delete(_id)
+		finally:
+			if member:
+				self._invalidate_channels({member.channel_id})
+
+	def _invalidate_channels(self, channel_ids: t.Iterable[int]) -> None:
+		if self.cache_channel is None:
+			return
+		for channel_id in channel_ids:
+			self.cache_channel.invalidate(channel_id)
+
+	def list_channel_members(self, channel_id: id) -> list[ChannelMemberModel]:
+		"""Every member of the channel, ``get_where`` would stop at its page limit"""
+		return self.list_channels_members([channel_id]).get(channel_id, [])
+
+	def list_member_ids(self, channel_id: int | None = None) -> dict[int, set[int]]:
+		"""``channel id -> member user ids`` of the channel, or of every channel when ``channel_id`` is None"""
+		query = "SELECT channel_id, user_id FROM `channel_member`" + (" WHERE channel_id = :channel_id" if channel_id is not None else "")
+
+		members: dict[int, set[int]] = {}
+		try:
+			items = self.db.get_many(query, {"channel_id": channel_id})
+		except SQLITEConnectionException as error:
+			_logger.exception(f"Error while listing member ids of channel {channel_id}, reason {error}", exc_info=error)
+			return members
+		for item in items:
+			members.setdefault(item["channel_id"], set()).add(item["user_id"])
+		return members
+
+	def list_channels_members(self, channel_ids: list[int]) -> dict[int, list[ChannelMemberModel]]:
+		"""``channel id -> members`` of every channel, newest members first, read with one query per chunk of ids"""
+		members: dict[int, list[ChannelMemberModel]] = {}
+		for start in range(0, len(channel_ids), constants.DATABASE_MAX_IN_PARAMETERS):
+			chunk = channel_ids[start:start + constants.DATABASE_MAX_IN_PARAMETERS]
+			query = (
+				f"SELECT `channel_member`.*, {self._jn_cols} FROM `channel_member` {self._join} "
+				f"WHERE `channel_member`.channel_id IN ({', '.join(['?'] * len(chunk))}) ORDER BY `channel_member`.`created` DESC"
+			)
+			for member in self.get_many_raw(query, chunk):
+				members.setdefault(member.channel_id, []).append(member)
+		return members
@@ -1,9 +1,12 @@
 import logging
 import typing as t
 
-from chatbox.app.core.model.group import GroupModel
+from chatbox.app import constants
+from chatbox.app.core.model.group import GroupModel, GroupMemberModel
 from chatbox.app.database.orm.abstract_base_repository import RepositoryBase
-from chatbox.app.database.orm.types import Item
+from chatbox.app.database.orm.cache import EntityCache
+from chatbox.app.database.orm.sqlite_conn import SQLITEConnectionException
+from chatbox.app.database.orm.types import Item, DatabaseOperations
 
 _logger = logging.getLogger(__name__)
 
@@ -12,16 +15,135 @@ class GroupRepository(RepositoryBase):
 	_table: t.Final[str] = "group"
 	_name: t.Final[str] = "name"
 	_model: GroupModel = GroupModel
+	_dynamic_columns: tuple[str] = ("members", )
+
+	def __init__(self, *args, repo_group_member: 'GroupMemberRepository', **kwargs):
+		super().__init__(*args, **kwargs)
+
+		self.repo_group_member: GroupMemberRepository = repo_group_member
 
 	def _build_object(self, data: Item | None) -> GroupModel | None:
 		if not data:
 			return
-		data["members"] = self._unpack_data(data["id"], data["members"])
+		data["members"] = self.repo_group_member.list_groups_members([data["id"]]).get(data["id"], [])
 		return super()._build_object(data)
 
+	def _build_objects(self, data: t.Iterable[Item]) -> list[GroupModel]:
+		"""Loads the members of all the groups with a single query instead of one per group"""
+		data = list(data)
+		members = self.repo_group_member.list_groups_members([item["id"] for item in data])
+
+		groups: list[GroupModel] = []
+		for item in data:
+			item["members"] = members.get(item["id"], [])
+			groups.append(super()._build_object(item))
+		return groups
+
 	def list_user_group(self, owner_id: id) -> list[GroupModel]:
 		where = f"`owner_id` = :owner_id"
 		params = {"owner_id": owner_id}
 
 		groups = self.get_where(where, params)
 		return groups
+
+	def list_user_joined(self, user_id: id) -> list[GroupModel]:
+		query = "SELECT `group`.* FROM `group` INNER JOIN `group_member` member ON member.group_id = `group`.id WHERE member.user_id = :user_id"
+
+		items = self.get_many_raw(query, {"user_id": user_id})
+		return items
+
+
+class GroupMemberRepository(RepositoryBase):
+	_table: t.Final[str] = "group_member"
+	_name: t.Final[int] = "user_id"
+	_model: GroupMemberModel = GroupMemberModel
+	_join: str = "LEFT JOIN user ON group_member.user_id = user.id"
+	_jn_cols: str = "user.username AS user_name"
+	_dynamic_columns: tuple[str] = ("user_name",)
+
+	_operations: tuple[DatabaseOperations] = (
+			DatabaseOperations.READ,
+			DatabaseOperations.READ_MANY,
+			DatabaseOperations.WRITE_CREATE,
+			DatabaseOperations.WRITE_CREATE_MANY,
+			DatabaseOperations.DELETE,
+			DatabaseOperations.DELETE_MANY,
+	)
+
+	def __init__(self, *args, cache_group: EntityCache | None = None, **kwargs):
+		super().__init__(*args, **kwargs)
+
+		self.cache_group: EntityCache | None = cache_group  # groups embed their members, changes invalidate them
+
+	def list_groups_members(self, group_ids: list[int]) -> dict[int, list[str]]:
+		"""``group id -> member user names`` of every group, in the order they joined"""
+		members: dict[int, list[str]] = {}
+		for start in range(0, len(group_ids), constants.DATABASE_MAX_IN_PARAMETERS):
+			chunk = group_ids[start:start + constants.DATABASE_MAX_IN_PARAMETERS]
+			query = (
+				f"SELECT `group_member`.group_id, user.username AS user_name FROM `group_member` {self._join} "
+				f"WHERE `group_member`.group_id IN ({', '.join(['?'] * len(chunk))}) ORDER BY `group_member`.id"
+			)
+			try:
+				items = self.db.get_many(query, chunk)
+			except SQLITEConnectionException as error:
+				_logger.exception(f"Error while listing members of groups {chunk}, reason {error}", exc_info=error)
+				continue
+			for item in items:
+				members.setdefault(item["group_id"], []).append(item["user_name"])
+		return members
+
+	def list_member_ids(self, group_id: int | None = None) -> dict[int, set[int]]:
+		"""``group id -> member user ids`` of the group, or of every group when ``group_id`` is None"""
+		query = "SELECT group_id, user_id FROM `group_member`" + (" WHERE group_id = :group_id" if group_id is not None else "")
+
+		members: dict[int, set[int]] = {}
+		try:
+			items = self.db.get_many(query, {"group_id": group_id})
+		except SQLITEConnectionException as error:
+			_logger.exception(f"Error while listing member ids of group {group_id}, reason {error}", exc_info=error)
+			return members
+		for item in items:
+			members.setdefault(item["group_id"], set()).add(item["user_id"])
+		return members
+
+	def is_member(self, group_id: int, user_name: str) -> bool:
+		query = f"SELECT 1 FROM `group_member` {self._join} WHERE `group_member`.group_id = :group_id AND user.username = :user_name"
+
+		try:
+			return self.db.get(query, {"group_id": group_id, "user_name": user_name}) is not None
+		except SQLITEConnectionException as error:
+			_logger.exception(f"Error while checking member {user_name} of group {group_id}, reason {error}", exc_info=error)
+			return False
+
+	def set_members(self, group_id: int, user_names: list[str]) -> int:
+		"""Replaces the members of the group, names of users that do not exist are skipped. Returns the members added"""
+		query = "INSERT OR IGNORE INTO `group_member` (`group_id`, `user_id`) SELECT :group_id, id FROM user WHERE username = :user_name"
+
+		try:
+			with self.db.writer_lock:
+				self.db.delete("DELETE FROM `group_member` WHERE group_id = :group_id", {"group_id": group_id})
+				if not user_names:
+					return 0
+				self.db.create(query, [{"group_id": group_id, "user_name": user_name} for user_name in user_names])
+		except SQLITEConnectionException as error:
+			_logger.exception(f"Error while setting members of group {group_id}, reason {error}", exc_info=error)
+			return -1
+		finally:
+			self._invalidate_group(group_id)
+		self.created = self.db.created
+		return self.created
+
+	def remove_member(self, group_id: int, user_id: int) -> bool:
+		try:
+			self.db.delete("DELETE FROM `group_member` WHERE group_id = :group_id AND user_id = :user_id", {"group_id": group_id, "user_id": user_id})
+		except SQLITEConnectionException as error:
+			_logger.exception(f"Error while removing member {user_id} of group {group_id}, reason {error}", exc_info=error)
+			return False
+		self._invalidate_group(group_id)
+		self.deleted = self.db.deleted
+		return self.deleted > 0
+
+	def _invalidate_group(self, group_id: int) -> None:
+		if self.cache_group is not None:
+			self.cache_group.invalidate(group_id)
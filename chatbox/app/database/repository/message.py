@@ -18,11 +18,20 @@ class MessageRepository(RepositoryBase):
 		DatabaseOperations.READ,
 		DatabaseOperations.READ_MANY,
 		DatabaseOperations.WRITE_CREATE,
+		DatabaseOperations.WRITE_CREATE_MANY,
 		DatabaseOperations.DELETE,
 		DatabaseOperations.DELETE_MANY,
 	)
 
 	def create_new_message(self, session_id: int, message: ServerMessageModel) -> ServerInternalMessageModel | None:
+		return self.create(self._build_row(session_id, message))
+
+	def create_new_messages(self, session_id: int, messages: t.Sequence[ServerMessageModel]) -> int:
+		"""Batch version of ``create_new_message``, rows are not read back. Returns the rows created or -1 on error"""
+		return self.create_many([self._build_row(session_id, message) for message in messages])
+
+	@staticmethod
+	def _build_row(session_id: int, message: ServerMessageModel) -> dict:
 		message_json = message.get_struct()
 
 		owner = message_json["owner"]
@@ -35,7 +44,7 @@ class MessageRepository(RepositoryBase):
 			to["name"] = to_name
 			to["identifier"] = 1  # super admin identifier
 
-		data = {
+		return {
 			"session_id": session_id,
 
 			"owner_name": owner["name"],
@@ -50,8 +59,6 @@ class MessageRepository(RepositoryBase):
 			"to": json.dumps(to),
 		}
 
-		return self.create(data)
-
 	def _build_object(self, data: Item | None) -> ServerInternalMessageModel | None:
 		if not data:
 			return
@@ -61,27 +68,99 @@ class MessageRepository(RepositoryBase):
 		data["to"] = self._unpack_data(data["id"], data["to"])
 		return super()._build_object(data)
 
+	def _get_history(self, wheres: t.Sequence[str], params: dict, limit: int, before_id: int | None, after_id: int | None) -> list[ServerInternalMessageModel]:
+		"""Keyset page of messages matching any of ``wheres``, newest first. Each predicate is searched on its own
+		``(..., id)`` index and stops after ``limit`` rows, so a page costs the same at any depth of the history.
 
-	def get_many_received(self, username: str, limit: int = 100, offset: int = 0) -> list[ServerInternalMessageModel]:
-		query = f"SELECT * FROM message WHERE to_name = :to_name OR (to_name = 'ALL' AND to_role = 'ALL') ORDER BY ID DESC LIMIT :limit OFFSET :offset"
+		``before_id`` pages towards older messages, ``after_id`` (alone) returns the ``limit`` messages right after it."""
+		cursor = ""
+		if before_id is not None:
+			cursor += " AND id < :before_id"
+		if after_id is not None:
+			cursor += " AND id > :after_id"
+		order = "ASC" if after_id is not None and before_id is None else "DESC"
 
-		items = self.get_many_raw(query, {"to_name": username, "limit": limit, "offset": offset})
+		pages = [f"SELECT * FROM (SELECT * FROM message WHERE ({where}){cursor} ORDER BY id {order} LIMIT :limit)" for where in wheres]
+		query = f"SELECT * FROM ({' UNION '.join(pages)}) ORDER BY id {order} LIMIT :limit"
+
+		items = self.get_many_raw(query, {**params, "limit": limit, "before_id": before_id, "after_id": after_id})
+		if order == "ASC":
+			items.reverse()
 		return items
 
-	def get_many_sent(self, username: str, limit: int = 100, offset: int = 0) -> list[ServerInternalMessageModel]:
-		query = f"SELECT * FROM message WHERE owner_name = :owner_name ORDER BY ID DESC LIMIT :limit OFFSET :offset"
+	def get_many_received(self, username: str, limit: int = 100, before_id: int | None = None, after_id: int | None = None) -> list[ServerInternalMessageModel]:
+		wheres = ("to_name = :to_name", "to_name = 'ALL' AND to_role = 'ALL'")
 
-		items = self.get_many_raw(query, {"owner_name": username, "limit": limit, "offset": offset})
+		items = self._get_history(wheres, {"to_name": username}, limit, before_id, after_id)
 		return items
 
-	def get_many_group(self, name: str, limit: int = 100, offset: int = 0) -> list[ServerInternalMessageModel]:
-		query = f"SELECT * FROM message WHERE from_role = 'GROUP' AND from_name = :name ORDER BY ID DESC LIMIT :limit OFFSET :offset"
+	def get_many_sent(self, username: str, limit: int = 100, before_id: int | None = None, after_id: int | None = None) -> list[ServerInternalMessageModel]:
+		wheres = ("owner_name = :owner_name", )
 
-		items = self.get_many_raw(query, {"name": name, "limit": limit, "offset": offset})
+		items = self._get_history(wheres, {"owner_name": username}, limit, before_id, after_id)
 		return items
 
-	def get_many_channel(self, name: str, limit: int = 100, offset: int = 0) -> list[ServerInternalMessageModel]:
-		query = f"SELECT * FROM message WHERE from_role = 'CHANNEL' AND from_name = :name ORDER BY ID DESC LIMIT :limit OFFSET :offset"
+	def get_many_group(self, name: str, limit: int = 100, before_id: int | None = None, after_id: int | None = None) -> list[ServerInternalMessageModel]:
+		wheres = ("from_role = 'GROUP' AND from_name = :name", )
+
+		items = self._get_history(wheres, {"name": name}, limit, before_id, after_id)
+		return items
+
+	def get_many_channel(self, name: str, limit: int = 100, before_id: int | None = None, after_id: int | None = None) -> list[ServerInternalMessageModel]:
+		wheres = ("from_role = 'CHANNEL' AND from_name = :name", )
+
+		items = self._get_history(wheres, {"name": name}, limit, before_id, after_id)
+		return items
+
+	@staticmethod
+	def iter_history(get_many: t.Callable[..., list[ServerInternalMessageModel]], limit: int, before_id: int | None, after_id: int | None,
+					 chunk_size: int) -> t.Iterator[list[ServerInternalMessageModel]]:
+		"""The ``get_many_*`` page of ``limit`` messages by chunks of ``chunk_size``, newest first. Each chunk is one
+		keyset query that resumes below the last message of the previous chunk. A page of ``after_id`` alone is read
+		from its far end and comes in one chunk"""
+		if after_id is not None and before_id is None:
+			yield get_many(limit=limit, after_id=after_id)
+			return
 
-		items = self.get_many_raw(query, {"name": name, "limit": limit, "offset": offset})
+		while limit > 0:
+			size = min(chunk_size, limit)
+			items = get_many(limit=size, before_id=before_id, after_id=after_id)
+			if not items:
+				return
+			yield items
+			if len(items) < size:
+				return
+			limit -= size
+			before_id = items[-1].id
+
+	@staticmethod
+	def _match_query(text: str) -> str:
+		"""Every word of ``text`` quoted as an FTS5 string, so user input is never parsed as query syntax"""
+		return " ".join(f'"{word.replace(chr(34), chr(34) * 2)}"' for word in text.split())
+
+	def search(self, username: str, user_id: int, text: str, limit: int = 100, before_id: int | None = None) -> list[ServerInternalMessageModel]:
+		"""Messages containing all the words of ``text`` the user can list (sent, received, of their groups and
+		channels), newest first. The full-text index is walked in rowid order, so it stops after ``limit`` visible rows"""
+		match = self._match_query(text)
+		if not match:
+			return []
+
+		cursor = " AND message_fts.rowid < :before_id" if before_id is not None else ""
+		query = f"""
+			SELECT message.* FROM message_fts INNER JOIN message ON message.id = message_fts.rowid
+			WHERE message_fts MATCH :match{cursor} AND (
+				message.owner_name = :username
+				OR message.to_name = :username
+				OR (message.to_name = 'ALL' AND message.to_role = 'ALL')
+				OR (message.from_role = 'GROUP' AND message.from_name IN (
+					SELECT `group`.name FROM `group` INNER JOIN group_member ON group_member.group_id = `group`.id WHERE group_member.user_id = :user_id
+				))
+				OR (message.from_role = 'CHANNEL' AND message.from_name IN (
+					SELECT channel.name FROM channel INNER JOIN channel_member ON channel_member.channel_id = channel.id WHERE channel_member.user_id = :user_id
+				))
+			)
+			ORDER BY message_fts.rowid DESC LIMIT :limit
+		"""
+
+		items = self.get_many_raw(query, {"match": match, "username": username, "user_id": user_id, "limit": limit, "before_id": before_id})
 		return items
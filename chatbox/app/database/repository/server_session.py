@@ -55,6 +55,13 @@ class ServerSessionRepository(RepositoryBase):
 
 		return session
 
+	def get_token_secret(self, session: ServerSessionModel) -> str:
+		"""Secret of the session tokens, sessions created before them get one now"""
+		if not session.data.get("token_secret"):
+			session.data["token_secret"] = ServerSessionModel.create_token_secret()
+			self.update(session.id, {"data": session.data})
+		return session.data["token_secret"]
+
 	def add_user_to_session(self, session: ServerSessionModel, user: UserModel) -> ServerSessionModel:
 		session.add_user(user)
 		session_updated = self.update(session.id, {"data": session.data})
@@ -1,3 +1,4 @@
+import json
 import logging
 import typing as t
 
@@ -26,6 +27,17 @@ class UserRepository(RepositoryBase):
 		return items
 
 
+	def iter_all(self, chunk_size: int = 100, limit: int | None = 100) -> t.Iterator[list[UserModel]]:
+		"""The users of ``get_many`` by chunks"""
+		return self.iter_where(chunk_size=chunk_size, limit=limit)
+
+	def iter_logged(self, user_ids: list[int], chunk_size: int = 100) -> t.Iterator[list[UserModel]]:
+		return self.iter_where("id IN (SELECT value FROM json_each(:user_ids))", {"user_ids": json.dumps(user_ids)}, chunk_size)
+
+	def iter_un_logged(self, user_ids: list[int], chunk_size: int = 100) -> t.Iterator[list[UserModel]]:
+		return self.iter_where("id NOT IN (SELECT value FROM json_each(:user_ids))", {"user_ids": json.dumps(user_ids)}, chunk_size)
+
+
 class UserLoginRepository(RepositoryBase):
 	_table: t.Final[str] = "user_login"
 	_name: t.Final[int] = "user_id"
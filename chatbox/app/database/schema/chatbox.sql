@@ -60,20 +60,32 @@ CREATE TABLE IF NOT EXISTS `message` (
 );
 
 
-CREATE INDEX IF NOT EXISTS `message__owner_name` ON `message` (`owner_name`);
-CREATE INDEX IF NOT EXISTS `message__from_name` ON `message` (`from_name`);
-CREATE INDEX IF NOT EXISTS `message__from_role` ON `message` (`from_role`);
-CREATE INDEX IF NOT EXISTS `message__to_name` ON `message` (`to_name`);
+CREATE INDEX IF NOT EXISTS `message__owner_name_id` ON `message` (`owner_name`, `id`);
+CREATE INDEX IF NOT EXISTS `message__from_role_from_name_id` ON `message` (`from_role`, `from_name`, `id`);
+CREATE INDEX IF NOT EXISTS `message__to_name_id` ON `message` (`to_name`, `id`);
 CREATE INDEX IF NOT EXISTS `message__to_role` ON `message` (`to_role`);
 
+CREATE VIRTUAL TABLE IF NOT EXISTS `message_fts` USING fts5(`body`, content='message', content_rowid='id');
+
+CREATE TRIGGER IF NOT EXISTS `message_fts__insert` AFTER INSERT ON `message` BEGIN
+    INSERT INTO `message_fts` (rowid, `body`) VALUES (new.id, new.body);
+END;
+
+CREATE TRIGGER IF NOT EXISTS `message_fts__delete` AFTER DELETE ON `message` BEGIN
+    INSERT INTO `message_fts` (`message_fts`, rowid, `body`) VALUES ('delete', old.id, old.body);
+END;
+
+CREATE TRIGGER IF NOT EXISTS `message_fts__update` AFTER UPDATE OF `body` ON `message` BEGIN
+    INSERT INTO `message_fts` (`message_fts`, rowid, `body`) VALUES ('delete', old.id, old.body);
+    INSERT INTO `message_fts` (rowid, `body`) VALUES (new.id, new.body);
+END;
+
 
 CREATE TABLE IF NOT EXISTS `group` (
     `id` INTEGER PRIMARY KEY AUTOINCREMENT,
     `name` TEXT NOT NULL UNIQUE,
     `owner_id` INTEGER NOT NULL,
 
-    `members` BLOB NOT NULL,  -- list saved as JSON
-
     `created` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     `modified` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
 
@@ -84,6 +96,24 @@ CREATE TABLE IF NOT EXISTS `group` (
 CREATE INDEX IF NOT EXISTS `group__name` ON `group` (`name`);
 
 
+CREATE TABLE IF NOT EXISTS `group_member` (
+    `id` INTEGER PRIMARY KEY AUTOINCREMENT,
+    `user_id` INTEGER NOT NULL,
+    `group_id` INTEGER NOT NULL,
+
+    `created` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    `modified` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    FOREIGN KEY (`user_id`) REFERENCES `user`(`id`) ON DELETE CASCADE,
+    FOREIGN KEY (`group_id`) REFERENCES `group`(`id`) ON DELETE CASCADE,
+
+     UNIQUE (`group_id`, `user_id`)
+
+);
+
+CREATE INDEX IF NOT EXISTS `group_member__user_id` ON `group_member` (`user_id`);
+
+
 CREATE TABLE IF NOT EXISTS `channel` (
     `id` INTEGER PRIMARY KEY AUTOINCREMENT,
     `name` TEXT NOT NULL UNIQUE,
@@ -30,6 +30,9 @@ def run(argv: tuple[str, ...] = tuple(), cli: bool = True) -> None:  # noqa:C901
     from .core import NetworkSocket
     from .core import SocketTCPClient
     from .core import SocketTCPServer
+    from .core import SocketTCPServerSelector
+    from .core import AsyncSocketTCPServer
+    from .core import ClusterSupervisor
     from chatbox.app.constants import chat_internal_codes as _c
 
     app_supported = NetworkSocket.SOCKET_TYPES
@@ -44,7 +47,25 @@ def run(argv: tuple[str, ...] = tuple(), cli: bool = True) -> None:  # noqa:C901
     stop = True
     while True:
         if tcp_app_type == app_supported[0]:  # TODO: improve this
-            app = SocketTCPServer(host, port)
+            servers = {server.IO_MODE: server for server in (SocketTCPServer, SocketTCPServerSelector, AsyncSocketTCPServer)}
+            io_mode = constants.SERVER_IO_MODE_DEFAULT
+            workers = constants.SERVER_WORKERS_DEFAULT
+            for a in argv:
+                if a.startswith('--io-mode'):
+                    io_mode = a.replace('--io-mode=', '')
+                elif a.startswith('--workers'):
+                    workers = a.replace('--workers=', '') or workers
+            if io_mode not in servers:
+                _logger.error(f"Supported server io modes {tuple(servers)}, got instead: {io_mode}")
+                sys.exit(1)
+            if not str(workers).isdigit() or int(workers) < 1:
+                _logger.error(f"Server workers must be a positive integer, got instead: {workers}")
+                sys.exit(1)
+            workers = int(workers)
+            if workers > 1:
+                app = ClusterSupervisor(servers[io_mode], host, port, workers)
+            else:
+                app = servers[io_mode](host, port)
         elif tcp_app_type == app_supported[1]:
 
             user = None
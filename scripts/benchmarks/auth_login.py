@@ -0,0 +1,135 @@
+"""Login storm: every client logs in at the same time, one thread per client like the ``thread`` IO mode.
+
+The password check runs either inline on the client threads or in the server ``AuthExecutor`` process pool, or the
+clients reconnect with the session token of their previous login (``token``). Next to the login throughput, a probe thread sleeping 1 ms in a loop measures how late the server threads are scheduled while
+the storm runs. Users are created with ``iterations`` PBKDF2 rounds, 600000 in production.
+
+    python -m scripts.benchmarks.auth_login [total_logins] [iterations]
+"""
+import concurrent.futures
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+
+from chatbox.app import constants
+from chatbox.app.constants import DIR_DATABASE_SCHEMA_MAIN
+from chatbox.app.core import SocketTCPServer, objects
+from chatbox.app.constants import chat_internal_codes as _c
+from chatbox.app.core.security.executor import AuthExecutor
+from chatbox.app.core.security.password import generate_password_hash
+from chatbox.app.database.orm.sqlite_conn import SQLITEConnection
+
+LOGINS_DEFAULT: int = 1_000
+ITERATIONS_DEFAULT: int = 20_000
+PASSWORD: str = "myUniquePassword"
+
+
+class NullConnection:
+    @staticmethod
+    def send(data: bytes) -> int:
+        return len(data)
+
+
+class BenchmarkServer(SocketTCPServer):
+    @staticmethod
+    def _connect_to_database() -> SQLITEConnection:
+        return SQLITEConnection(":memory:", schema=DIR_DATABASE_SCHEMA_MAIN)
+
+
+class InlineExecutor(AuthExecutor):
+    """The hashing as it ran before the AuthExecutor: on the calling thread"""
+
+    def submit(self, fn, *args) -> concurrent.futures.Future:
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        future.set_result(fn(*args))
+        return future
+
+
+class Probe(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.lags: list[float] = []
+        self.running: bool = True
+
+    def run(self) -> None:
+        while self.running:
+            start = time.perf_counter()
+            time.sleep(.001)
+            self.lags.append(time.perf_counter() - start - .001)
+
+
+def login_storm(server: SocketTCPServer, total_logins: int, with_tokens: bool) -> tuple[float, list[float], Probe]:
+    requests = []
+    for index in range(total_logins):
+        client_conn = server.create_client_object(NullConnection(), objects.Address("127.0.0.1", index))  # noqa
+        server.clients_unidentified[client_conn.identifier] = client_conn
+        if with_tokens:
+            token = server.session_tokens.issue(server.repo_user.get_by_name(f"user{index:04}").id)
+            login_info = {"user_name": f"user{index:04}", "token": token}
+        else:
+            login_info = {"user_name": f"user{index:04}", "password": PASSWORD, "user_id": client_conn.user_id}
+        requests.append((client_conn, _c.make_message(_c.Codes.LOGIN, json.dumps(login_info))))
+
+    barrier = threading.Barrier(total_logins + 1)
+    latencies: list[float] = []
+
+    def login(client_conn: objects.Client, payload: str) -> None:
+        barrier.wait()
+        start = time.perf_counter()
+        server.router.controller_auth.auth(client_conn, payload)
+        latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=login, args=request, daemon=True) for request in requests]
+    for thread in threads:
+        thread.start()
+    probe = Probe()
+    probe.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    probe.running = False
+    probe.join()
+    return elapsed, latencies, probe
+
+
+def run(executor: AuthExecutor, total_logins: int, password_hash: str, with_tokens: bool) -> tuple[float, list[float], Probe, int, dict]:
+    server = BenchmarkServer("127.0.0.1", 0)
+    server.auth_executor.close()
+    server.auth_executor = executor
+    try:
+        server.repo_user.create_many([{"username": f"user{index:04}", "password": password_hash} for index in range(total_logins)])
+        executor.start()
+        elapsed, latencies, probe = login_storm(server, total_logins, with_tokens)
+        return elapsed, latencies, probe, len(server.clients_identified), executor.stats()
+    finally:
+        executor.close()
+        server.terminate()
+
+
+def main(total_logins: int, iterations: int) -> None:
+    logging.disable(logging.CRITICAL)
+    password_hash = generate_password_hash(PASSWORD, f"pbkdf2:sha256:{iterations}")
+    workers, max_pending = constants.AUTH_EXECUTOR_WORKERS, max(constants.AUTH_EXECUTOR_MAX_PENDING, total_logins)
+
+    print(f"{total_logins} logins, pbkdf2 {iterations} iterations, {workers} hashing processes")
+    print(f"{'mode':>10} {'logins/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'probe lag avg (ms)':>19} {'probe lag max (ms)':>19} {'queue wait avg (ms)':>20}")
+    for mode, executor, with_tokens in (
+            ("inline", InlineExecutor(workers, max_pending), False),
+            ("executor", AuthExecutor(workers, max_pending, constants.AUTH_EXECUTOR_START_METHOD), False),
+            ("token", AuthExecutor(workers, max_pending, constants.AUTH_EXECUTOR_START_METHOD), True),
+    ):
+        elapsed, latencies, probe, logged, stats = run(executor, total_logins, password_hash, with_tokens)
+        latencies.sort()
+        assert logged == total_logins, f"{mode}: {logged} of {total_logins} clients logged in"
+        print(f"{mode:>10} {total_logins / elapsed:>10.1f} {latencies[len(latencies) // 2] * 1_000:>10.1f} "
+              f"{latencies[int(len(latencies) * .99)] * 1_000:>10.1f} {statistics.fmean(probe.lags) * 1_000:>19.2f} "
+              f"{max(probe.lags) * 1_000:>19.2f} {stats['queue_wait_avg_ms']:>20.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else LOGINS_DEFAULT, int(sys.argv[2]) if len(sys.argv) > 2 else ITERATIONS_DEFAULT)
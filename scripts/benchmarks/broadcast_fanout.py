@@ -0,0 +1,83 @@
+"""Per-recipient CPU cost of an ALL broadcast: serializing the message for every recipient (``send_message`` per client)
+against the serialize-once fan-out of ``SocketTCPServer.broadcast``.
+
+Sockets are replaced by a connection that accepts every byte, only the CPU spent building and queueing frames is
+measured. Queues are emptied between rounds as the outbound writer thread would, so every round schedules its clients.
+
+    python -m scripts.benchmarks.broadcast_fanout [total_clients ...]
+"""
+import logging
+import sys
+import time
+
+from chatbox.app.constants import DIR_DATABASE_SCHEMA_MAIN
+from chatbox.app.core import SocketTCPServer, objects
+from chatbox.app.core.model.message import MessageDestination, MessageRole, ServerMessageModel
+from chatbox.app.core.tcp.framing import Framing
+from chatbox.app.database.orm.sqlite_conn import SQLITEConnection
+
+ROUNDS: int = 5
+CLIENTS_DEFAULT: tuple[int, ...] = (1_000, 10_000)
+
+
+class NullConnection:
+    @staticmethod
+    def send(data: bytes) -> int:
+        return len(data)
+
+
+class BenchmarkServer(SocketTCPServer):
+    @staticmethod
+    def _connect_to_database() -> SQLITEConnection:
+        return SQLITEConnection(":memory:", schema=DIR_DATABASE_SCHEMA_MAIN)
+
+
+def add_clients(server: SocketTCPServer, total_clients: int) -> None:
+    for index in range(total_clients):
+        client_conn = server.create_client_object(NullConnection(), objects.Address("127.0.0.1", index))  # noqa
+        client_conn.reader.framing = Framing.LENGTH if index % 2 else Framing.DELIMITER
+        server.clients_unidentified[client_conn.identifier] = client_conn
+
+
+def broadcast_per_recipient(server: SocketTCPServer, message: ServerMessageModel) -> None:
+    for client_conn in {**server.clients_identified, **server.clients_unidentified}.values():
+        server.send_message(client_conn, message)
+
+
+def drain(server: SocketTCPServer) -> None:
+    for client_conn in server.clients_unidentified.values():
+        client_conn.outbound.clear()
+    server.outbound._scheduled.clear()  # noqa, what the writer thread does
+    server.outbound._woken = False
+
+
+def cpu_per_recipient(broadcast, server: SocketTCPServer, message: ServerMessageModel, total_clients: int) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        drain(server)
+        start = time.process_time()
+        broadcast(message)
+        best = min(best, time.process_time() - start)
+    return best / total_clients * 1_000_000
+
+
+def main(clients: tuple[int, ...]) -> None:
+    logging.disable(logging.CRITICAL)
+    owner = MessageDestination(1, "user001", MessageRole.USER)
+    to = MessageDestination(1, "user001", MessageRole.ALL)
+    message = ServerMessageModel.new_message(owner, owner, to, "Very important message " * 8)
+
+    print(f"{'clients':>10} {'per recipient (us)':>20} {'serialize once (us)':>20} {'speedup':>8}")
+    for total_clients in clients:
+        server = BenchmarkServer("127.0.0.1", 0)
+        try:
+            add_clients(server, total_clients)
+            before = cpu_per_recipient(lambda m: broadcast_per_recipient(server, m), server, message, total_clients)
+            after = cpu_per_recipient(server.broadcast, server, message, total_clients)
+        finally:
+            server.terminate()
+        print(f"{total_clients:>10} {before:>20.2f} {after:>20.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(tuple(int(arg) for arg in sys.argv[1:]) or CLIENTS_DEFAULT)
@@ -0,0 +1,70 @@
+"""Bytes saved by the zlib compression of the frames against its CPU cost per level, for history pages as
+``ControllerMessage`` sends them (``MESSAGE_LIST_*``), at several page sizes and for both codecs.
+
+    python -m scripts.benchmarks.frame_compression [calls]
+"""
+import json
+import logging
+import random
+import sys
+import time
+
+from chatbox.app import core  # noqa, imports the models in order
+from chatbox.app.constants import chat_internal_codes as _c
+from chatbox.app.core.model.message import MessageDestination, MessageRole, ServerMessageModel
+from chatbox.app.core.tcp.codec import BinaryCodec, JSONCodec
+from chatbox.app.core.tcp.framing import Framing, compress_payload, decompress_payload
+
+CALLS_DEFAULT: int = 200
+PAGE_SIZES: tuple[int, ...] = (20, 100, 500)
+LEVELS: tuple[int, ...] = (1, 3, 6, 9)
+WORDS: tuple[str, ...] = tuple(f"word{index}" for index in range(5_000))
+
+
+def latency(call, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        call()
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+
+def history_page(size: int) -> ServerMessageModel:
+    users = [f"user{index:03}" for index in range(1, 21)]
+    messages = [{
+        "id": 100_000 - index,
+        "created": f"2024-03-{index % 28 + 1:02} 10:{index % 60:02}:00",
+        "session_id": 1,
+        "owner_name": owner,
+        "from_name": owner,
+        "to_name": random.choice(("developers", "ALL", *users)),
+        "to_role": random.choice(("GROUP", "ALL", "USER")),
+        "body": " ".join(random.choices(WORDS, k=random.randint(3, 25))),
+    } for index, owner in enumerate(random.choices(users, k=size))]
+    response = {"messages": messages, "cursor": {"before_id": messages[-1]["id"], "after_id": messages[0]["id"]}}
+
+    server = MessageDestination(1, "SERVER", MessageRole.SERVER)
+    to = MessageDestination(1, "user001", MessageRole.USER)
+    return ServerMessageModel.new_message(server, server, to, _c.make_message(_c.Codes.MESSAGE_LIST_SENT, json.dumps(response)))
+
+
+def main(calls: int) -> None:
+    logging.disable(logging.CRITICAL)
+    random.seed(1)
+
+    print(f"{'page':>5} {'codec':>7} {'level':>6} {'bytes':>9} {'saved':>7} {'compress (us)':>14} {'inflate (us)':>13}")
+    for size in PAGE_SIZES:
+        message = history_page(size)
+        for name, codec in (("json", JSONCodec()), ("binary", BinaryCodec())):
+            payload = codec.encode(message)
+            print(f"{size:>5} {name:>7} {'-':>6} {len(payload):>9} {'-':>7} {'-':>14} {'-':>13}")
+            for level in LEVELS:
+                compressed, flags = compress_payload(payload, Framing.LENGTH, level, threshold=0)
+                assert decompress_payload(compressed, flags) == payload, f"{name} level {level} round trip"
+                compress = latency(lambda: compress_payload(payload, Framing.LENGTH, level, threshold=0), calls)
+                inflate = latency(lambda: decompress_payload(compressed, flags), calls)
+                print(f"{size:>5} {name:>7} {level:>6} {len(compressed):>9} {1 - len(compressed) / len(payload):>7.1%} "
+                      f"{compress:>14.1f} {inflate:>13.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else CALLS_DEFAULT)
@@ -0,0 +1,78 @@
+"""Peak memory and time to the first frame of a ``CHANNEL_LIST_ALL`` response over every channel: built in one frame
+as legacy clients get it, against streamed in chunks of ``SOCKET_RESPONSE_CHUNK_ROWS`` rows.
+
+    python -m scripts.benchmarks.list_streaming [total_channels]
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from chatbox.app import constants, core  # noqa, imports the models in order
+from chatbox.app.constants import DIR_DATABASE_SCHEMA_MAIN
+from chatbox.app.constants import chat_internal_codes as _c
+from chatbox.app.database.orm.sqlite_conn import SQLITEConnection
+from chatbox.app.database.repository.channel import ChannelRepository, ChannelMemberRepository
+from chatbox.app.database.repository.user import UserRepository
+
+CHANNELS_DEFAULT: int = 10_000
+MEMBERS: int = 5
+
+
+def single_frame(repository: ChannelRepository, total_channels: int, send) -> None:
+    channels = repository.get_many(limit=total_channels)
+    send(_c.make_message(_c.Codes.CHANNEL_LIST_ALL, json.dumps([item.to_json() for item in channels])))
+
+
+def streamed(repository: ChannelRepository, _: int, send) -> None:
+    send(_c.make_message(_c.Codes.STREAM_BEGIN, json.dumps({"stream": 1, "code": _c.Codes.CHANNEL_LIST_ALL.name})))
+    for items in repository.iter_all(constants.SOCKET_RESPONSE_CHUNK_ROWS, limit=None):
+        send(_c.make_message(_c.Codes.STREAM_CHUNK, json.dumps({"stream": 1, "items": [item.to_json() for item in items]})))
+    send(_c.make_message(_c.Codes.STREAM_END, json.dumps({"stream": 1})))
+
+
+def measure(response, repository: ChannelRepository, total_channels: int) -> tuple[float, float, float, int]:
+    """Time to the first frame carrying rows and total time of an untraced run, then the peak memory of a traced one"""
+    first: list[float] = []
+    sent: list[int] = []
+
+    def send(body: str) -> None:
+        if not first and _c.code_scan(body) is not _c.Codes.STREAM_BEGIN:
+            first.append(time.perf_counter())
+        sent.append(len(body))  # the frame leaves the server, only its size is kept
+
+    start = time.perf_counter()
+    response(repository, total_channels, send)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    response(repository, total_channels, lambda body: None)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first[0] - start, elapsed, peak / 1024 / 1024, sum(sent)
+
+
+def main(total_channels: int) -> None:
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = SQLITEConnection(os.path.join(directory, "channels.sqlite"), schema=DIR_DATABASE_SCHEMA_MAIN)
+        users = UserRepository(database).create_many_returning([{"username": f"user{index:03}", "password": "1234"} for index in range(MEMBERS)])
+        repo_channel_member = ChannelMemberRepository(database)
+        repository = ChannelRepository(database, repo_channel_member=repo_channel_member)
+        repository.create_many([{"name": f"channel{index:06}", "owner_id": users[0].id} for index in range(total_channels)])
+        channel_ids = [row["id"] for row in database.get_many("SELECT id FROM channel")]
+        repo_channel_member.create([{"user_id": user.id, "channel_id": channel_id} for channel_id in channel_ids for user in users])
+
+        print(f"{total_channels} channels of {MEMBERS} members, chunks of {constants.SOCKET_RESPONSE_CHUNK_ROWS} rows")
+        print(f"{'response':>12} {'first frame (ms)':>17} {'total (ms)':>11} {'peak memory (MB)':>17} {'bytes sent':>11}")
+        for name, response in (("single", single_frame), ("streamed", streamed)):
+            first, elapsed, peak, size = measure(response, repository, total_channels)
+            print(f"{name:>12} {first * 1_000:>17.1f} {elapsed * 1_000:>11.1f} {peak:>17.1f} {size:>11}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else CHANNELS_DEFAULT)
@@ -0,0 +1,52 @@
+"""Encode and decode latency and payload size of the wire codecs, for a chat message sent by a client and the same
+message delivered by the server (``owner`` set).
+
+    python -m scripts.benchmarks.message_codec [calls]
+"""
+import logging
+import sys
+import time
+
+from chatbox.app import core  # noqa, imports the models in order
+from chatbox.app.core.model.message import MessageDestination, MessageModel, MessageRole, ServerMessageModel
+from chatbox.app.core.tcp.codec import BinaryCodec, Codec, FastJSONCodec, JSONCodec, orjson
+
+CALLS_DEFAULT: int = 50_000
+ROUNDS: int = 3
+
+
+def latency(call, calls: int) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(calls):
+            call()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1_000_000
+
+
+def main(calls: int) -> None:
+    logging.disable(logging.CRITICAL)
+    sender = MessageDestination(1234, "user0001", role=MessageRole.USER)
+    to = MessageDestination("developers", "developers", role=MessageRole.GROUP)
+    body = "Hello everyone, the release is tagged, please check the changelog before upgrading."
+    messages = (
+        ("client", MessageModel, MessageModel(-1, None, None, body, sender, to, code="SEND_TO_GROUP")),  # noqa
+        ("server", ServerMessageModel, ServerMessageModel(-1, None, None, body, sender, to, owner=sender)),  # noqa
+    )
+    codecs: list[tuple[str, Codec]] = [("json", JSONCodec()), ("binary", BinaryCodec())]
+    if orjson:
+        codecs.insert(1, ("orjson", FastJSONCodec()))
+
+    print(f"{'message':>8} {'codec':>8} {'bytes':>6} {'encode (us)':>12} {'decode (us)':>12}")
+    for kind, model, message in messages:
+        for name, codec in codecs:
+            payload = codec.encode(message)
+            assert codec.decode(payload, model) == message, f"{name} round trip"
+            encode = latency(lambda: codec.encode(message), calls)
+            decode = latency(lambda: codec.decode(payload, model), calls)
+            print(f"{kind:>8} {name:>8} {len(payload):>6} {encode:>12.2f} {decode:>12.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else CALLS_DEFAULT)
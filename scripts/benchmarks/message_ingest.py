@@ -0,0 +1,62 @@
+"""Messages persisted per second on a SQLite file: one ``create_new_message`` per message (INSERT, commit and
+re-SELECT of the row) against the batches of ``MessageWriteBehind`` (one ``executemany`` per transaction).
+
+    python -m scripts.benchmarks.message_ingest [total_messages]
+"""
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from chatbox.app.constants import DIR_DATABASE_SCHEMA_MAIN
+from chatbox.app.core.model.message import MessageDestination, MessageRole, ServerMessageModel
+from chatbox.app.core.tcp.persistence import Durability, MessageWriteBehind
+from chatbox.app.database.orm.sqlite_conn import SQLITEConnection
+from chatbox.app.database.repository.message import MessageRepository
+from chatbox.app.database.repository.server_session import ServerSessionRepository
+
+MESSAGES_DEFAULT: int = 5_000
+
+
+def ingest_per_message(repository: MessageRepository, session_id: int, messages: list[ServerMessageModel]) -> None:
+    for message in messages:
+        repository.create_new_message(session_id, message)
+
+
+def ingest_write_behind(repository: MessageRepository, session_id: int, messages: list[ServerMessageModel]) -> None:
+    writer = MessageWriteBehind(repository, session_id, threading.Lock(), Durability.ASYNC)
+    writer.start()
+    for message in messages:
+        writer.submit(message)
+    writer.close()
+
+
+def messages_per_second(ingest, messages: list[ServerMessageModel]) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        database = SQLITEConnection(os.path.join(directory, "ingest.sqlite"), schema=DIR_DATABASE_SCHEMA_MAIN)
+        session_id = ServerSessionRepository(database).get_session_or_create().id
+        repository = MessageRepository(database)
+
+        start = time.perf_counter()
+        ingest(repository, session_id, messages)
+        elapsed = time.perf_counter() - start
+        database.connection.close()
+    return len(messages) / elapsed
+
+
+def main(total_messages: int) -> None:
+    logging.disable(logging.CRITICAL)
+    owner = MessageDestination(1, "user001", MessageRole.USER)
+    to = MessageDestination(2, "user002", MessageRole.USER)
+    messages = [ServerMessageModel.new_message(owner, owner, to, f"Very important message {index}") for index in range(total_messages)]
+
+    before = messages_per_second(ingest_per_message, messages)
+    after = messages_per_second(ingest_write_behind, messages)
+    print(f"{'messages':>10} {'per message (msg/s)':>20} {'write-behind (msg/s)':>21} {'speedup':>8}")
+    print(f"{total_messages:>10} {before:>20.0f} {after:>21.0f} {after / before:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else MESSAGES_DEFAULT)
@@ -0,0 +1,70 @@
+"""Latency of a history search on a SQLite file: ``body LIKE '%word%'`` over the messages the user can list against
+``MessageRepository.search`` on the FTS5 index.
+
+    python -m scripts.benchmarks.message_search [total_messages]
+"""
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from chatbox.app.constants import DIR_DATABASE_SCHEMA_MAIN
+from chatbox.app.core.model.message import MessageDestination, MessageRole, ServerMessageModel
+from chatbox.app.database.orm.sqlite_conn import SQLITEConnection
+from chatbox.app.database.repository.message import MessageRepository
+from chatbox.app.database.repository.server_session import ServerSessionRepository
+
+MESSAGES_DEFAULT: int = 200_000
+BATCH_SIZE: int = 10_000
+SEARCHES: int = 20
+WORDS: tuple[str, ...] = tuple(f"word{index}" for index in range(5_000))
+
+
+def like_search(repository: MessageRepository, username: str, word: str) -> list:
+    query = (
+        "SELECT * FROM message WHERE body LIKE :pattern AND (owner_name = :username OR to_name = :username "
+        "OR (to_name = 'ALL' AND to_role = 'ALL')) ORDER BY id DESC LIMIT 100"
+    )
+    return repository.get_many_raw(query, {"pattern": f"%{word}%", "username": username})
+
+
+def fts_search(repository: MessageRepository, username: str, word: str) -> list:
+    return repository.search(username, 1, word)
+
+
+def latency(search, repository: MessageRepository, words: list[str]) -> float:
+    start = time.perf_counter()
+    for word in words:
+        search(repository, "user001", word)
+    return (time.perf_counter() - start) / len(words) * 1_000
+
+
+def main(total_messages: int) -> None:
+    logging.disable(logging.CRITICAL)
+    random.seed(1)
+    users = [MessageDestination(index, f"user{index:03}", MessageRole.USER) for index in range(1, 101)]
+    words = random.sample(WORDS, SEARCHES)
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = SQLITEConnection(os.path.join(directory, "search.sqlite"), schema=DIR_DATABASE_SCHEMA_MAIN)
+        session_id = ServerSessionRepository(database).get_session_or_create().id
+        repository = MessageRepository(database)
+        for start in range(0, total_messages, BATCH_SIZE):
+            messages = []
+            for _ in range(min(BATCH_SIZE, total_messages - start)):
+                owner, to = random.sample(users, 2)
+                messages.append(ServerMessageModel.new_message(owner, owner, to, " ".join(random.choices(WORDS, k=8))))
+            repository.create_new_messages(session_id, messages)
+
+        before = latency(like_search, repository, words)
+        after = latency(fts_search, repository, words)
+        database.connection.close()
+
+    print(f"{'messages':>10} {'LIKE (ms)':>10} {'FTS5 (ms)':>10} {'speedup':>8}")
+    print(f"{total_messages:>10} {before:>10.2f} {after:>10.2f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else MESSAGES_DEFAULT)
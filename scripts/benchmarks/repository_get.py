@@ -0,0 +1,46 @@
+"""Latency of ``UserRepository.get`` and ``get_by_name`` when the SQL is rebuilt on every call (compiled query cache
+cleared before each call) against the cached statement of ``RepositoryBase``.
+
+    python -m scripts.benchmarks.repository_get [calls]
+"""
+import logging
+import sys
+import time
+
+from chatbox.app.constants import DIR_DATABASE_SCHEMA_MAIN
+from chatbox.app.core.model.user import UserModel
+from chatbox.app.database.orm.abstract_base_repository import RepositoryBase
+from chatbox.app.database.orm.sqlite_conn import SQLITEConnection
+from chatbox.app.database.repository.user import UserRepository
+
+CALLS_DEFAULT: int = 20_000
+ROUNDS: int = 3
+
+
+def latency(call, calls: int, cached: bool) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(calls):
+            if not cached:
+                RepositoryBase._compiled_queries.clear()
+            call()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1_000_000
+
+
+def main(calls: int) -> None:
+    logging.disable(logging.CRITICAL)
+    database = SQLITEConnection(":memory:", schema=DIR_DATABASE_SCHEMA_MAIN)
+    repository = UserRepository(database)
+    user: UserModel = repository.create({"username": "user001", "password": "1234"})
+
+    print(f"{'call':>12} {'rebuilt (us)':>13} {'cached (us)':>12} {'speedup':>8}")
+    for name, call in (("get", lambda: repository.get(user.id)), ("get_by_name", lambda: repository.get_by_name("user001"))):
+        before = latency(call, calls, cached=False)
+        after = latency(call, calls, cached=True)
+        print(f"{name:>12} {before:>13.2f} {after:>12.2f} {before / after:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else CALLS_DEFAULT)
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from chatbox.app.constants import chat_internal_codes as _c
+from chatbox.app.core.components.client.ui.terminal import Terminal
+from chatbox.app.core.model.message import MessageDestination, MessageRole, ServerMessageModel
+
+SERVER = MessageDestination(1, "SERVER", MessageRole.SERVER)
+
+
+def _stream_message(code: _c.Codes, data: dict) -> ServerMessageModel:
+	return ServerMessageModel.new_message(SERVER, SERVER, SERVER, _c.make_message(code, json.dumps(data)))
+
+
+class TestTerminal:
+	@pytest.mark.clientui
+	@pytest.mark.components_client
+	@pytest.mark.components
+	def test_display_stream_renders_every_chunk_on_arrival(self, monkeypatch):
+		terminal = Terminal(None)  # noqa
+		echoed: list[str] = []
+		monkeypatch.setattr(terminal, "message_echo", echoed.append)
+
+		terminal.display_stream(_c.Codes.STREAM_BEGIN, _stream_message(_c.Codes.STREAM_BEGIN, {"stream": 7, "code": "MESSAGE_LIST_SENT"}))
+		terminal.display_stream(_c.Codes.STREAM_CHUNK, _stream_message(_c.Codes.STREAM_CHUNK, {"stream": 7, "items": [{"id": 42, "body": "first"}]}))
+		rendered_before_end = any("first" in line for line in echoed)
+		terminal.display_stream(_c.Codes.STREAM_END, _stream_message(_c.Codes.STREAM_END, {"stream": 7, "count": 1, "cursor": {"before_id": 42}}))
+
+		assert rendered_before_end and echoed[0].startswith("These are messages")
+		assert echoed[-1] == "Older messages: /message_list_sent:42" and terminal.streams == {}
+
+	@pytest.mark.clientui
+	@pytest.mark.components_client
+	@pytest.mark.components
+	def test_display_stream_of_no_rows(self, monkeypatch):
+		terminal = Terminal(None)  # noqa
+		echoed: list[str] = []
+		monkeypatch.setattr(terminal, "message_echo", echoed.append)
+
+		terminal.display_stream(_c.Codes.STREAM_BEGIN, _stream_message(_c.Codes.STREAM_BEGIN, {"stream": 1, "code": "CHANNEL_LIST_ALL"}))
+		terminal.display_stream(_c.Codes.STREAM_END, _stream_message(_c.Codes.STREAM_END, {"stream": 1, "count": 0}))
+
+		assert "No channels to display" in echoed
@@ -25,3 +25,33 @@ class TestRouter(BaseRunner):
 
 		with pytest.raises(RouterStopRoute) as _:
 			self.tcp_server.router.route(client_conn, message)
+
+	@pytest.mark.router
+	@pytest.mark.components_server
+	@pytest.mark.components
+	def test_router_routes_the_envelope_opcode(self, socket_create):
+		client_conn, _ = TCPSocketMock.login_user(self.tcp_server, socket_create)
+		owner = MessageDestination(client_conn.user.id, name=client_conn.user_name, role=MessageRole.USER)
+
+		routed = []
+		self.tcp_server.router.register("PLUGIN_CODE", lambda _client_conn, payload: routed.append(payload.body))
+		self.tcp_server.router.route(client_conn, ServerMessageModel(-1, None, None, "plugin message", owner, owner, code="PLUGIN_CODE", owner=owner))  # noqa
+
+		logout_message = ServerMessageModel(-1, None, None, json.dumps({"id": client_conn.user.id}), owner, owner, code=_c.Codes.LOGOUT.name, owner=owner)  # noqa
+		with pytest.raises(RouterStopRoute) as _:
+			self.tcp_server.router.route(client_conn, logout_message)
+		assert routed == ["plugin message"]
+
+	@pytest.mark.router
+	@pytest.mark.components_server
+	@pytest.mark.components
+	def test_router_unknown_opcode_goes_to_default_route(self, socket_create, monkeypatch):
+		client_conn, _ = TCPSocketMock.login_user(self.tcp_server, socket_create)
+		owner = MessageDestination(client_conn.user.id, name=client_conn.user_name, role=MessageRole.USER)
+
+		routed = []
+		monkeypatch.setattr(self.tcp_server.router, "route_default", lambda _client_conn, payload: routed.append(payload.code))
+		self.tcp_server.router.route(client_conn, ServerMessageModel.new_message(owner, owner, owner, "hello everyone"))
+		self.tcp_server.router.route(client_conn, ServerMessageModel(-1, None, None, "?", owner, owner, code="NOT_REGISTERED", owner=owner))  # noqa
+
+		assert routed == [None, "NOT_REGISTERED"]
@@ -68,6 +68,16 @@ class TCPSocketMock:
 
 		return clients
 
+	@staticmethod
+	def wait_for(condition: t.Callable[[], bool], timeout: float = 2.) -> bool:
+		"""Polls condition until it is true or timeout seconds passed"""
+		deadline = time.monotonic() + timeout
+		while time.monotonic() < deadline:
+			if condition():
+				return True
+			time.sleep(.01)
+		return condition()
+
 	@staticmethod
 	def socket_send(_socket: socket.socket, msg: str) -> None:
 		_socket.send(core.NetworkSocket.encode_message(msg) + SOCKET_MESSAGE_DELIMITER)
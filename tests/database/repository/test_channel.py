@@ -0,0 +1,96 @@
+import pytest
+
+from chatbox.app.core.model.channel import ChannelModel
+from chatbox.app.database.repository.channel import ChannelRepository, ChannelMemberRepository
+from chatbox.app.database.repository.user import UserRepository
+from tests.conftest import BaseRunner
+
+
+class TestChannelRepository(BaseRunner):
+
+	@pytest.fixture(autouse=True)
+	def tear_down_channels(self):
+		yield
+		with self.db.connection:
+			self.db.connection.execute("DELETE FROM channel_member")
+			self.db.connection.execute("DELETE FROM channel")
+
+	def _create_channels(self, total_channels: int) -> tuple[ChannelRepository, list[int]]:
+		repo_channel_member = ChannelMemberRepository(self.db)
+		repository = ChannelRepository(self.db, repo_channel_member=repo_channel_member)
+		users = UserRepository(self.db).create_many_returning([{"username": f"user{i}", "password": "1234"} for i in range(3)])
+
+		channel_ids: list[int] = []
+		for index in range(total_channels):
+			channel: ChannelModel = repository.create({"name": f"channel{index}", "owner_id": users[0].id})
+			repo_channel_member.create([{"user_id": user.id, "channel_id": channel.id} for user in users[:index % 3 + 1]])
+			channel_ids.append(channel.id)
+		return repository, channel_ids
+
+	def _count_queries(self, call) -> tuple[int, list]:
+		queries: list[str] = []
+		self.db.connection.set_trace_callback(queries.append)
+		try:
+			result = call()
+		finally:
+			self.db.connection.set_trace_callback(None)
+		return len([query for query in queries if query.lstrip().upper().startswith("SELECT")]), result
+
+	@pytest.mark.repo_channel
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_list_loads_members_with_one_query(self):
+		repository, channel_ids = self._create_channels(12)
+
+		queries_few, channels_few = self._count_queries(lambda: repository.get_many(limit=3))
+		queries_many, channels = self._count_queries(lambda: repository.get_many(limit=12))
+
+		assert queries_few == queries_many == 2 and len(channels_few) == 3 and len(channels) == 12
+		assert {channel.id: len(channel.members) for channel in channels} == {_id: index % 3 + 1 for index, _id in enumerate(channel_ids)}
+		assert all(member.user_name.startswith("user") for channel in channels for member in channel.members)
+
+	@pytest.mark.repo_channel
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_iter_all_loads_members_per_chunk(self):
+		repository, channel_ids = self._create_channels(7)
+
+		queries, chunks = self._count_queries(lambda: list(repository.iter_all(chunk_size=3)))
+
+		assert [len(chunk) for chunk in chunks] == [3, 3, 1] and queries == 2 * len(chunks)
+		assert {channel.id: len(channel.members) for chunk in chunks for channel in chunk} == {_id: index % 3 + 1 for index, _id in enumerate(channel_ids)}
+
+	@pytest.mark.repo_channel
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_iter_all_matches_get_many(self):
+		repository, _ = self._create_channels(105)
+
+		streamed = [channel for chunk in repository.iter_all(chunk_size=40) for channel in chunk]
+
+		assert [channel.id for channel in streamed] == [channel.id for channel in repository.get_many()] and len(streamed) == 100
+
+	@pytest.mark.repo_channel
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_get_loads_every_member(self):
+		repo_channel_member = ChannelMemberRepository(self.db)
+		repository = ChannelRepository(self.db, repo_channel_member=repo_channel_member)
+		users = UserRepository(self.db).create_many_returning([{"username": f"member{i}", "password": "1234"} for i in range(120)])
+		channel: ChannelModel = repository.create({"name": "crowded", "owner_id": users[0].id})
+		repo_channel_member.create([{"user_id": user.id, "channel_id": channel.id} for user in users])
+
+		batch_loaded = next(item for item in repository.get_many() if item.id == channel.id)
+
+		assert len(repository.get(channel.id).members) == len(batch_loaded.members) == 120
+
+	@pytest.mark.repo_channel
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_batch_members_match_single_channel_members(self):
+		repository, channel_ids = self._create_channels(3)
+
+		members = repository.repo_channel_member.list_channels_members(channel_ids + [-1])
+
+		assert -1 not in members
+		assert all(sorted(members[_id], key=lambda m: m.id) == sorted(repository.get(_id).members, key=lambda m: m.id) for _id in channel_ids)
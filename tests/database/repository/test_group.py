@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+from chatbox.app.constants import DIR_DATABASE_SCHEMA_MAIN
+from chatbox.app.core.model.group import GroupModel
+from chatbox.app.database.migrations import migrate
+from chatbox.app.database.orm.sqlite_conn import SQLITEConnection
+from chatbox.app.database.repository.group import GroupRepository, GroupMemberRepository
+from chatbox.app.database.repository.user import UserRepository
+from tests.conftest import BaseRunner
+
+
+class TestGroupRepository(BaseRunner):
+
+	@pytest.fixture(autouse=True)
+	def tear_down_groups(self):
+		yield
+		with self.db.connection:
+			self.db.connection.execute("DELETE FROM group_member")
+			self.db.connection.execute("DELETE FROM `group`")
+
+	@pytest.fixture
+	def repository(self) -> GroupRepository:
+		UserRepository(self.db).create_many_returning([{"username": f"user{i}", "password": "1234"} for i in range(4)])
+		return GroupRepository(self.db, repo_group_member=GroupMemberRepository(self.db))
+
+	def _create_group(self, repository: GroupRepository, name: str, members: list[str]) -> GroupModel:
+		owner = UserRepository(self.db).get_by_name(members[0])
+		group: GroupModel = repository.create({"name": name, "owner_id": owner.id})
+		repository.repo_group_member.set_members(group.id, members)
+		return repository.get(group.id)
+
+	@pytest.mark.repo_group
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_members_are_kept_in_order_and_unknown_users_skipped(self, repository):
+		group = self._create_group(repository, "group1", ["user2", "user0", "nobody", "user1"])
+
+		assert group.members == ["user2", "user0", "user1"] and group.is_member("user0") and not group.is_member("nobody")
+		assert repository.repo_group_member.is_member(group.id, "user1") and not repository.repo_group_member.is_member(group.id, "user3")
+
+	@pytest.mark.repo_group
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_set_and_remove_members(self, repository):
+		group = self._create_group(repository, "group1", ["user0", "user1", "user2"])
+		user1 = UserRepository(self.db).get_by_name("user1")
+
+		assert repository.repo_group_member.remove_member(group.id, user1.id)
+		assert not repository.repo_group_member.remove_member(group.id, user1.id)
+		assert repository.get(group.id).members == ["user0", "user2"]
+		assert repository.repo_group_member.set_members(group.id, []) == 0 and repository.get(group.id).members == []
+
+	@pytest.mark.repo_group
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_list_user_joined(self, repository):
+		self._create_group(repository, "group1", ["user0", "user1"])
+		self._create_group(repository, "group2", ["user2", "user1"])
+		self._create_group(repository, "group3", ["user2", "user3"])
+		user1 = UserRepository(self.db).get_by_name("user1")
+
+		groups = repository.list_user_joined(user1.id)
+
+		assert sorted(group.name for group in groups) == ["group1", "group2"]
+		assert {group.name: group.members for group in groups}["group2"] == ["user2", "user1"]
+
+	@pytest.mark.repo_group
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_membership_lookups_use_indexes(self):
+		plans = [
+			" ".join(row["detail"] for row in self.db.get_many(f"EXPLAIN QUERY PLAN {query}", params))
+			for query, params in (
+				("SELECT 1 FROM group_member WHERE group_id = :group_id AND user_id = :user_id", {"group_id": 1, "user_id": 1}),
+				("SELECT group_id FROM group_member WHERE user_id = :user_id", {"user_id": 1}),
+			)
+		]
+
+		assert all("USING" in plan and "INDEX" in plan for plan in plans)
+
+
+class TestGroupMemberMigration:
+
+	@pytest.fixture
+	def legacy_db(self) -> SQLITEConnection:
+		database = SQLITEConnection(":memory:", schema=DIR_DATABASE_SCHEMA_MAIN)
+		database.connection.executescript("""
+			DROP TABLE `group`;
+			CREATE TABLE `group` (
+				`id` INTEGER PRIMARY KEY AUTOINCREMENT,
+				`name` TEXT NOT NULL UNIQUE,
+				`owner_id` INTEGER NOT NULL,
+				`members` BLOB NOT NULL,
+				`created` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+				`modified` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+			);
+		""")
+		with database.connection:
+			database.connection.executemany("INSERT INTO user (username, password) VALUES (?, '1234')", [("user0", ), ("user1", ), ("user2", )])
+			database.connection.executemany("INSERT INTO `group` (name, owner_id, members) VALUES (?, 1, ?)", [
+				("group1", json.dumps(["user2", "user0", "nobody"])),
+				("group2", json.dumps(["user1"])),
+				("group3", "not json"),
+			])
+		yield database
+		database.connection.close()
+
+	@pytest.mark.repo_group
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_migrate_moves_members_blob_to_group_member(self, legacy_db):
+		assert migrate(legacy_db) == ["group_member"]
+		assert migrate(legacy_db) == []
+
+		repository = GroupRepository(legacy_db, repo_group_member=GroupMemberRepository(legacy_db))
+		assert {group.name: group.members for group in repository.get_many()} == {"group1": ["user2", "user0"], "group2": ["user1"], "group3": []}
+		assert "members" not in {column["name"] for column in legacy_db.get_many("PRAGMA table_info(`group`)")}
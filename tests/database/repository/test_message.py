@@ -0,0 +1,197 @@
+import functools
+import json
+import types
+
+import pytest
+
+from chatbox.app import constants
+from chatbox.app.constants import chat_internal_codes as _c
+from chatbox.app.core.components.server.controller.message import ControllerMessage
+from chatbox.app.core.model.message import MessageDestination, MessageRole, ServerMessageModel
+from chatbox.app.database.migrations import migrate
+from chatbox.app.database.repository.channel import ChannelRepository, ChannelMemberRepository
+from chatbox.app.database.repository.group import GroupRepository, GroupMemberRepository
+from chatbox.app.database.repository.message import MessageRepository
+from chatbox.app.database.repository.server_session import ServerSessionRepository
+from chatbox.app.database.repository.user import UserRepository
+from tests.conftest import BaseRunner
+
+
+class TestMessageRepository(BaseRunner):
+
+	@pytest.fixture(autouse=True)
+	def tear_down_messages(self):
+		yield
+		with self.db.connection:
+			self.db.connection.execute("DELETE FROM message")
+
+	@pytest.fixture
+	def repository(self) -> MessageRepository:
+		repository = MessageRepository(self.db)
+		session_id = ServerSessionRepository(self.db).get_session_or_create().id
+
+		user1 = MessageDestination(1, "user1", MessageRole.USER)
+		user2 = MessageDestination(2, "user2", MessageRole.USER)
+		everyone = MessageDestination(1, "ALL", MessageRole.ALL)
+		messages = [
+			ServerMessageModel.new_message(user1, user1, everyone if index % 5 == 0 else user2, f"message {index}")
+			for index in range(30)
+		]
+		repository.create_new_messages(session_id, messages)
+		return repository
+
+	@staticmethod
+	def _bodies(items) -> list[int]:
+		return [int(item.body.split()[-1]) for item in items]
+
+	@pytest.mark.repo_message
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_pages_walk_the_history_with_before_id(self, repository):
+		pages: list[list[int]] = []
+		before_id = None
+		while page := repository.get_many_received("user2", limit=7, before_id=before_id):
+			pages.append(self._bodies(page))
+			before_id = page[-1].id
+
+		assert [index for page in pages for index in page] == list(reversed(range(30)))
+		assert [len(page) for page in pages] == [7, 7, 7, 7, 2]
+
+	@pytest.mark.repo_message
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_after_id_returns_the_next_newer_messages(self, repository):
+		oldest = repository.get_many_sent("user1", limit=30)[-1]
+
+		newer = repository.get_many_sent("user1", limit=5, after_id=oldest.id)
+		between = repository.get_many_sent("user1", limit=100, after_id=newer[-1].id, before_id=newer[0].id)
+
+		assert self._bodies(newer) == [5, 4, 3, 2, 1]
+		assert self._bodies(between) == [4, 3, 2]
+
+	@pytest.mark.repo_message
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_history_queries_search_indexes(self, repository):
+		queries: list[str] = []
+		self.db.connection.set_trace_callback(queries.append)
+		try:
+			repository.get_many_received("user2", limit=5, before_id=20)
+			repository.get_many_sent("user1", limit=5, before_id=20)
+			repository.get_many_group("group1", limit=5, after_id=20)
+		finally:
+			self.db.connection.set_trace_callback(None)
+
+		assert len(queries) == 3
+		for query in queries:
+			plan = " ".join(row["detail"] for row in self.db.get_many(f"EXPLAIN QUERY PLAN {query}", None))
+			assert "SCAN message" not in plan and "USING INDEX message__" in plan
+
+	@pytest.mark.repo_message
+	@pytest.mark.repository
+	@pytest.mark.database
+	@pytest.mark.parametrize("limit, before_index", [(10, None), (8, None), (30, None), (12, 20)])
+	def test_streamed_page_matches_the_page(self, repository, monkeypatch, limit, before_index):
+		monkeypatch.setattr(constants, "SOCKET_RESPONSE_CHUNK_ROWS", 4)
+		sent: dict = {}
+
+		def stream_to_client(_, __, chunks, summary):
+			sent["chunks"] = list(chunks)
+			sent["cursor"] = summary()["cursor"]
+
+		def send_to_client(_, body):
+			sent["page"] = json.loads(_c.get_message(_c.Codes.MESSAGE_LIST_RECEIVED, body))
+
+		controller = ControllerMessage(types.SimpleNamespace(repo_message=repository, stream_to_client=stream_to_client, send_to_client=send_to_client))  # noqa
+		get_many = functools.partial(repository.get_many_received, "user2")
+		before_id = None if before_index is None else get_many(limit=30)[before_index].id
+		page = {"limit": limit + 1, "before_id": before_id, "after_id": None}  # one more row, as list_ asks for it
+
+		controller._stream_page(None, _c.Codes.MESSAGE_LIST_RECEIVED, get_many, dict(page), limit)  # noqa
+		controller._send_page(None, _c.Codes.MESSAGE_LIST_RECEIVED, get_many(**page), page, limit)  # noqa
+
+		assert sent["chunks"] and all(0 < len(chunk) <= 4 for chunk in sent["chunks"])
+		assert [row for chunk in sent["chunks"] for row in chunk] == sent["page"]["messages"]
+		assert sent["cursor"] == sent["page"]["cursor"]
+
+	@pytest.mark.repo_message
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_page_request_parsing(self):
+		def page(body: str) -> dict | None:
+			return ControllerMessage._get_page(ServerMessageModel.new_message(MessageDestination(1, "user1", MessageRole.USER), MessageDestination(1, "user1", MessageRole.USER), MessageDestination(1, "user1", MessageRole.USER), body))
+
+		assert page("MESSAGE_LIST_SENT") == {"limit": 100, "before_id": None, "after_id": None}
+		assert page('{"before_id": "12", "limit": 100000}') == {"limit": 500, "before_id": 12, "after_id": None}
+		assert page('{"after_id": "twelve"}') is None
+
+
+class TestMessageSearch(BaseRunner):
+
+	@pytest.fixture(autouse=True)
+	def tear_down_messages(self):
+		yield
+		with self.db.connection:
+			for table in ("message", "group_member", "`group`", "channel_member", "channel"):
+				self.db.connection.execute(f"DELETE FROM {table}")
+
+	@pytest.fixture
+	def repository(self) -> MessageRepository:
+		users = {user.username: user for user in UserRepository(self.db).create_many_returning([{"username": f"user{i}", "password": "1234"} for i in range(4)])}
+		group = GroupRepository(self.db, repo_group_member=GroupMemberRepository(self.db)).create({"name": "group1", "owner_id": users["user0"].id})
+		GroupMemberRepository(self.db).set_members(group.id, ["user0", "user1"])
+		channel = ChannelRepository(self.db, repo_channel_member=ChannelMemberRepository(self.db)).create({"name": "channel1", "owner_id": users["user2"].id})
+		ChannelMemberRepository(self.db).create([{"user_id": users[name].id, "channel_id": channel.id} for name in ("user1", "user2")])
+
+		destination = lambda name, role=MessageRole.USER: MessageDestination(users[name].id if name in users else 1, name, role)
+		messages = [
+			ServerMessageModel.new_message(destination("user0"), destination("user0"), destination("user1"), "lunch at noon, user0 to user1"),
+			ServerMessageModel.new_message(destination("user2"), destination("user2"), destination("user3"), "lunch at noon, user2 to user3"),
+			ServerMessageModel.new_message(destination("user3"), destination("user3"), destination("ALL", MessageRole.ALL), "lunch at noon, everyone"),
+			ServerMessageModel.new_message(destination("user0"), destination("group1", MessageRole.GROUP), destination("group1", MessageRole.GROUP), "lunch at noon, group1"),
+			ServerMessageModel.new_message(destination("user2"), destination("channel1", MessageRole.CHANNEL), destination("channel1", MessageRole.CHANNEL), "lunch at noon, channel1"),
+			ServerMessageModel.new_message(destination("user1"), destination("user1"), destination("user2"), "dinner, user1 to user2"),
+		]
+		repository = MessageRepository(self.db)
+		repository.create_new_messages(ServerSessionRepository(self.db).get_session_or_create().id, messages)
+		return repository
+
+	def _search(self, repository: MessageRepository, username: str, text: str, **kwargs) -> list[str]:
+		user = UserRepository(self.db).get_by_name(username)
+		return [message.body.split(", ")[-1] for message in repository.search(username, user.id, text, **kwargs)]
+
+	@pytest.mark.repo_message
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_search_respects_visibility(self, repository):
+		assert self._search(repository, "user1", "lunch noon") == ["channel1", "group1", "everyone", "user0 to user1"]
+		assert self._search(repository, "user3", "lunch") == ["everyone", "user2 to user3"]
+		assert self._search(repository, "user0", "LUNCH") == ["group1", "everyone", "user0 to user1"]
+		assert self._search(repository, "user2", "dinner") == ["user1 to user2"]
+		assert self._search(repository, "user0", "dinner") == []
+
+	@pytest.mark.repo_message
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_search_pages_and_ignores_query_syntax(self, repository):
+		first = self._search(repository, "user1", "lunch", limit=2)
+		before_id = repository.search("user1", UserRepository(self.db).get_by_name("user1").id, "lunch", limit=2)[-1].id
+
+		assert first == ["channel1", "group1"]
+		assert self._search(repository, "user1", "lunch", before_id=before_id) == ["everyone", "user0 to user1"]
+		assert self._search(repository, "user1", 'lunch" OR NEAR(* "') == [] and self._search(repository, "user1", "   ") == []
+
+	@pytest.mark.repo_message
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_index_follows_deletes_and_is_rebuilt_by_migration(self, repository):
+		dinner = repository.search("user2", UserRepository(self.db).get_by_name("user2").id, "dinner")[0]
+		repository.delete(dinner.id)
+		assert self._search(repository, "user2", "dinner") == []
+
+		with self.db.connection:
+			self.db.connection.execute("INSERT INTO message_fts (message_fts) VALUES ('delete-all')")
+		assert self._search(repository, "user3", "lunch") == []
+
+		assert "message_fts" in migrate(self.db)
+		assert self._search(repository, "user3", "lunch") == ["everyone", "user2 to user3"]
@@ -44,6 +44,34 @@ class TestUserRepository(BaseRunner):
 		users_from_db = repository.get_many()
 		assert sorted([u.username for u in users_from_db]) == sorted(users)
 
+	@pytest.mark.repo_user
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_iter_by_chunks(self):
+		repository = UserRepository(self.db)
+		users = repository.create_many_returning([{"username": f"user{i}", "password": "1234"} for i in range(10)])
+		logged = [user.id for user in users[::3]]
+
+		chunks = list(repository.iter_all(chunk_size=4))
+
+		assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+		assert [user.username for chunk in chunks for user in chunk] == [user.username for user in users]
+		assert [user.id for chunk in repository.iter_logged(logged, chunk_size=2) for user in chunk] == logged
+		assert {user.id for chunk in repository.iter_un_logged(logged, chunk_size=2) for user in chunk} == {user.id for user in users} - set(logged)
+		assert list(repository.iter_logged([], chunk_size=2)) == []
+
+	@pytest.mark.repo_user
+	@pytest.mark.repository
+	@pytest.mark.database
+	def test_iter_all_matches_get_many(self):
+		repository = UserRepository(self.db)
+		repository.create_many_returning([{"username": f"user{i}", "password": "1234"} for i in range(110)])
+
+		streamed = [user.id for chunk in repository.iter_all(chunk_size=40) for user in chunk]
+
+		assert streamed == [user.id for user in repository.get_many()] and len(streamed) == 100
+		assert len([user for chunk in repository.iter_all(chunk_size=40, limit=None) for user in chunk]) == 110
+
 	@pytest.mark.repo_user
 	@pytest.mark.repository
 	@pytest.mark.database
@@ -4,6 +4,8 @@ from dataclasses import dataclass
 
 from chatbox.app.database.orm.abstract_base_repository import RepositoryBase
 from chatbox.app.database.orm.types import Item
+from chatbox.app.database.repository.channel import ChannelMemberRepository
+from chatbox.app.database.repository.user import UserRepository
 from tests.conftest import BaseRunner
 
 
@@ -97,3 +99,47 @@ class TestRepositoryBase(BaseRunner):
 		repository.delete_users()
 		users = repository.list_users()
 		assert len(users) is 0 and repository.deleted is 5
+
+	@pytest.mark.db_abstract
+	@pytest.mark.sqlite
+	@pytest.mark.database
+	def test_queries_are_compiled_once_per_class_and_parameters(self):
+		repository = RepositoryConcrete(self.db)
+		RepositoryBase._compiled_queries.clear()
+
+		repository.create_user("user1", "1234")
+		user = repository.get_user_by_name("user1")
+		repository.get_user_by_name("user1")
+		RepositoryConcrete(self.db).get_user_by_name("user1")
+		repository.update(user["id"], {"username": "user1-new"})
+		repository.update(user["id"], {"password": "4321"})
+
+		compiled = {(query, params): sql for (_, query, params), sql in RepositoryBase._compiled_queries.items()}
+		assert len(compiled) == 5  # create, get by name, get by id (update), update username, update password
+		assert compiled[(RepositoryBase._update_query, ("password", ))] == "UPDATE `user` SET password = :password WHERE id = :id"
+		assert repository.get_user_by_name("user1-new")["password"] == "4321"
+
+	@pytest.mark.db_abstract
+	@pytest.mark.sqlite
+	@pytest.mark.database
+	def test_create_builds_objects_from_returning_rows(self, monkeypatch):
+		repository = RepositoryConcrete(self.db)
+		gets: list[int] = []
+		monkeypatch.setattr(repository, "get", lambda _id: gets.append(_id))
+
+		user = repository.create({"username": "user1", "password": "1234"})
+		users = repository.create_many_returning([{"username": f"user{i}", "password": "1234"} for i in range(2, 5)])
+
+		assert gets == [] and user["username"] == "user1" and user["id"] == self.db.lastrowid - 3
+		assert [user["username"] for user in users] == ["user2", "user3", "user4"] and repository.created == 3
+		assert [user["id"] for user in users] == list(range(user["id"] + 1, user["id"] + 4))
+
+	@pytest.mark.db_abstract
+	@pytest.mark.sqlite
+	@pytest.mark.database
+	def test_create_with_join_reads_joined_columns(self):
+		user = UserRepository(self.db).create({"username": "user1", "password": "1234"})
+
+		member = ChannelMemberRepository(self.db).create({"user_id": user.id, "channel_id": 1})
+
+		assert member.user_id == user.id and member.user_name == "user1"
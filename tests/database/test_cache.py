@@ -0,0 +1,150 @@
+import functools
+import socket
+import threading
+
+import pytest
+
+from chatbox.app import core
+from chatbox.app.core.tcp.cluster import ClusterBus
+from chatbox.app.database.orm import cache as cache_module
+from chatbox.app.database.orm.cache import EntityCache
+from chatbox.app.database.repository.channel import ChannelRepository, ChannelMemberRepository
+from chatbox.app.database.repository.group import GroupRepository, GroupMemberRepository
+from chatbox.app.database.repository.user import UserRepository
+from tests.conftest import BaseRunner, TCPSocketMock
+
+
+class CacheWorker:
+	"""The entity caches of a cluster worker, wired to its bus like ``SocketTCPServer`` does"""
+	publish_cache_invalidation = core.SocketTCPServer.publish_cache_invalidation
+	invalidate_cache = core.SocketTCPServer.invalidate_cache
+
+	def __init__(self, cluster_bus: ClusterBus):
+		self.cluster_bus: ClusterBus = cluster_bus
+		self.caches: dict[str, EntityCache] = {"user": EntityCache(max_entries=10, ttl=60)}
+		for name, cache in self.caches.items():
+			cache.listener = functools.partial(self.publish_cache_invalidation, name)
+
+
+class TestEntityCache:
+
+	@pytest.mark.db_cache
+	@pytest.mark.database
+	def test_lru_eviction_by_id_and_name(self):
+		cache = EntityCache(max_entries=2, ttl=60)
+
+		for _id in (1, 2):
+			cache.put(_id, f"name{_id}", f"item{_id}", cache.generation)
+		assert cache.get(1) == "item1"  # 2 is now the least recently used
+		cache.put(3, "name3", "item3", cache.generation)
+
+		assert cache.get_by_name("name2") is None and cache.get(2) is None
+		assert cache.get_by_name("name1") == "item1" and cache.get_by_name("name3") == "item3"
+		assert cache.stats() == {"entries": 2, "hits": 3, "misses": 2, "evictions": 1}
+
+	@pytest.mark.db_cache
+	@pytest.mark.database
+	def test_entries_expire_after_ttl(self, monkeypatch):
+		now = [100.0]
+		monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+		cache = EntityCache(max_entries=10, ttl=5)
+		cache.put(1, "name1", "item1", cache.generation)
+
+		now[0] += 4
+		assert cache.get(1) == "item1"
+		now[0] += 2
+		assert cache.get_by_name("name1") is None and len(cache) == 0
+
+	@pytest.mark.db_cache
+	@pytest.mark.database
+	def test_object_read_before_an_invalidation_is_not_stored(self):
+		cache = EntityCache(max_entries=10, ttl=60)
+		generation = cache.generation
+
+		cache.invalidate(1)  # a writer committed while the reader was querying
+		cache.put(1, "name1", "stale", generation)
+
+		assert cache.get(1) is None
+
+
+class TestRepositoryCache(BaseRunner):
+
+	@pytest.fixture(autouse=True)
+	def tear_down_cached(self):
+		yield
+		with self.db.connection:
+			for table in ("group_member", "`group`", "channel_member", "channel"):
+				self.db.connection.execute(f"DELETE FROM {table}")
+
+	def _count_queries(self, call) -> tuple[int, object]:
+		queries: list[str] = []
+		self.db.connection.set_trace_callback(queries.append)
+		try:
+			result = call()
+		finally:
+			self.db.connection.set_trace_callback(None)
+		return len([query for query in queries if query.lstrip().upper().startswith("SELECT")]), result
+
+	@pytest.mark.db_cache
+	@pytest.mark.database
+	def test_user_read_through_and_invalidation(self):
+		repository = UserRepository(self.db, cache=EntityCache(max_entries=10, ttl=60))
+		user = repository.create({"username": "user1", "password": "1234"})
+
+		assert self._count_queries(lambda: repository.get(user.id))[0] == 1
+		assert self._count_queries(lambda: repository.get(user.id))[0] == 0
+		assert self._count_queries(lambda: repository.get_by_name("user1"))[0] == 0
+
+		repository.update(user.id, {"username": "user2"})
+		assert repository.get_by_name("user1") is None and repository.get_by_name("user2").id == user.id
+
+		repository.delete(user.id)
+		assert repository.get(user.id) is None and repository.get_by_name("user2") is None
+		assert repository.cache.stats()["hits"] == 3  # update re-reads the row, "user2" is served from the cache
+
+	@pytest.mark.db_cache
+	@pytest.mark.database
+	def test_member_changes_invalidate_groups_and_channels(self):
+		users = UserRepository(self.db).create_many_returning([{"username": f"user{i}", "password": "1234"} for i in range(3)])
+		cache_group, cache_channel = EntityCache(10, 60), EntityCache(10, 60)
+		repo_group_member = GroupMemberRepository(self.db, cache_group=cache_group)
+		repo_group = GroupRepository(self.db, repo_group_member=repo_group_member, cache=cache_group)
+		repo_channel_member = ChannelMemberRepository(self.db, cache_channel=cache_channel)
+		repo_channel = ChannelRepository(self.db, repo_channel_member=repo_channel_member, cache=cache_channel)
+
+		group = repo_group.create({"name": "group1", "owner_id": users[0].id})
+		repo_group_member.set_members(group.id, ["user0", "user1"])
+		assert repo_group.get_by_name("group1").members == ["user0", "user1"]
+		repo_group_member.remove_member(group.id, users[1].id)
+		assert repo_group.get_by_name("group1").members == ["user0"]
+
+		channel = repo_channel.create({"name": "channel1", "owner_id": users[0].id})
+		repo_channel_member.create([{"user_id": user.id, "channel_id": channel.id} for user in users])
+		members = repo_channel.get_by_name("channel1").members
+		assert len(members) == 3
+		repo_channel_member.delete(members[0].id)
+		assert len(repo_channel.get_by_name("channel1").members) == 2
+		assert self._count_queries(lambda: repo_channel.get_by_name("channel1"))[0] == 0
+
+	@pytest.mark.db_cache
+	@pytest.mark.database
+	def test_invalidations_reach_the_other_cluster_workers(self):
+		worker_end, other_end = socket.socketpair()
+		with worker_end, other_end:
+			worker, other = CacheWorker(ClusterBus(worker_end)), CacheWorker(ClusterBus(other_end, worker_id=1))
+			threading.Thread(target=other.cluster_bus.thread_listener, args=(other, ), daemon=True).start()
+			repository = UserRepository(self.db, cache=worker.caches["user"])
+			other_repository = UserRepository(self.db, cache=other.caches["user"])
+
+			user = repository.create({"username": "cluster1", "password": "1234"})
+			assert TCPSocketMock.wait_for(lambda: other.caches["user"].generation == 1)  # the name taken by the new row
+			assert other_repository.get(user.id).username == "cluster1" and len(other.caches["user"]) == 1
+
+			repository.update(user.id, {"username": "cluster2"})
+			assert TCPSocketMock.wait_for(lambda: other.caches["user"].generation == 2)
+			assert len(other.caches["user"]) == 0 and other_repository.get(user.id).username == "cluster2"
+
+			repository.delete(user.id)
+			worker_end.setblocking(False)
+			with pytest.raises(BlockingIOError) as _:
+				worker_end.recv(1)  # applied by the other worker without publishing it back
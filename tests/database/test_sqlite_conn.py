@@ -1,8 +1,10 @@
+import sqlite3
+import threading
 import typing as t
 import pytest
 import os
 
-from chatbox.app.constants import DIR_APP
+from chatbox.app.constants import DIR_APP, DIR_DATABASE_SCHEMA_MAIN
 from chatbox.app.database.orm.sqlite_conn import SQLITEConnectionException, SQLITEConnection
 from tests.conftest import BaseRunner
 
@@ -181,3 +183,62 @@ class TestSQLITEConnection(BaseRunner):
 		self.db.delete("DELETE FROM user WHERE username = :username", {"username": "random-guy"})
 
 		assert self.db.deleted is 0
+
+
+class TestSQLITEConnectionPool:
+	@pytest.fixture
+	def db_file(self, tmp_path) -> SQLITEConnection:
+		database = SQLITEConnection(str(tmp_path / "pool.sqlite"), schema=DIR_DATABASE_SCHEMA_MAIN, readers=2)
+		yield database
+		database.__del__()
+
+	@pytest.mark.sqlite
+	@pytest.mark.database
+	def test_file_database_runs_in_wal_with_readers(self, db_file):
+		assert db_file.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal" and len(db_file.readers) == 2
+
+		with db_file.reader() as connection:
+			with pytest.raises(sqlite3.OperationalError):
+				connection.execute("INSERT INTO user (username, password) VALUES ('user1', '1234')")
+
+	@pytest.mark.sqlite
+	@pytest.mark.database
+	def test_memory_database_reads_from_writer(self):
+		database = SQLITEConnection(":memory:", schema=DIR_DATABASE_SCHEMA_MAIN, readers=2)
+
+		with database.reader() as connection:
+			assert database.readers == [] and connection is database.connection
+
+	@pytest.mark.sqlite
+	@pytest.mark.database
+	def test_reads_do_not_wait_on_open_write_transaction(self, db_file):
+		db_file.create("INSERT INTO user (username, password) VALUES (:username, :password)", [{"username": "user1", "password": "1234"}])
+
+		with db_file.writer_lock:
+			db_file.connection.execute("BEGIN IMMEDIATE")
+			db_file.connection.execute("INSERT INTO user (username, password) VALUES ('user2', '1234')")
+			users = db_file.get_many("SELECT username FROM user")
+			db_file.connection.rollback()
+
+		assert users == [{"username": "user1"}]
+
+	@pytest.mark.sqlite
+	@pytest.mark.database
+	def test_lastrowid_is_kept_per_thread(self, db_file):
+		mismatches: list[tuple[str, str]] = []
+
+		def create(prefix: str) -> None:
+			for index in range(20):
+				username = f"{prefix}-{index}"
+				db_file.create("INSERT INTO user (username, password) VALUES (:username, :password)", [{"username": username, "password": "1234"}])
+				created = db_file.get("SELECT username FROM user WHERE id = :id", {"id": db_file.lastrowid})
+				if created["username"] != username:
+					mismatches.append((username, created["username"]))
+
+		threads = [threading.Thread(target=create, args=(f"user{index}", )) for index in range(4)]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		assert mismatches == [] and len(db_file.get_many("SELECT id FROM user")) == 80
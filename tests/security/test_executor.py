@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from chatbox.app.core.security.executor import AuthExecutor, AuthExecutorBusy
+from chatbox.app.core.security.password import generate_password_hash, check_password_hash
+
+FAST_METHOD: str = "pbkdf2:sha256:1000"
+
+
+@pytest.fixture(scope="function")
+def auth_executor() -> AuthExecutor:
+	executor = AuthExecutor(workers=1, max_pending=2, start_method="forkserver")
+	yield executor
+	executor.close()
+
+
+class TestAuthExecutor:
+
+	@pytest.mark.auth_executor
+	@pytest.mark.security
+	def test_call_hashes_and_checks_passwords_in_a_process(self, auth_executor):
+		password_hash = auth_executor.call(generate_password_hash, "myUniquePassword", FAST_METHOD)
+
+		assert auth_executor.call(check_password_hash, password_hash, "myUniquePassword") is True
+		assert auth_executor.call(check_password_hash, password_hash, "wrongPassword") is False
+
+	@pytest.mark.auth_executor
+	@pytest.mark.security
+	def test_submit_rejects_calls_over_max_pending(self, auth_executor):
+		pending = [auth_executor.submit(time.sleep, .5) for _ in range(auth_executor.max_pending)]
+		with pytest.raises(AuthExecutorBusy) as _:
+			auth_executor.submit(time.sleep, .5)
+
+		for future in pending:
+			future.result()
+		auth_executor.call(time.sleep, 0)  # slots released once the calls completed
+		assert auth_executor.stats()["rejected"] == 1
+
+	@pytest.mark.auth_executor
+	@pytest.mark.security
+	def test_future_raises_the_exception_of_the_call(self, auth_executor):
+		future = auth_executor.submit(check_password_hash, None, "password")
+
+		with pytest.raises(AttributeError) as _:
+			future.result()
+		assert auth_executor.stats()["failed"] == 1
+
+	@pytest.mark.auth_executor
+	@pytest.mark.security
+	def test_stats_measure_queue_wait(self, auth_executor):
+		futures = [auth_executor.submit(time.sleep, .2) for _ in range(2)]
+		for future in futures:
+			future.result()
+		stats = auth_executor.stats()
+
+		assert stats["completed"] == 2 and stats["pending"] == 0
+		assert stats["queue_wait_max_ms"] >= 150  # the second call waited for the first, single process
+		assert stats["run_avg_ms"] >= 150
+
+	@pytest.mark.auth_executor
+	@pytest.mark.security
+	def test_closed_executor_refuses_calls(self, auth_executor):
+		auth_executor.close()
+
+		with pytest.raises(RuntimeError) as _:
+			auth_executor.submit(time.sleep, 0)
+		assert auth_executor.stats()["submitted"] == 0
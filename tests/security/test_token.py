@@ -0,0 +1,56 @@
+import pytest
+
+from chatbox.app.core.security.token import SessionTokens
+
+SECRET: str = "0123456789abcdef" * 4
+
+
+class TestSessionTokens:
+
+	@pytest.mark.session_token
+	@pytest.mark.security
+	def test_issue_matches_verify(self):
+		tokens = SessionTokens(SECRET, ttl=60)
+		token = tokens.issue(42)
+
+		assert tokens.verify(token) == 42
+		assert token != tokens.issue(42)
+
+	@pytest.mark.session_token
+	@pytest.mark.security
+	def test_verify_refuses_forged_and_malformed_tokens(self):
+		tokens = SessionTokens(SECRET, ttl=60)
+		user_id, expires, nonce, signature = tokens.issue(42).split(".")
+
+		assert tokens.verify(f"{1}.{expires}.{nonce}.{signature}") is None
+		assert tokens.verify(f"{user_id}.{int(expires) + 60}.{nonce}.{signature}") is None
+		assert SessionTokens("another secret", ttl=60).verify(f"{user_id}.{expires}.{nonce}.{signature}") is None
+		for token in ("", "not a token", None, 42, f"{user_id}.{nonce}.{signature}"):
+			assert tokens.verify(token) is None  # noqa
+
+	@pytest.mark.session_token
+	@pytest.mark.security
+	def test_verify_refuses_expired_tokens(self):
+		tokens = SessionTokens(SECRET, ttl=-1)
+
+		assert tokens.verify(tokens.issue(42)) is None
+
+	@pytest.mark.session_token
+	@pytest.mark.security
+	def test_revoke_once(self):
+		tokens = SessionTokens(SECRET, ttl=60)
+		token = tokens.issue(42)
+		_, expires, nonce, _ = token.split(".")
+
+		assert tokens.revoke(token) == (42, nonce, int(expires))
+		assert tokens.revoke(token) is None
+		assert tokens.verify(token) is None
+
+	@pytest.mark.session_token
+	@pytest.mark.security
+	def test_revoke_nonce_published_by_another_worker(self):
+		tokens, other_worker = SessionTokens(SECRET, ttl=60), SessionTokens(SECRET, ttl=60)
+		token = tokens.issue(42)
+
+		other_worker.revoke_nonce(*tokens.revoke(token)[1:])
+		assert other_worker.verify(token) is None
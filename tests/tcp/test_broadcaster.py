@@ -0,0 +1,78 @@
+"""
+How to run these test
+
+# only this module
+pytest -rP -k tcp_broadcaster
+pytest -rP  tests/tcp/test_broadcaster.py::TestBroadcasterPool
+#  run other modules
+pytest -rP -m tcp_broadcaster
+pytest -rP -m tcp
+
+"""
+import threading
+import time
+
+import pytest
+
+from chatbox.app.core.model.message import MessageDestination, MessageRole, ServerMessageModel
+from chatbox.app.core.tcp.broadcaster import BroadcasterPool, BroadcastShard
+
+
+def _message(role: MessageRole, identifier: int, body: str = "hello") -> ServerMessageModel:
+    owner = MessageDestination(1, "user001", MessageRole.USER)
+    return ServerMessageModel.new_message(owner, owner, MessageDestination(identifier, f"{role.name}{identifier}", role), body)
+
+
+class TestBroadcasterPool:
+
+    @pytest.mark.tcp_broadcaster
+    @pytest.mark.tcp
+    def test_same_destination_same_shard(self):
+        pool = BroadcasterPool(shards=8, maxsize=10)
+
+        assert pool.shard_for(_message(MessageRole.GROUP, 3)) is pool.shard_for(_message(MessageRole.GROUP, 3, "other"))
+        assert pool.shard_key(_message(MessageRole.GROUP, 3)) != pool.shard_key(_message(MessageRole.CHANNEL, 3))
+        assert pool.shard_key(_message(MessageRole.ALL, 3)) == pool.shard_key(_message(MessageRole.ALL, 4))
+
+    @pytest.mark.tcp_broadcaster
+    @pytest.mark.tcp
+    def test_qsize_and_stats(self):
+        pool = BroadcasterPool(shards=4, maxsize=10)
+        for identifier in range(6):
+            pool.put(_message(MessageRole.USER, identifier))
+
+        stats = pool.stats()
+        assert pool.qsize() == 6 == sum(shard["depth"] for shard in stats)
+        assert [shard["shard"] for shard in stats] == [0, 1, 2, 3]
+
+    @pytest.mark.tcp_broadcaster
+    @pytest.mark.tcp
+    def test_conversation_order_kept_while_slow_shard_blocks(self):
+        pool = BroadcasterPool(shards=2, maxsize=100)
+        slow_key = next(identifier for identifier in range(100) if pool.shard_for(_message(MessageRole.USER, identifier)).index == 0)
+        fast_key = next(identifier for identifier in range(100) if pool.shard_for(_message(MessageRole.USER, identifier)).index == 1)
+        release = threading.Event()
+        delivered: dict[int, list[str]] = {0: [], 1: []}
+
+        def deliver(shard: BroadcastShard) -> None:
+            while True:
+                message = shard.get()
+                if shard.index == 0:
+                    release.wait(timeout=2)
+                delivered[shard.index].append(message.body)
+                shard.task_done()
+
+        pool.start(deliver)
+        for index in range(5):
+            pool.put(_message(MessageRole.USER, slow_key, f"slow {index}"))
+            pool.put(_message(MessageRole.USER, fast_key, f"fast {index}"))
+
+        deadline = time.monotonic() + 2
+        while len(delivered[1]) < 5 and time.monotonic() < deadline:
+            time.sleep(.01)
+        assert delivered[1] == [f"fast {index}" for index in range(5)] and delivered[0] == []
+
+        release.set()
+        pool.join()
+        assert delivered[0] == [f"slow {index}" for index in range(5)]
+        assert pool.stats()[0]["lag"] > pool.stats()[1]["lag"] and pool.stats()[0]["delivered"] == 5
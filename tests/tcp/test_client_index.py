@@ -0,0 +1,96 @@
+"""
+How to run these test
+
+# only this module
+pytest -rP -k tcp_client_index
+pytest -rP  tests/tcp/test_client_index.py::TestClientIndex
+#  run other modules
+pytest -rP -m tcp_client_index
+pytest -rP -m tcp
+
+"""
+import socket
+import uuid
+
+import pytest
+
+from chatbox.app.core.model.message import MessageDestination, MessageRole, ServerMessageModel
+from chatbox.app.core.model.user import UserModel
+from chatbox.app.core.tcp import objects
+
+
+def _client(user_id: int, user_name: str) -> objects.Client:
+    client = objects.Client(socket.socket(), user_id, user_id, objects.Address("127.0.0.1", 1000 + user_id), uuid.uuid4())
+    client.user = UserModel(id=user_id, created=None, modified=None, username=user_name, password="")
+    client.user_name = user_name
+    return client
+
+
+class TestClientIndex:
+
+    @pytest.fixture
+    def index(self) -> objects.ClientIndex:
+        index = objects.ClientIndex()
+        for user_id in range(1, 6):
+            index[user_id] = _client(user_id, f"user00{user_id}")
+        yield index
+        for client in list(index.values()):
+            client.connection.close()
+
+    @pytest.mark.tcp_client_index
+    @pytest.mark.tcp
+    def test_lookup_by_id_and_name(self, index):
+        assert index[3] is index.get_by_name("user003")
+        assert index.get_by_name("nobody") is None and len(index) == 5
+
+    @pytest.mark.tcp_client_index
+    @pytest.mark.tcp
+    def test_resolve_only_connected_members(self, index):
+        clients = index.resolve(["user002", "user004", "offline"])
+
+        assert sorted(clients) == [2, 4]
+        assert all(clients[user_id] is index[user_id] for user_id in clients)
+
+    @pytest.mark.tcp_client_index
+    @pytest.mark.tcp
+    def test_resolve_ids_only_connected_members(self, index):
+        clients = index.resolve_ids(frozenset({2, 4, 99}))
+
+        assert sorted(clients) == [2, 4] and clients[4] is index[4]
+
+    @pytest.mark.tcp_client_index
+    @pytest.mark.tcp
+    def test_delete_and_pop_remove_name(self, index):
+        del index[1]
+        client = index.pop(2)
+
+        assert client.user_name == "user002" and index.pop(2, None) is None
+        assert index.get_by_name("user001") is None and index.get_by_name("user002") is None
+
+    @pytest.mark.tcp_client_index
+    @pytest.mark.tcp
+    def test_discard_keeps_newer_connection_of_same_user(self, index):
+        old = index[5]
+        new = _client(5, "user005")
+        index[5] = new
+
+        assert index.discard(old) is False
+        assert index[5] is new and index.get_by_name("user005") is new
+        assert index.discard(new) is True and 5 not in index and index.get_by_name("user005") is None
+        old.connection.close()
+        new.connection.close()
+
+    @pytest.mark.tcp_client_index
+    @pytest.mark.tcp
+    def test_broadcast_resolves_group_members(self, index, create_database_mock, create_tcp_server_mock, monkeypatch):
+        tcp_server = create_tcp_server_mock
+        sent: list[objects.Client] = []
+        monkeypatch.setattr(tcp_server, "clients_identified", index)
+        monkeypatch.setattr(tcp_server, "send_frame_to_client", lambda client_conn, frame: sent.append(client_conn))
+
+        owner = MessageDestination(1, "user001", MessageRole.USER)
+        group = MessageDestination(1, "group001", MessageRole.GROUP, ["user001", "user003", "offline"])
+        tcp_server.broadcast(ServerMessageModel.new_message(owner, owner, group, "hello"))
+        tcp_server.broadcast(ServerMessageModel.new_message(owner, owner, MessageDestination(4, "user004", MessageRole.USER), "hi"))
+
+        assert [client.user_name for client in sent] == ["user001", "user003", "user004"]
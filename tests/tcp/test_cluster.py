@@ -0,0 +1,126 @@
+"""
+How to run these test
+
+# only this module
+pytest -rP -k tcp_cluster
+pytest -rP  tests/tcp/test_cluster.py::TestCluster
+#  run other modules
+pytest -rP -m tcp_cluster
+pytest -rP -m tcp
+
+"""
+import socket
+import threading
+
+import pytest
+
+from chatbox.app.core.model.message import MessageDestination, MessageRole, ServerMessageModel
+from chatbox.app.core.tcp.cluster import ClusterBus, ClusterHub
+
+
+class BroadcastRecorder:
+    def __init__(self):
+        self.messages: list[ServerMessageModel] = []
+        self.received: threading.Event = threading.Event()
+        self.cluster_bus = None
+
+    def broadcast(self, message: ServerMessageModel) -> None:
+        self.messages.append(message)
+        self.received.set()
+
+
+def _message(role: MessageRole, users: list[str] | None = None) -> ServerMessageModel:
+    owner = MessageDestination(7, "user007", MessageRole.USER)
+    to = MessageDestination(3, "group003", role, users or [])
+    return ServerMessageModel.new_message(owner, owner, to, "hello cluster")
+
+
+class TestCluster:
+
+    @pytest.fixture
+    def hub(self):
+        hub = ClusterHub()
+        buses = []
+        for worker_id in range(3):
+            supervisor_end, worker_end = socket.socketpair()
+            hub.add_worker(worker_id, supervisor_end)
+            buses.append(ClusterBus(worker_end, worker_id))
+
+        yield hub, buses
+
+        hub.close()
+        for bus in buses:
+            bus.connection.close()
+
+    @pytest.mark.tcp_cluster
+    @pytest.mark.tcp
+    def test_bus_load_keeps_recipients(self):
+        message = _message(MessageRole.GROUP, ["user001", "user002"])
+        supervisor_end, worker_end = socket.socketpair()
+        with supervisor_end, worker_end:
+            ClusterBus(worker_end).publish(message)
+            received = ClusterBus(supervisor_end).receive()
+
+        assert received.to_json() == message.to_json()
+        assert received.to.users == ["user001", "user002"] and received.owner.role is MessageRole.USER
+
+    @pytest.mark.tcp_cluster
+    @pytest.mark.tcp
+    def test_hub_relays_to_other_workers_only(self, hub):
+        hub, buses = hub
+        buses[0].publish(_message(MessageRole.ALL))
+
+        assert hub.relay(timeout=1) == 1
+        assert [bus.receive().body for bus in buses[1:]] == ["hello cluster", "hello cluster"]
+        buses[0].connection.setblocking(False)
+        with pytest.raises(BlockingIOError):
+            buses[0].connection.recv(1)
+
+    @pytest.mark.tcp_cluster
+    @pytest.mark.tcp
+    def test_hub_removes_dead_worker(self, hub):
+        hub, buses = hub
+        buses[2].connection.close()
+        hub.relay(timeout=1)
+
+        assert sorted(hub.workers) == [0, 1]
+
+    @pytest.mark.tcp_cluster
+    @pytest.mark.tcp
+    def test_attached_server_broadcasts_relayed_messages(self, hub):
+        hub, buses = hub
+        server = BroadcastRecorder()
+        buses[1].attach(server)
+        buses[0].publish(_message(MessageRole.CHANNEL, ["user001"]))
+        hub.relay(timeout=1)
+
+        assert server.cluster_bus is buses[1]
+        assert server.received.wait(timeout=2)
+        assert server.messages[0].to.role is MessageRole.CHANNEL and server.messages[0].to.users == ["user001"]
+
+    @pytest.mark.tcp_cluster
+    @pytest.mark.tcp
+    def test_stalled_worker_does_not_block_the_relay(self, hub):
+        hub, buses = hub
+        hub.workers[2].setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        buses[2].connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        for bus in buses:
+            bus.connection.settimeout(2)
+        owner = MessageDestination(7, "user007", MessageRole.USER)
+        messages = [ServerMessageModel.new_message(owner, owner, owner, f"{index:04}" + "x" * 8192) for index in range(20)]
+
+        running = threading.Event()
+        running.set()
+        relay = threading.Thread(target=lambda: [hub.relay(timeout=0.05) for _ in iter(running.is_set, False)], daemon=True)
+        relay.start()
+        try:
+            for message in messages:
+                buses[0].publish(message)
+            fast = [buses[1].receive().body for _ in messages]  # worker-2 never reads meanwhile
+            assert fast == [message.body for message in messages] and len(hub.pending[2]) > 0
+
+            stalled = [buses[2].receive().body for _ in messages]
+            assert stalled == fast
+        finally:
+            running.clear()
+            relay.join(timeout=2)
@@ -0,0 +1,67 @@
+"""
+How to run these test
+
+# only this module
+pytest -rP  tests/tcp/test_codec.py::TestCodec
+#  run other modules
+pytest -rP -m tcp_codec
+pytest -rP -m tcp
+
+"""
+import pytest
+
+from chatbox.app import core  # noqa
+from chatbox.app.core.model.message import MessageDestination, MessageModel, MessageRole, ServerMessageModel
+from chatbox.app.core.tcp.codec import CODECS, JSON_CODEC, BinaryCodec, Codec, CodecError, JSONCodec, codec_of, register_codec
+from chatbox.app.core.tcp.framing import FRAME_FLAG_CODEC
+
+SENDER = MessageDestination(1234, "user0001", MessageRole.USER)
+MESSAGES = [
+    MessageModel(-1, None, None, "hello", SENDER, MessageDestination("developers", "developers", MessageRole.GROUP), code="SEND_TO_GROUP"),  # noqa
+    MessageModel(7, "2024-01-01 10:00:00", "2024-01-01 10:00:01", "ciao 👋 ünïcode", SENDER, MessageDestination(None, None, MessageRole.SERVER)),  # noqa
+    MessageModel(None, None, None, "", MessageDestination("", "", MessageRole.ALL), SENDER, code="PLUGIN_CODE"),  # noqa
+    ServerMessageModel(-1, None, None, "@@##LOGIN_SUCCESS --{}", SENDER, SENDER, owner=MessageDestination(-5, "SERVER", MessageRole.SERVER)),  # noqa
+]
+
+
+class TestCodec:
+
+    @pytest.mark.tcp_codec
+    @pytest.mark.tcp
+    @pytest.mark.parametrize("codec", [JSONCodec(), *CODECS.values()], ids=lambda codec: repr(codec))
+    @pytest.mark.parametrize("message", MESSAGES, ids=range(len(MESSAGES)))
+    def test_round_trip(self, codec: Codec, message: MessageModel):
+        assert codec.decode(codec.encode(message), type(message)) == message
+
+    @pytest.mark.tcp_codec
+    @pytest.mark.tcp
+    def test_binary_is_smaller_than_json(self):
+        for message in MESSAGES:
+            assert len(CODECS["binary"].encode(message)) < len(JSONCodec().encode(message))
+
+    @pytest.mark.tcp_codec
+    @pytest.mark.tcp
+    def test_decode_garbage_returns_none(self):
+        payload = CODECS["binary"].encode(MESSAGES[0])
+
+        for codec, garbage in ((CODECS["binary"], payload[:-3]), (CODECS["binary"], b""), (JSON_CODEC, b"{not json")):
+            assert codec.decode(garbage, MessageModel) is None
+
+    @pytest.mark.tcp_codec
+    @pytest.mark.tcp
+    def test_codec_of_frame_flags(self):
+        assert codec_of(0) is JSON_CODEC
+        assert codec_of(BinaryCodec.ID | ~FRAME_FLAG_CODEC & 0xFFFF) is CODECS["binary"]  # other flags are not the codec
+        with pytest.raises(CodecError) as _:
+            codec_of(FRAME_FLAG_CODEC)
+
+    @pytest.mark.tcp_codec
+    @pytest.mark.tcp
+    def test_register_codec_refuses_ids_over_the_flags(self):
+        class WideCodec(BinaryCodec):
+            NAME = "wide"
+            ID = FRAME_FLAG_CODEC + 1
+
+        with pytest.raises(CodecError) as _:
+            register_codec(WideCodec())
+        assert "wide" not in CODECS
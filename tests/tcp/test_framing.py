@@ -0,0 +1,177 @@
+"""
+How to run these test
+
+# only this module
+pytest -rP  tests/tcp/test_framing.py::TestFrameReader
+#  run other modules
+pytest -rP -m tcp_framing
+pytest -rP -m tcp
+
+"""
+import os
+import socket
+import threading
+
+import pytest
+
+from chatbox.app.constants import SOCKET_MESSAGE_DELIMITER
+from chatbox.app.core.tcp.framing import (FRAME_FLAG_COMPRESSED, FrameReader, Framing, FrameError, compress_payload, decompress_payload,
+                                          encode_frame, framing_handshake)
+
+
+class TestFrameReader:
+
+    @pytest.mark.tcp_framing
+    @pytest.mark.tcp
+    def test_read_frames_sent_in_one_write(self):
+        reader = FrameReader()
+        left, right = socket.socketpair()
+        with left, right:
+            left.sendall(SOCKET_MESSAGE_DELIMITER.join([b"one", b"two", b"three"]) + SOCKET_MESSAGE_DELIMITER)
+            frames = [reader.read_frame(right) for _ in range(3)]
+
+        assert frames == [b"one", b"two", b"three"] and len(reader) == 0
+
+    @pytest.mark.tcp_framing
+    @pytest.mark.tcp
+    def test_read_frame_with_delimiter_split_across_reads(self):
+        reader = FrameReader(initial_size=8)
+        left, right = socket.socketpair()
+        with left, right:
+            stream = b"hello world" + SOCKET_MESSAGE_DELIMITER + b"next" + SOCKET_MESSAGE_DELIMITER
+            frames = []
+            for index in range(0, len(stream), 3):
+                left.sendall(stream[index:index + 3])
+                reader.fill(right, 3)
+                frame = reader.next_frame()
+                while frame is not None:
+                    frames.append(frame)
+                    frame = reader.next_frame()
+
+        assert frames == [b"hello world", b"next"]
+
+    @pytest.mark.tcp_framing
+    @pytest.mark.tcp
+    def test_read_large_frame_grows_and_shrinks_buffer(self):
+        reader = FrameReader(initial_size=1024)
+        payload = b"x" * (1024 * 256)
+        left, right = socket.socketpair()
+        with left, right:
+            sender = threading.Thread(target=left.sendall, args=(payload + SOCKET_MESSAGE_DELIMITER + b"small" + SOCKET_MESSAGE_DELIMITER, ), daemon=True)
+            sender.start()
+            frame_large = reader.read_frame(right)
+            frame_small = reader.read_frame(right)
+            sender.join()
+
+        assert frame_large == payload and frame_small == b"small" and reader.capacity == 1024
+
+    @pytest.mark.tcp_framing
+    @pytest.mark.tcp
+    def test_read_frame_returns_remaining_data_when_peer_closes(self):
+        reader = FrameReader()
+        left, right = socket.socketpair()
+        with right:
+            left.sendall(b"partial")
+            left.close()
+            frame = reader.read_frame(right)
+            frame_after_close = reader.read_frame(right)
+
+        assert frame == b"partial" and frame_after_close is None
+
+    @pytest.mark.tcp_framing
+    @pytest.mark.tcp
+    def test_readers_do_not_share_buffers(self):
+        reader_one, reader_two = FrameReader(), FrameReader()
+        pair_one, pair_two = socket.socketpair(), socket.socketpair()
+        try:
+            pair_one[0].sendall(b"first-")
+            pair_two[0].sendall(b"second" + SOCKET_MESSAGE_DELIMITER)
+            pair_one[0].sendall(b"client" + SOCKET_MESSAGE_DELIMITER)
+
+            frame_two = reader_two.read_frame(pair_two[1])
+            frame_one = reader_one.read_frame(pair_one[1])
+        finally:
+            for _sock in (*pair_one, *pair_two):
+                _sock.close()
+
+        assert frame_one == b"first-client" and frame_two == b"second"
+
+    @pytest.mark.tcp_framing
+    @pytest.mark.tcp
+    def test_read_length_prefixed_frames(self):
+        reader = FrameReader(initial_size=16)
+        reader.framing = Framing.LENGTH
+        payload_large = b"x" * 4096 + SOCKET_MESSAGE_DELIMITER  # the delimiter is plain data in this framing
+        left, right = socket.socketpair()
+        with left, right:
+            left.sendall(encode_frame(b"first", Framing.LENGTH, flags=1, opcode=7) + encode_frame(payload_large, Framing.LENGTH))
+            frame_first = reader.read_frame(right)
+            flags, opcode = reader.flags, reader.opcode
+            frame_large = reader.read_frame(right)
+
+        assert frame_first == b"first" and (flags, opcode) == (1, 7) and frame_large == payload_large
+
+    @pytest.mark.tcp_framing
+    @pytest.mark.tcp
+    def test_read_length_prefixed_frame_too_large_raises(self):
+        reader = FrameReader()
+        reader.framing = Framing.LENGTH
+        left, right = socket.socketpair()
+        with left, right:
+            left.sendall(b"\xff\xff\xff\xff\x00\x00\x00\x00")
+            with pytest.raises(FrameError) as _:
+                reader.read_frame(right)
+
+    @pytest.mark.tcp_framing
+    @pytest.mark.tcp
+    def test_take_handshake(self):
+        reader = FrameReader()
+        left, right = socket.socketpair()
+        with left, right:
+            handshake = framing_handshake(Framing.LENGTH)
+            left.sendall(handshake[:3])
+            reader.fill(right)
+            pending_partial = reader.handshake_pending()
+            left.sendall(handshake[3:])
+            reader.fill(right)
+
+            assert pending_partial is True and reader.handshake_pending() is False
+            assert reader.take_handshake() is Framing.LENGTH and len(reader) == 0
+
+    @pytest.mark.tcp_framing
+    @pytest.mark.tcp
+    def test_take_handshake_legacy_peer(self):
+        reader = FrameReader()
+        left, right = socket.socketpair()
+        with left, right:
+            left.sendall(b'{"id": 1}' + SOCKET_MESSAGE_DELIMITER)
+            reader.fill(right)
+
+            assert reader.handshake_pending() is False and reader.take_handshake() is None
+            assert reader.read_frame(right) == b'{"id": 1}'
+
+
+class TestFrameCompression:
+
+    @pytest.mark.tcp_framing
+    @pytest.mark.tcp
+    def test_compress_payload_above_threshold(self):
+        payload = b'{"id": 1, "body": "hello"}, ' * 200
+
+        compressed, flags = compress_payload(payload, Framing.LENGTH, 6, threshold=1024)
+        assert flags == FRAME_FLAG_COMPRESSED and len(compressed) < len(payload)
+        assert decompress_payload(compressed, flags) == payload
+        assert compress_payload(payload, Framing.LENGTH, None, threshold=1024) == (payload, 0)       # not agreed
+        assert compress_payload(payload, Framing.DELIMITER, 6, threshold=1024) == (payload, 0)      # no header flags
+        assert compress_payload(payload[:512], Framing.LENGTH, 6, threshold=1024) == (payload[:512], 0)
+        assert compress_payload(os.urandom(2048), Framing.LENGTH, 6, threshold=1024)[1] == 0  # does not shrink
+
+    @pytest.mark.tcp_framing
+    @pytest.mark.tcp
+    def test_decompress_payload_refuses_broken_frames(self):
+        compressed, flags = compress_payload(b"x" * 8192, Framing.LENGTH, 6, threshold=0)
+
+        assert decompress_payload(b"not compressed", 0) == b"not compressed"
+        for broken in (b"not compressed", compressed[:-4], b""):
+            with pytest.raises(FrameError) as _:
+                decompress_payload(broken, flags)
@@ -1,6 +1,7 @@
 import pytest
 
 from chatbox.app.constants import chat_internal_codes as _c
+from chatbox.app.core.model.message import MessageDestination, MessageModel, MessageRole
 
 
 class TestChatInternalCodes:
@@ -30,4 +31,22 @@ class TestChatInternalCodes:
 		code_scanned = _c.code_scan(my_message)
 
 		assert code_scanned is None
-		
\ No newline at end of file
+
+	@pytest.mark.tcp_codes
+	@pytest.mark.tcp
+	def test_split_code_takes_the_prefix_only(self):
+		assert _c.split_code(_c.make_message(_c.Codes.GROUP_LIST, "my message")) == (_c.Codes.GROUP_LIST, "my message")
+		assert _c.split_code(f"{_c.full_code('CODE_NOT_EXISTS__')} my message") == (None, f"{_c.full_code('CODE_NOT_EXISTS__')} my message")
+		assert _c.split_code(f"my message {_c.full_code(_c.Codes.GROUP_LIST)}") == (None, f"my message {_c.full_code(_c.Codes.GROUP_LIST)}")
+		assert _c.split_code(_c.CODE_IDENTIFIER_LEFT + "GROUP_LIST") == (None, _c.CODE_IDENTIFIER_LEFT + "GROUP_LIST")
+
+	@pytest.mark.tcp_codes
+	@pytest.mark.tcp
+	def test_take_code_moves_the_legacy_prefix_to_the_envelope(self):
+		user = MessageDestination(1, "user001", MessageRole.USER)
+		legacy = MessageModel.new_message(user, user, _c.make_message(_c.Codes.SEND_TO_USER, "my message"))
+		structured = MessageModel.from_json(MessageModel(-1, None, None, "my message", user, user, code="PLUGIN_CODE").to_json())  # noqa
+
+		assert _c.take_code(legacy) == _c.Codes.SEND_TO_USER.name and legacy.body == "my message"
+		assert _c.take_code(legacy) == _c.Codes.SEND_TO_USER.name and legacy.body == "my message"
+		assert _c.take_code(structured) == "PLUGIN_CODE" and structured.body == "my message"
@@ -16,6 +16,7 @@ import time
 import pytest
 
 from chatbox.app.core.model.message import MessageDestination, ServerMessageModel, MessageRole
+from chatbox.app.core.tcp.framing import FrameReader
 from chatbox.app.core.tcp.network_socket import NetworkSocket
 from chatbox.app import constants
 
@@ -167,7 +168,7 @@ class TestNetworkSocket:
         data_dummy = "hello world"
         data_received: dict = {"data": None}
 
-        server_t = threading.Thread(target=TCPSocketMock.mock_server_listen_once, args=(server.socket, server.receive, data_received), daemon=True)
+        server_t = threading.Thread(target=TCPSocketMock.mock_server_listen_once, args=(server.socket, lambda connection: server.receive(connection, FrameReader()), data_received), daemon=True)
         client_t = threading.Thread(target=TCPSocketMock.socket_send, args=(_socket, data_dummy), daemon=True)
 
         server_t.start()
@@ -0,0 +1,214 @@
+"""
+How to run these test
+
+# only this module
+pytest -rP -k tcp_outbound
+pytest -rP  tests/tcp/test_outbound.py::TestOutbound
+#  run other modules
+pytest -rP -m tcp_outbound
+pytest -rP -m tcp
+
+"""
+import socket
+import time
+import types
+import uuid
+
+import pytest
+
+from chatbox.app.core.model.message import MessageDestination, MessageRole, ServerMessageModel
+from chatbox.app.core.tcp import objects
+from chatbox.app.core.tcp.codec import CODECS, JSON_CODEC
+from chatbox.app.core.tcp.framing import FRAME_FLAG_COMPRESSED, Framing, compress_payload, encode_frame
+from chatbox.app.core.tcp.outbound import OfflineStore, OutboundQueue, OutboundWriter, SlowConsumerPolicy
+
+
+def _client(connection: socket.socket, user_name: str = "user001") -> objects.Client:
+    client = objects.Client(connection, 1, 1, objects.Address("127.0.0.1", 1001), uuid.uuid4())
+    client.user_name = user_name
+    client.outbound = OutboundQueue(high_watermark=1000, low_watermark=300)
+    return client
+
+
+def _receive(connection: socket.socket, size: int, timeout: float = 2.0) -> bytes:
+    connection.settimeout(timeout)
+    data = b""
+    while len(data) < size:
+        chunk = connection.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+class TestOutbound:
+
+    @pytest.fixture
+    def pair(self):
+        server_side, client_side = socket.socketpair()
+        server_side.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        client_side.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        yield server_side, client_side
+        server_side.close()
+        client_side.close()
+
+    @pytest.fixture
+    def writer(self):
+        server = types.SimpleNamespace(server_listening=True)
+        yield lambda policy: OutboundWriter(server, policy)  # noqa
+        server.server_listening = False
+
+    @pytest.mark.tcp_outbound
+    @pytest.mark.tcp
+    def test_advance_resumes_partial_write(self):
+        queue = OutboundQueue()
+        for frame in (b"aaaa", b"bbbb", b"cc"):
+            queue.append(frame)
+
+        queue.advance(6)
+
+        assert queue.size == 4 and len(queue) == 2 and queue.offset == 2
+        assert [bytes(buffer) for buffer in queue.buffers()] == [b"bb", b"cc"]
+
+    @pytest.mark.tcp_outbound
+    @pytest.mark.tcp
+    def test_drop_oldest_keeps_partly_written_head(self):
+        queue = OutboundQueue()
+        for frame in (b"aaaa", b"bbbb", b"cccc", b"dddd"):
+            queue.append(frame)
+        queue.advance(1)
+
+        queue.drop_oldest(until=7)
+
+        assert list(queue.frames) == [b"aaaa", b"dddd"] and queue.size == 7 and queue.dropped == 2
+
+    @pytest.mark.tcp_outbound
+    @pytest.mark.tcp
+    def test_frames_written_in_order(self, pair, writer):
+        server_side, client_side = pair
+        outbound = writer(SlowConsumerPolicy.DROP_OLDEST)
+        client_conn = _client(server_side)
+        client_conn.outbound = OutboundQueue()
+        frames = [bytes([index]) * 500 for index in range(20)]
+
+        for frame in frames:
+            assert outbound.send(client_conn, frame) == len(frame)
+        outbound.start()
+
+        assert _receive(client_side, 500 * 20) == b"".join(frames)
+
+    @pytest.mark.tcp_outbound
+    @pytest.mark.tcp
+    def test_fan_out_wakes_the_writer_once(self, writer):
+        outbound = writer(SlowConsumerPolicy.DROP_OLDEST)
+        pairs = [socket.socketpair() for _ in range(3)]
+        clients = [_client(server_side, f"user{index:03}") for index, (server_side, _) in enumerate(pairs)]
+
+        for frame in (b"a" * 10, b"b" * 10):
+            for client_conn in clients:
+                outbound.send(client_conn, frame)
+
+        assert outbound._wakeup_receiver.recv(64, socket.MSG_PEEK) == b"\0"  # one wakeup for the whole batch
+        assert list(outbound._scheduled) == clients  # scheduled once, when their queue stopped being empty
+        outbound.start()
+        assert all(_receive(client_side, 20) == b"a" * 10 + b"b" * 10 for _, client_side in pairs)
+        for server_side, client_side in pairs:
+            server_side.close()
+            client_side.close()
+
+    @pytest.mark.tcp_outbound
+    @pytest.mark.tcp
+    def test_drop_oldest_policy(self, pair, writer):
+        server_side, _ = pair
+        outbound = writer(SlowConsumerPolicy.DROP_OLDEST)
+        client_conn = _client(server_side)
+
+        for _ in range(5):
+            outbound.send(client_conn, b"x" * 250)
+
+        assert client_conn.outbound.size <= client_conn.outbound.high_watermark
+        assert client_conn.outbound.dropped > 0 and not client_conn.outbound.closed
+
+    @pytest.mark.tcp_outbound
+    @pytest.mark.tcp
+    def test_disconnect_policy(self, pair, writer):
+        server_side, client_side = pair
+        outbound = writer(SlowConsumerPolicy.DISCONNECT)
+        client_conn = _client(server_side)
+
+        sent = [outbound.send(client_conn, b"x" * 400) for _ in range(3)]
+
+        assert sent == [400, 400, -1] and outbound.disconnected == 1
+        assert _receive(client_side, 1) == b""  # connection shut down
+
+    @pytest.mark.tcp_outbound
+    @pytest.mark.tcp
+    def test_offline_store_transcodes_for_the_framing_and_codec_of_the_new_login(self):
+        binary = CODECS["binary"]
+        owner = MessageDestination(1, "user001", MessageRole.USER)
+        message = ServerMessageModel.new_message(owner, owner, owner, "spilled while away")
+        store = OfflineStore()
+        store.spill("user001", Framing.LENGTH, encode_frame(binary.encode(message), Framing.LENGTH, flags=binary.ID))
+        store.spill("user001", Framing.LENGTH, encode_frame(binary.encode(message), Framing.LENGTH, flags=binary.ID))
+
+        legacy_frame, = store.take("user001", Framing.DELIMITER, JSON_CODEC, 1)
+        binary_frame, = store.take("user001", Framing.LENGTH, binary, 1024)
+
+        assert JSON_CODEC.decode(OfflineStore.frame_payload(legacy_frame, Framing.DELIMITER), ServerMessageModel) == message
+        assert binary_frame == encode_frame(binary.encode(message), Framing.LENGTH, flags=binary.ID)
+
+    @pytest.mark.tcp_outbound
+    @pytest.mark.tcp
+    def test_offline_store_inflates_for_a_new_login_without_compression(self):
+        owner = MessageDestination(1, "user001", MessageRole.USER)
+        message = ServerMessageModel.new_message(owner, owner, owner, "spilled while away " * 500)
+        payload = JSON_CODEC.encode(message)
+        compressed, flags = compress_payload(payload, Framing.LENGTH, 6)
+        store = OfflineStore()
+        store.spill("user001", Framing.LENGTH, encode_frame(compressed, Framing.LENGTH, flags=JSON_CODEC.ID | flags))
+        store.spill("user001", Framing.LENGTH, encode_frame(compressed, Framing.LENGTH, flags=JSON_CODEC.ID | flags))
+
+        compressed_frame, = store.take("user001", Framing.LENGTH, JSON_CODEC, 1, compression=6)
+        plain_frame, = store.take("user001", Framing.LENGTH, JSON_CODEC, 1024)
+
+        assert flags == FRAME_FLAG_COMPRESSED
+        assert compressed_frame == encode_frame(compressed, Framing.LENGTH, flags=JSON_CODEC.ID | flags)
+        assert plain_frame == encode_frame(payload, Framing.LENGTH, flags=JSON_CODEC.ID)
+
+    @pytest.mark.tcp_outbound
+    @pytest.mark.tcp
+    def test_spill_and_refill(self, pair, writer):
+        server_side, client_side = pair
+        outbound = writer(SlowConsumerPolicy.SPILL)
+        client_conn = _client(server_side)
+        client_conn.set_logged_in()
+        client_conn.reader.framing = Framing.LENGTH
+        frames = [encode_frame(bytes([65 + index]) * 200, Framing.LENGTH) for index in range(8)]
+
+        sent = [outbound.send(client_conn, frame) for frame in frames]
+
+        assert sent.count(0) == 4 and len(outbound.offline_store) == 4
+        outbound.start()
+        assert _receive(client_side, sum(len(frame) for frame in frames)) == b"".join(frames)
+        assert len(outbound.offline_store) == 0 and not client_conn.outbound.congested
+
+    @pytest.mark.tcp_outbound
+    @pytest.mark.tcp
+    def test_slow_consumer_does_not_block_fan_out(self, pair, writer):
+        slow_side, _ = pair  # never read
+        outbound = writer(SlowConsumerPolicy.DROP_OLDEST)
+        outbound.start()
+        slow = _client(slow_side)
+        fast_side, fast_peer = socket.socketpair()
+        fast = _client(fast_side, "user002")
+
+        start = time.monotonic()
+        for _ in range(200):
+            outbound.send(slow, b"s" * 200)
+            outbound.send(fast, b"f" * 200)
+        elapsed = time.monotonic() - start
+
+        assert _receive(fast_peer, 200) == b"f" * 200
+        assert elapsed < 1.0 and slow.outbound.dropped > 0
+        fast_side.close()
+        fast_peer.close()
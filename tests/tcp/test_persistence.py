@@ -0,0 +1,160 @@
+"""
+How to run these test
+
+# only this module
+pytest -rP -k tcp_persistence
+pytest -rP  tests/tcp/test_persistence.py::TestMessageWriteBehind
+#  run other modules
+pytest -rP -m tcp_persistence
+pytest -rP -m tcp
+
+"""
+import threading
+
+import pytest
+
+from chatbox.app.constants import DIR_DATABASE_SCHEMA_MAIN
+from chatbox.app.core.model.message import MessageDestination, MessageRole, ServerMessageModel
+from chatbox.app.core.tcp.persistence import Durability, MessageWriteBehind
+from chatbox.app.database.orm.sqlite_conn import SQLITEConnection
+from chatbox.app.database.repository.message import MessageRepository
+from chatbox.app.database.repository.server_session import ServerSessionRepository
+
+
+def _message(body: str) -> ServerMessageModel:
+    owner = MessageDestination(1, "user001", MessageRole.USER)
+    return ServerMessageModel.new_message(owner, owner, MessageDestination(2, "user002", MessageRole.USER), body)
+
+
+class FailingMessageRepository(MessageRepository):
+    failures: int = 1
+    error: Exception | None = None
+
+    def create_new_messages(self, session_id: int, messages) -> int:
+        if self.failures:
+            self.failures -= 1
+            if self.error is not None:
+                raise self.error
+            return -1
+        return super().create_new_messages(session_id, messages)
+
+
+class RecordingMessageRepository(MessageRepository):
+    """Records the threads writing the batches, the first batch waits for ``release``"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads: list[str] = []
+        self.writing: threading.Event = threading.Event()
+        self.release: threading.Event = threading.Event()
+
+    def create_new_messages(self, session_id: int, messages) -> int:
+        self.threads.append(threading.current_thread().name)
+        self.writing.set()
+        self.release.wait(timeout=5)
+        return super().create_new_messages(session_id, messages)
+
+
+class TestMessageWriteBehind:
+
+    @pytest.fixture
+    def database(self) -> SQLITEConnection:
+        database = SQLITEConnection(":memory:", schema=DIR_DATABASE_SCHEMA_MAIN)
+        yield database
+        database.connection.close()
+
+    @pytest.fixture
+    def session_id(self, database) -> int:
+        return ServerSessionRepository(database).get_session_or_create().id
+
+    @staticmethod
+    def _bodies(repository: MessageRepository) -> list[str]:
+        return [message.body for message in reversed(repository.get_many_received("user002"))]
+
+    @pytest.mark.tcp_persistence
+    @pytest.mark.tcp
+    def test_create_new_messages_in_one_batch(self, database, session_id):
+        repository = MessageRepository(database)
+
+        created = repository.create_new_messages(session_id, [_message(f"message {index}") for index in range(10)])
+
+        assert created == 10 and self._bodies(repository) == [f"message {index}" for index in range(10)]
+        assert repository.create_new_messages(session_id, []) == 0
+
+    @pytest.mark.tcp_persistence
+    @pytest.mark.tcp
+    def test_batches_by_size_and_close_flushes(self, database, session_id):
+        repository = MessageRepository(database)
+        writer = MessageWriteBehind(repository, session_id, threading.Lock(), Durability.ASYNC, batch_size=4, window=60)
+
+        for index in range(10):
+            assert writer.submit(_message(f"message {index}")) is None
+        assert len(writer) == 10 and self._bodies(repository) == []
+
+        writer.close()
+
+        assert self._bodies(repository) == [f"message {index}" for index in range(10)]
+        assert writer.stats() == {"pending": 0, "written": 10, "batches": 3, "dropped": 0}
+
+    @pytest.mark.tcp_persistence
+    @pytest.mark.tcp
+    def test_flush_durability_waits_for_commit(self, database, session_id):
+        repository = MessageRepository(database)
+        writer = MessageWriteBehind(repository, session_id, threading.Lock(), Durability.FLUSH, window=60)
+        writer.start()
+
+        committed = [writer.submit(_message(f"message {index}")) for index in range(5)]
+
+        assert all(event.wait(timeout=2) for event in committed)
+        assert self._bodies(repository) == [f"message {index}" for index in range(5)]
+        writer.close()
+
+    @pytest.mark.tcp_persistence
+    @pytest.mark.tcp
+    def test_failed_batch_is_retried_and_bounded(self, database, session_id):
+        repository = FailingMessageRepository(database)
+        writer = MessageWriteBehind(repository, session_id, threading.Lock(), Durability.ASYNC, batch_size=2, max_pending=3)
+
+        for index in range(3):
+            writer.submit(_message(f"message {index}"))
+        assert writer.flush() == 0 and len(writer) == 3
+
+        writer.submit(_message("message 3"))  # full: the oldest is dropped, the caller writes nothing
+        assert len(writer) == 3 and writer.stats()["dropped"] == 1
+        writer.flush()
+
+        assert self._bodies(repository) == [f"message {index}" for index in range(1, 4)] and len(writer) == 0
+
+    @pytest.mark.tcp_persistence
+    @pytest.mark.tcp
+    def test_full_writer_is_woken_instead_of_writing_from_the_caller(self, database, session_id):
+        repository = RecordingMessageRepository(database)
+        writer = MessageWriteBehind(repository, session_id, threading.Lock(), Durability.ASYNC, batch_size=2, window=60, max_pending=4)
+        writer.start()
+        writer.submit(_message("message 0"))
+        writer.submit(_message("message 1"))
+        assert repository.writing.wait(timeout=2)  # the writer is stuck on the first batch
+
+        submitter = threading.Thread(target=lambda: [writer.submit(_message(f"message {index}")) for index in range(2, 8)])
+        submitter.start()
+        submitter.join(timeout=1)
+
+        assert not submitter.is_alive() and repository.threads == ["message-writer"]
+        assert len(writer) == 4 and writer.stats()["dropped"] == 2
+        repository.release.set()
+        writer.close()
+        assert writer.stats()["written"] == 6
+
+    @pytest.mark.tcp_persistence
+    @pytest.mark.tcp
+    def test_batch_raising_does_not_stop_the_writer(self, database, session_id):
+        repository = FailingMessageRepository(database)
+        repository.error = RuntimeError("database is locked")
+        writer = MessageWriteBehind(repository, session_id, threading.Lock(), Durability.FLUSH, window=0.01)
+        writer.start()
+
+        committed = writer.submit(_message("message 0"))
+
+        assert committed.wait(timeout=2) and writer._thread.is_alive()
+        assert self._bodies(repository) == ["message 0"]
+        writer.close()
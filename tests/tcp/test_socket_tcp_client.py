@@ -14,16 +14,17 @@ import time
 
 import pytest
 
-from chatbox.app import core
+from chatbox.app import constants, core
 from chatbox.app.core.model.message import MessageRole, MessageDestination, ServerMessageModel
+from chatbox.app.core.tcp.codec import CODECS
 
-from tests.conftest import BaseRunner, UNITTEST_HOST, UNITTEST_PORT
+from tests.conftest import BaseRunner, TCPSocketMock, UNITTEST_HOST, UNITTEST_PORT
 
 
 class TestSocketTCPClient(BaseRunner):
 
 	def _get_client_connection_from_server(self) -> core.objects.Client:
-		time.sleep(1)
+		TCPSocketMock.wait_for(lambda: len(self.tcp_server.clients_identified) > 0, timeout=5.)
 		return self.tcp_server.clients_identified[list(self.tcp_server.clients_identified.keys())[0]]
 
 	@pytest.mark.tcp_client
@@ -113,19 +114,31 @@ class TestSocketTCPClient(BaseRunner):
 	@pytest.mark.tcp_client
 	def test_auth_login_success(self, tcp_client_mock):
 		client: core.SocketTCPClient = tcp_client_mock(user_name="myUserName")
-		time.sleep(1.2)
+		TCPSocketMock.wait_for(lambda: client.state == core.objects.Client.LOGGED, timeout=5.)
 
 		assert client.id == self.tcp_server.clients_identified.get(client.id, None).user.id
 		assert client.server_session == str(self.tcp_server.server_session.session_id)
 		assert client.state == core.objects.Client.LOGGED
 
+	@pytest.mark.auth_client
+	@pytest.mark.auth
+	@pytest.mark.tcp_client
+	def test_auth_login_agrees_codec(self, tcp_client_mock):
+		client: core.SocketTCPClient = tcp_client_mock(user_name="myCodecUser")
+		TCPSocketMock.wait_for(lambda: client.state == core.objects.Client.LOGGED, timeout=5.)
+
+		assert client.codec is CODECS[constants.SOCKET_CODECS[0]]
+		assert self.tcp_server.clients_identified.get(client.id).codec is client.codec
+		assert client.compression == constants.SOCKET_COMPRESSION_LEVEL
+		assert self.tcp_server.clients_identified.get(client.id).compression == client.compression
+
 	@pytest.mark.auth_client
 	@pytest.mark.auth
 	@pytest.mark.tcp_client
 	def test_exception_raised_is_server_is_unreachable(self, monkeypatch):
 		tcp_client_1: core.SocketTCPClient = core.SocketTCPClient(host=UNITTEST_HOST, port=UNITTEST_PORT, user_name='user001', password='1234')
 
-		monkeypatch.setattr(tcp_client_1, "receive", lambda *args, **kwargs: None)
+		monkeypatch.setattr(tcp_client_1, "receive_frame", lambda *args, **kwargs: None)
 		tcp_client_thread = threading.Thread(target=tcp_client_1, daemon=True)
 		tcp_client_thread.start()
 		time.sleep(.5)
@@ -15,11 +15,14 @@ import threading
 
 import pytest
 
-from chatbox.app import core
+from chatbox.app import constants, core
 from chatbox.app.constants import chat_internal_codes as _c
 from chatbox.app.core.components.server.controller.auth import ControllerAuthUser
 from chatbox.app.core.model.message import ServerMessageModel, MessageRole, MessageDestination, MessageModel
 from chatbox.app.core.security.objects import Access
+from chatbox.app.core.tcp.codec import CODECS, JSON_CODEC
+from chatbox.app.core.tcp.framing import FRAME_FLAG_COMPRESSED, FrameReader, Framing
+from chatbox.app.core.tcp.outbound import OutboundQueue
 
 from tests.conftest import BaseRunner, TCPSocketMock, UNITTEST_HOST, UNITTEST_PORT
 
@@ -239,6 +242,60 @@ class TestSocketTCPServer(BaseRunner):
 		assert self.tcp_server.router.controller_auth._login(logging_code_type=_c.Codes.LOGIN, client_conn=client_conn, payload=json.dumps(user_info)) is Access.DENIED
 
 
+	@pytest.mark.auth_server
+	@pytest.mark.auth
+	@pytest.mark.tcp_server
+	def test_auth_login_with_session_token_skips_password(self, socket_create):
+		logged_client, _ = TCPSocketMock.login_user(self.tcp_server, socket_create)
+		token = logged_client.session_token
+
+		granted = []
+		for _ in range(2):  # tokens are single use
+			_sock = socket_create()
+			client_conn: core.objects.Client = self.tcp_server.create_client_object(_sock, core.objects.Address(*_sock.getsockname()))
+			self.tcp_server.clients_unidentified[client_conn.identifier] = client_conn
+			user_info: core.objects.LoginInfo = {"id": None, "user_name": "user001", "password": None, "user_id": None, "token": token}
+			granted.append(self.tcp_server.router.controller_auth._login(logging_code_type=_c.Codes.LOGIN, client_conn=client_conn, payload=json.dumps(user_info)))
+
+		assert granted == [Access.GRANTED, Access.DENIED]
+
+	@pytest.mark.auth_server
+	@pytest.mark.auth
+	@pytest.mark.tcp_server
+	def test_auth_login_false_if_session_token_not_valid(self, socket_create):
+		logged_client, _ = TCPSocketMock.login_user(self.tcp_server, socket_create)
+		token = logged_client.session_token
+		_sock = socket_create()
+		client_conn: core.objects.Client = self.tcp_server.create_client_object(_sock, core.objects.Address(*_sock.getsockname()))
+		self.tcp_server.clients_unidentified[client_conn.identifier] = client_conn
+
+		for user_name, _token in (("user001", token[:-1] + ("1" if token.endswith("0") else "0")), ("user002", token), ("user001", "1.9999999999.nonce.signature")):
+			user_info: core.objects.LoginInfo = {"id": None, "user_name": user_name, "password": None, "user_id": None, "token": _token}
+			assert self.tcp_server.router.controller_auth._login(logging_code_type=_c.Codes.LOGIN, client_conn=client_conn, payload=json.dumps(user_info)) is Access.DENIED
+
+	@pytest.mark.auth_server
+	@pytest.mark.auth
+	@pytest.mark.tcp_server
+	def test_auth_login_false_if_user_in_session_without_password(self, socket_create):
+		TCPSocketMock.login_user(self.tcp_server, socket_create)
+		_sock = socket_create()
+		client_conn: core.objects.Client = self.tcp_server.create_client_object(_sock, core.objects.Address(*_sock.getsockname()))
+		self.tcp_server.clients_unidentified[client_conn.identifier] = client_conn
+		user_info: core.objects.LoginInfo = {"id": None, "user_name": "user001", "password": None, "user_id": None}
+
+		assert self.tcp_server.router.controller_auth._login(logging_code_type=_c.Codes.LOGIN, client_conn=client_conn, payload=json.dumps(user_info)) is Access.DENIED
+
+	@pytest.mark.auth_server
+	@pytest.mark.auth
+	@pytest.mark.tcp_server
+	def test_auth_login_issues_session_token_revoked_on_logout(self, socket_create):
+		client_conn, _ = TCPSocketMock.login_user(self.tcp_server, socket_create)
+		token = client_conn.session_token
+
+		assert self.tcp_server.session_tokens.verify(token) == client_conn.user.id
+		self.tcp_server.router.controller_auth.logout(client_conn, _c.make_message(_c.Codes.LOGOUT, json.dumps({"id": client_conn.user.id})))
+		assert self.tcp_server.session_tokens.verify(token) is None
+
 	@pytest.mark.auth_server
 	@pytest.mark.auth
 	@pytest.mark.tcp_server
@@ -277,6 +334,178 @@ class TestSocketTCPServer(BaseRunner):
 
 		assert _c.code_in(_c.Codes.IDENTIFICATION_REQUIRED, messages[0]) is _c.Codes.IDENTIFICATION_REQUIRED
 
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp_core
+	@pytest.mark.tcp
+	def test_agree_codec_needs_length_framing(self, socket_create):
+		_sock = socket_create()
+		client_conn: core.objects.Client = self.tcp_server.create_client_object(_sock, core.objects.Address(*_sock.getsockname()))
+
+		assert self.tcp_server.agree_codec(client_conn, ["binary", "json"]) is JSON_CODEC  # legacy framing, no flags
+		client_conn.reader.framing = Framing.LENGTH
+		assert self.tcp_server.agree_codec(client_conn, ["unknown", "binary", "json"]) is CODECS["binary"]
+		assert self.tcp_server.agree_codec(client_conn, None) is JSON_CODEC and client_conn.codec is JSON_CODEC
+
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp_core
+	@pytest.mark.tcp
+	def test_agree_compression_needs_length_framing(self, socket_create):
+		_sock = socket_create()
+		client_conn: core.objects.Client = self.tcp_server.create_client_object(_sock, core.objects.Address(*_sock.getsockname()))
+
+		assert self.tcp_server.agree_compression(client_conn, ["zlib"]) is None and client_conn.compression is None
+		client_conn.reader.framing = Framing.LENGTH
+		assert self.tcp_server.agree_compression(client_conn, ["unknown", "zlib"]) == "zlib"
+		assert client_conn.compression == constants.SOCKET_COMPRESSION_LEVEL
+		assert self.tcp_server.agree_compression(client_conn, None) is None and client_conn.compression is None
+
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp_core
+	@pytest.mark.tcp
+	def test_send_message_compresses_large_payloads(self):
+		server_end, client_end = socket.socketpair()
+		client_conn = self.tcp_server.create_client_object(server_end, core.objects.Address(UNITTEST_HOST, 0))
+		client_conn.reader.framing = Framing.LENGTH
+		client_conn.compression = constants.SOCKET_COMPRESSION_LEVEL
+		items = [{"id": index, "name": f"channel{index:04}", "owner_id": 1} for index in range(500)]
+
+		with server_end, client_end:
+			self.tcp_server.send_to_client(client_conn, _c.make_message(_c.Codes.CHANNEL_LIST_ALL, json.dumps(items)))
+			self.tcp_server.send_to_client(client_conn, "small")
+			reader = FrameReader()
+			reader.framing = Framing.LENGTH
+			frame_large, flags_large = reader.read_frame(client_end), reader.flags
+			frame_small, flags_small = reader.read_frame(client_end), reader.flags
+
+		message = self.tcp_server.decode_model(frame_large, flags_large, ServerMessageModel)
+		assert flags_large & FRAME_FLAG_COMPRESSED and len(frame_large) < len(json.dumps(items))
+		assert json.loads(_c.get_message(_c.Codes.CHANNEL_LIST_ALL, message.body)) == items
+		assert not flags_small & FRAME_FLAG_COMPRESSED
+		assert self.tcp_server.decode_model(frame_small, flags_small, ServerMessageModel).body == "small"
+
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp_core
+	@pytest.mark.tcp
+	def test_stream_to_client_sends_chunks_as_produced(self):
+		server_end, client_end = socket.socketpair()
+		client_conn = self.tcp_server.create_client_object(server_end, core.objects.Address(UNITTEST_HOST, 0))
+		client_conn.reader.framing = Framing.LENGTH
+		reader = FrameReader()
+		reader.framing = Framing.LENGTH
+
+		def receive() -> tuple[_c.Codes, dict]:
+			body = self.tcp_server.decode_model(reader.read_frame(client_end), reader.flags, ServerMessageModel).body
+			return _c.code_scan(body), json.loads(_c.split_code(body)[1])
+
+		def chunks():
+			yield [{"id": 1}, {"id": 2}]
+			(begin_code, _), (_, first) = receive(), receive()  # on the wire before the next chunk is queried
+			assert begin_code is _c.Codes.STREAM_BEGIN and first["items"] == [{"id": 1}, {"id": 2}]
+			yield [{"id": 3}]
+			raise RuntimeError("query failed")
+
+		with server_end, client_end:
+			with pytest.raises(RuntimeError) as _:
+				self.tcp_server.stream_to_client(client_conn, _c.Codes.USER_LIST_ALL, chunks(), summary=lambda: {"cursor": {"before_id": 3}})
+			(_, chunk), (end_code, end) = receive(), receive()
+
+		assert chunk["items"] == [{"id": 3}] and end_code is _c.Codes.STREAM_END
+		assert end == {"stream": chunk["stream"], "count": 3, "cursor": {"before_id": 3}}
+
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp_core
+	@pytest.mark.tcp
+	def test_stream_to_client_waits_for_a_slow_client(self):
+		server_end, client_end = socket.socketpair()
+		server_end.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+		client_end.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+		client_conn = self.tcp_server.create_client_object(server_end, core.objects.Address(UNITTEST_HOST, 0))
+		client_conn.reader.framing = Framing.LENGTH
+		client_conn.outbound = OutboundQueue(high_watermark=4096, low_watermark=1024)
+		reader = FrameReader()
+		reader.framing = Framing.LENGTH
+		chunks = [[{"id": index, "name": "x" * 100}] * 5 for index in range(40)]  # ~25 KiB, six times the watermark
+
+		def receive() -> tuple[_c.Codes, dict]:
+			body = self.tcp_server.decode_model(reader.read_frame(client_end), reader.flags, ServerMessageModel).body
+			return _c.code_scan(body), json.loads(_c.split_code(body)[1])
+
+		with server_end, client_end:
+			streaming = threading.Thread(target=self.tcp_server.stream_to_client, args=(client_conn, _c.Codes.CHANNEL_LIST_ALL, iter(chunks)), daemon=True)
+			streaming.start()
+			assert not TCPSocketMock.wait_for(lambda: not streaming.is_alive(), timeout=.3)  # waits for the client to read
+			assert client_conn.outbound.size <= client_conn.outbound.high_watermark
+			messages = [receive() for _ in range(len(chunks) + 2)]
+			streaming.join(timeout=2)
+
+		assert client_conn.outbound.dropped == 0
+		assert [code for code, _ in messages] == [_c.Codes.STREAM_BEGIN, *[_c.Codes.STREAM_CHUNK] * len(chunks), _c.Codes.STREAM_END]
+		assert [body["items"] for _, body in messages[1:-1]] == chunks and messages[-1][1]["count"] == 200
+
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp_core
+	@pytest.mark.tcp
+	def test_broadcast_serializes_message_once(self, monkeypatch):
+		pairs = [socket.socketpair() for _ in range(4)]
+		clients = {}
+		for index, (server_end, _) in enumerate(pairs):
+			client_conn = self.tcp_server.create_client_object(server_end, core.objects.Address(UNITTEST_HOST, index))
+			client_conn.reader.framing = Framing.LENGTH if index % 2 else Framing.DELIMITER
+			clients[client_conn.identifier] = client_conn
+		monkeypatch.setattr(self.tcp_server, "clients_unidentified", clients)
+		monkeypatch.setattr(self.tcp_server, "clients_identified", core.objects.ClientIndex())
+
+		get_struct_calls = []
+		get_struct = ServerMessageModel.get_struct
+		monkeypatch.setattr(ServerMessageModel, "get_struct", lambda message: get_struct_calls.append(message) or get_struct(message))
+
+		owner = MessageDestination(1, "user001", role=MessageRole.USER)
+		message = ServerMessageModel.new_message(owner, owner, MessageDestination(1, "user001", role=MessageRole.ALL), "fan-out")
+		self.tcp_server.broadcast(message)
+		assert len(get_struct_calls) == 1
+
+		payload = JSON_CODEC.encode(message)
+		received = []
+		for index, (server_end, client_end) in enumerate(pairs):
+			with server_end, client_end:
+				reader = FrameReader()
+				reader.framing = Framing.LENGTH if index % 2 else Framing.DELIMITER
+				received.append(reader.read_frame(client_end))
+
+		assert received == [payload] * len(pairs)
+
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp_core
+	@pytest.mark.tcp
+	def test_broadcaster_stats_count_delivered_messages(self):
+		owner = MessageDestination(1, "user001", role=MessageRole.USER)
+		before = sum(shard["delivered"] for shard in self.tcp_server.broadcaster_stats())
+
+		for index in range(3):
+			self.tcp_server.client_messages.put(ServerMessageModel.new_message(owner, owner, owner, f"queued {index}"))
+		self.tcp_server.client_messages.join()
+
+		stats = self.tcp_server.broadcaster_stats()
+		assert len(stats) == constants.SOCKET_BROADCASTER_SHARDS
+		assert sum(shard["delivered"] for shard in stats) - before == 3 and all(shard["depth"] == 0 for shard in stats)
+
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp_core
+	@pytest.mark.tcp
+	def test_deliver_message_waits_for_the_commit_in_flush_durability(self, monkeypatch):
+		commits = {"committed": threading.Event(), "late": threading.Event()}
+		commits["committed"].set()
+		broadcasted = []
+		monkeypatch.setattr(constants, "DATABASE_MESSAGE_FLUSH_TIMEOUT", 0.01)
+		monkeypatch.setattr(self.tcp_server.message_writer, "submit", lambda message: commits[message.body])
+		monkeypatch.setattr(self.tcp_server, "broadcast", broadcasted.append)
+
+		owner = MessageDestination(1, "user001", role=MessageRole.USER)
+		for body in commits:
+			self.tcp_server.deliver_message(ServerMessageModel.new_message(owner, owner, owner, body))
+
+		assert [message.body for message in broadcasted] == ["committed"]
+
 	@pytest.mark.tcp_server
 	@pytest.mark.tcp_core
 	@pytest.mark.tcp
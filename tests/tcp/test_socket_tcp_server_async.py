@@ -0,0 +1,153 @@
+"""
+How to run these test
+
+# only this module
+pytest -rP -k tcp_server_async
+pytest -rP  tests/tcp/test_socket_tcp_server_async.py::TestAsyncSocketTCPServer
+#  run other modules
+pytest -rP -m tcp_server_async
+pytest -rP -m tcp
+
+"""
+import socket
+import threading
+
+import pytest
+
+from chatbox.app import core
+from chatbox.app.constants import chat_internal_codes as _c
+from chatbox.app.core.model.message import MessageRole, MessageDestination, MessageModel, ServerMessageModel
+
+from tests.conftest import BaseRunner, TCPSocketMock, UNITTEST_HOST, UNITTEST_PORT
+
+UNITTEST_PORT_ASYNC: int = UNITTEST_PORT + 2
+
+
+@pytest.fixture(scope="class")
+def create_tcp_server_async_mock(create_tcp_server_mock):
+	tcp_server: core.AsyncSocketTCPServer = core.AsyncSocketTCPServer(UNITTEST_HOST, UNITTEST_PORT_ASYNC, workers=4)
+	threading.Thread(target=tcp_server, daemon=True).start()
+	tcp_server.server_started.wait(timeout=2)
+
+	yield tcp_server
+
+	tcp_server.terminate()
+
+
+class TestAsyncSocketTCPServer(BaseRunner):
+
+	@pytest.fixture(autouse=True)
+	def _app_async(self, create_tcp_server_async_mock):
+		self.tcp_server_async: core.AsyncSocketTCPServer = create_tcp_server_async_mock
+
+	@staticmethod
+	def _ping(_sock: socket.socket) -> None:
+		sender = MessageDestination(1234, "user0001", role=MessageRole.USER)
+		to = MessageDestination(1234, "SERVER", role=MessageRole.SERVER)
+		TCPSocketMock.socket_send(_sock, MessageModel.new_message(sender, to, "ping").to_json())
+
+	@pytest.mark.tcp_server_async
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_legacy_clients_are_routed(self, socket_create):
+		sockets: list[socket.socket] = TCPSocketMock.connect_multiple_clients(socket_create, self.tcp_server_async.address, total_clients=5)
+		for _sock in sockets:
+			self._ping(_sock)
+
+		messages = [TCPSocketMock.socket_receive(_sock) for _sock in sockets]
+
+		assert all(_c.code_in(_c.Codes.IDENTIFICATION_REQUIRED, message) for message in messages)
+		assert len(self.tcp_server_async.writers) >= len(sockets)
+
+	@pytest.mark.tcp_server_async
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_slow_route_does_not_stall_the_loop(self, socket_create, monkeypatch):
+		blocked, release = threading.Event(), threading.Event()
+		sockets: list[socket.socket] = TCPSocketMock.connect_multiple_clients(socket_create, self.tcp_server_async.address, total_clients=4)
+		slow_address = core.objects.Address(*sockets[0].getsockname())
+		route = self.tcp_server_async.router.route
+
+		def slow_route(client_conn, message):
+			if client_conn.address == slow_address:
+				blocked.set()
+				release.wait(timeout=5)
+			return route(client_conn, message)
+
+		monkeypatch.setattr(self.tcp_server_async.router, "route", slow_route)
+		self._ping(sockets[0])
+		assert blocked.wait(timeout=2)
+		try:
+			for _sock in sockets[1:]:
+				_sock.settimeout(1)  # answered well before the slow route is released
+				self._ping(_sock)
+			messages = [TCPSocketMock.socket_receive(_sock) for _sock in sockets[1:]]
+		finally:
+			release.set()
+
+		assert all(_c.code_in(_c.Codes.IDENTIFICATION_REQUIRED, message) for message in messages)
+		assert _c.code_in(_c.Codes.IDENTIFICATION_REQUIRED, TCPSocketMock.socket_receive(sockets[0]))
+
+	@pytest.mark.tcp_server_async
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_broadcast_from_another_thread(self, socket_create):
+		_sock: socket.socket = TCPSocketMock.connect_multiple_clients(socket_create, self.tcp_server_async.address, total_clients=1)[0]
+		self._ping(_sock)
+		TCPSocketMock.socket_receive(_sock)
+
+		owner = MessageDestination(identifier=1, name="user0001", role=MessageRole.USER)
+		send_all = MessageDestination(identifier=1, name="user0001", role=MessageRole.ALL)
+		message = ServerMessageModel.new_message(owner, owner, send_all, "message_async")
+		sender_client = next(iter(self.tcp_server_async.clients_unidentified.values()))
+		self.tcp_server_async.add_message_to_broadcast(sender_client, message)
+
+		assert "message_async" in TCPSocketMock.socket_receive(_sock)
+
+	@pytest.mark.tcp_server_async
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_client_disconnect_is_removed(self, socket_create):
+		_sock: socket.socket = TCPSocketMock.connect_multiple_clients(socket_create, self.tcp_server_async.address, total_clients=1)[0]
+		self._ping(_sock)
+		TCPSocketMock.socket_receive(_sock)
+		address = core.objects.Address(*_sock.getsockname())
+
+		def connected() -> bool:
+			return any(client.address == address for client in list(self.tcp_server_async.clients_unidentified.values()))
+
+		assert connected()
+		_sock.close()
+		assert TCPSocketMock.wait_for(lambda: not connected())
+
+	@pytest.mark.tcp_server_async
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_client_login_with_length_framing(self, tcp_client_mock):
+		client: core.SocketTCPClient = tcp_client_mock(port=UNITTEST_PORT_ASYNC)
+
+		assert TCPSocketMock.wait_for(lambda: len(self.tcp_server_async.clients_identified) == 1)
+		client_conn = next(iter(self.tcp_server_async.clients_identified.values()))
+		assert client_conn.reader.framing is client.reader.framing is core.tcp.framing.Framing.LENGTH
+		assert client_conn.connection.getpeername() == client.socket.getsockname()
+		# LOGIN_SUCCESS is sent once the identifier became the user id
+		assert TCPSocketMock.wait_for(lambda: client.state == core.objects.Client.LOGGED, timeout=5.)
+		assert client.session_token and self.tcp_server_async.session_tokens.verify(client.session_token) == client_conn.user.id
+		assert client_conn.memory_id in self.tcp_server_async.writers
+
+	@pytest.mark.tcp_server_async
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_slow_reader_is_bounded_by_the_outbound_queue(self, socket_create):
+		_sock: socket.socket = TCPSocketMock.connect_multiple_clients(socket_create, self.tcp_server_async.address, total_clients=1)[0]
+		self._ping(_sock)
+		TCPSocketMock.socket_receive(_sock)
+		client_conn = next(client for client in list(self.tcp_server_async.clients_unidentified.values())
+						   if client.connection.getpeername() == _sock.getsockname())
+		frame = b"x" * 64 * 1024
+
+		for _ in range(200):  # 12.5 MiB never read by the client
+			self.tcp_server_async.send_frame_to_client(client_conn, frame)
+
+		assert client_conn.outbound.size <= client_conn.outbound.high_watermark
+		assert client_conn.outbound.dropped > 0 and not client_conn.outbound.closed
@@ -0,0 +1,151 @@
+"""
+How to run these test
+
+# only this module
+pytest -rP -k tcp_server_selector
+pytest -rP  tests/tcp/test_socket_tcp_server_selector.py::TestSocketTCPServerSelector
+#  run other modules
+pytest -rP -m tcp_server_selector
+pytest -rP -m tcp
+
+"""
+import socket
+import threading
+
+import pytest
+
+from chatbox.app import core
+from chatbox.app.constants import chat_internal_codes as _c
+from chatbox.app.core.model.message import MessageRole, MessageDestination, MessageModel
+
+from tests.conftest import BaseRunner, TCPSocketMock, UNITTEST_HOST, UNITTEST_PORT
+
+UNITTEST_PORT_SELECTOR: int = UNITTEST_PORT + 1
+
+
+@pytest.fixture(scope="class")
+def create_tcp_server_selector_mock(create_tcp_server_mock):
+	tcp_server: core.SocketTCPServerSelector = core.SocketTCPServerSelector(UNITTEST_HOST, UNITTEST_PORT_SELECTOR, loops=2)
+	threading.Thread(target=tcp_server, daemon=True).start()
+	tcp_server.server_started.wait(timeout=2)
+
+	yield tcp_server
+
+	tcp_server.terminate()
+
+
+class TestSocketTCPServerSelector(BaseRunner):
+
+	@pytest.fixture(autouse=True)
+	def _app_selector(self, create_tcp_server_selector_mock):
+		self.tcp_server_selector: core.SocketTCPServerSelector = create_tcp_server_selector_mock
+
+	@staticmethod
+	def _ping(_sock: socket.socket) -> None:
+		sender = MessageDestination(1234, "user0001", role=MessageRole.USER)
+		to = MessageDestination(1234, "SERVER", role=MessageRole.SERVER)
+		TCPSocketMock.socket_send(_sock, MessageModel.new_message(sender, to, "ping").to_json())
+
+	@pytest.mark.tcp_server_selector
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_io_mode(self):
+		assert self.tcp_server_selector.IO_MODE == "epoll"
+		assert core.SocketTCPServer.IO_MODE == "thread"
+
+	@pytest.mark.tcp_server_selector
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_clients_are_spread_across_loops(self, socket_create):
+		sockets: list[socket.socket] = TCPSocketMock.connect_multiple_clients(socket_create, self.tcp_server_selector.address, total_clients=6)
+		for _sock in sockets:
+			self._ping(_sock)
+
+		messages = [TCPSocketMock.socket_receive(_sock) for _sock in sockets]
+
+		assert all(_c.code_in(_c.Codes.IDENTIFICATION_REQUIRED, message) for message in messages)
+		assert all(len(loop) >= 3 for loop in self.tcp_server_selector.loops)
+
+	@pytest.mark.tcp_server_selector
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_slow_route_does_not_stall_the_loop(self, socket_create, monkeypatch):
+		blocked, release = threading.Event(), threading.Event()
+		sockets: list[socket.socket] = TCPSocketMock.connect_multiple_clients(socket_create, self.tcp_server_selector.address, total_clients=7)
+		slow_address = core.objects.Address(*sockets[0].getsockname())
+		route = self.tcp_server_selector.router.route
+
+		def slow_route(client_conn, message):
+			if client_conn.address == slow_address:
+				blocked.set()
+				release.wait(timeout=5)
+			return route(client_conn, message)
+
+		monkeypatch.setattr(self.tcp_server_selector.router, "route", slow_route)
+		self._ping(sockets[0])
+		assert blocked.wait(timeout=2)
+		try:
+			for _sock in sockets[1:]:  # some share the loop of the blocked client
+				_sock.settimeout(1)  # answered well before the slow route is released
+				self._ping(_sock)
+			messages = [TCPSocketMock.socket_receive(_sock) for _sock in sockets[1:]]
+		finally:
+			release.set()
+
+		assert all(_c.code_in(_c.Codes.IDENTIFICATION_REQUIRED, message) for message in messages)
+		assert _c.code_in(_c.Codes.IDENTIFICATION_REQUIRED, TCPSocketMock.socket_receive(sockets[0]))
+
+	@pytest.mark.tcp_server_selector
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_idle_client_releases_reader_buffer(self, socket_create):
+		_sock: socket.socket = TCPSocketMock.connect_multiple_clients(socket_create, self.tcp_server_selector.address, total_clients=1)[0]
+		self._ping(_sock)
+		TCPSocketMock.socket_receive(_sock)
+
+		client_conn = next(client for client in self.tcp_server_selector.clients_unidentified.values()
+						   if client.connection.getpeername() == _sock.getsockname())
+
+		assert client_conn.reader.capacity == 0
+
+	@pytest.mark.tcp_server_selector
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_client_disconnect_is_removed(self, socket_create):
+		_sock: socket.socket = TCPSocketMock.connect_multiple_clients(socket_create, self.tcp_server_selector.address, total_clients=1)[0]
+		self._ping(_sock)
+		TCPSocketMock.socket_receive(_sock)
+		address = core.objects.Address(*_sock.getsockname())
+
+		def connected() -> bool:
+			return any(client.address == address for client in list(self.tcp_server_selector.clients_unidentified.values()))
+
+		assert connected()
+		_sock.close()
+		assert TCPSocketMock.wait_for(lambda: not connected())
+
+	@pytest.mark.tcp_server_selector
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_client_login_with_length_framing(self, tcp_client_mock):
+		client: core.SocketTCPClient = tcp_client_mock(port=UNITTEST_PORT_SELECTOR)
+
+		assert TCPSocketMock.wait_for(lambda: len(self.tcp_server_selector.clients_identified) == 1)
+		client_conn = next(iter(self.tcp_server_selector.clients_identified.values()))
+		assert client_conn.reader.framing is client.reader.framing is core.tcp.framing.Framing.LENGTH
+		assert client_conn.connection.getpeername() == client.socket.getsockname()
+
+	@pytest.mark.tcp_server_selector
+	@pytest.mark.tcp_server
+	@pytest.mark.tcp
+	def test_logged_client_disconnect_leaves_its_loop(self, tcp_client_mock):
+		client: core.SocketTCPClient = tcp_client_mock(port=UNITTEST_PORT_SELECTOR)
+		assert TCPSocketMock.wait_for(lambda: client.state == core.objects.Client.LOGGED, timeout=5.)
+		client_conn = next(iter(self.tcp_server_selector.clients_identified.values()))
+
+		def in_loops() -> bool:
+			return any(client_conn.memory_id in loop.clients for loop in self.tcp_server_selector.loops)
+
+		assert in_loops()  # still found once the identifier became the user id
+		client.terminate()
+		assert TCPSocketMock.wait_for(lambda: not in_loops())
@@ -0,0 +1,101 @@
+"""
+How to run these test
+
+# only this module
+pytest -rP -k tcp_subscribers
+pytest -rP  tests/tcp/test_subscribers.py::TestSubscriberRegistry
+#  run other modules
+pytest -rP -m tcp_subscribers
+pytest -rP -m tcp
+
+"""
+import socket
+import threading
+
+import pytest
+
+from chatbox.app.core.model.message import MessageDestination, MessageRole, ServerMessageModel
+from chatbox.app.core.tcp.cluster import ClusterBus
+from chatbox.app.core.tcp.subscribers import SubscriberRegistry
+from tests.tcp.test_client_index import _client
+
+
+class SubscribersRecorder:
+    def __init__(self):
+        self.subscribers: SubscriberRegistry = SubscriberRegistry()
+        self.messages: list[ServerMessageModel] = []
+        self.received: threading.Event = threading.Event()
+        self.cluster_bus = None
+
+    def broadcast(self, message: ServerMessageModel) -> None:
+        self.messages.append(message)
+        self.received.set()
+
+
+class TestSubscriberRegistry:
+
+    @pytest.mark.tcp_subscribers
+    @pytest.mark.tcp
+    def test_load_set_and_lookup(self):
+        registry = SubscriberRegistry()
+        registry.load(MessageRole.GROUP, {1: {1, 2}, 2: set()})
+        registry.load(MessageRole.CHANNEL, {1: [3]})
+
+        assert registry.get(MessageRole.GROUP, 1) == {1, 2} and registry.get(MessageRole.CHANNEL, 1) == {3}
+        assert registry.is_subscriber(MessageRole.GROUP, 1, 2) and not registry.is_subscriber(MessageRole.CHANNEL, 1, 2)
+        assert len(registry) == 2  # groups without members are not kept
+
+        snapshot = registry.get(MessageRole.GROUP, 1)
+        registry.set(MessageRole.GROUP, 1, [2, 4])
+        assert snapshot == {1, 2} and registry.get(MessageRole.GROUP, 1) == {2, 4}
+
+        registry.set(MessageRole.CHANNEL, 1, ())
+        registry.load(MessageRole.GROUP, {})
+        assert len(registry) == 0 and registry.get(MessageRole.CHANNEL, 1) == frozenset()
+
+    @pytest.mark.tcp_subscribers
+    @pytest.mark.tcp
+    def test_server_resolves_recipients_without_database_reads(self, create_database_mock, create_tcp_server_mock, monkeypatch):
+        tcp_server = create_tcp_server_mock
+        database = create_database_mock
+        clients = [_client(user_id, f"user00{user_id}") for user_id in (1, 2, 3)]
+        for client in clients:
+            tcp_server.clients_identified[client.identifier] = client
+        sent: list[str] = []
+        monkeypatch.setattr(tcp_server, "send_frame_to_client", lambda client_conn, frame: sent.append(client_conn.user_name))
+
+        with database.connection:
+            database.connection.executemany("INSERT INTO channel_member (user_id, channel_id) VALUES (?, 7)", [(1, ), (3, ), (9, )])
+        assert tcp_server.refresh_subscribers(MessageRole.CHANNEL, 7) == {1, 3, 9}
+
+        queries: list[str] = []
+        database.connection.set_trace_callback(queries.append)
+        try:
+            owner = MessageDestination(1, "user001", MessageRole.USER)
+            tcp_server.broadcast(ServerMessageModel.new_message(owner, owner, MessageDestination(7, "channel007", MessageRole.CHANNEL), "hello"))
+        finally:
+            database.connection.set_trace_callback(None)
+            with database.connection:
+                database.connection.execute("DELETE FROM channel_member")
+            for client in clients:
+                tcp_server.clients_identified.discard(client)
+                client.connection.close()
+
+        assert sorted(sent) == ["user001", "user003"] and queries == []
+        assert tcp_server.refresh_subscribers(MessageRole.CHANNEL, 7) == frozenset()
+
+    @pytest.mark.tcp_subscribers
+    @pytest.mark.tcp
+    def test_cluster_bus_replicates_subscribers(self):
+        server = SubscribersRecorder()
+        publisher_end, listener_end = socket.socketpair()
+        with publisher_end, listener_end:
+            ClusterBus(listener_end).attach(server)
+            publisher = ClusterBus(publisher_end)
+            publisher.publish_subscribers(MessageRole.GROUP, 3, {5, 6})
+            owner = MessageDestination(5, "user005", MessageRole.USER)
+            publisher.publish(ServerMessageModel.new_message(owner, owner, MessageDestination(3, "group003", MessageRole.GROUP), "hi"))
+
+            assert server.received.wait(timeout=2)  # frames are handled in order
+
+        assert server.subscribers.get(MessageRole.GROUP, 3) == {5, 6} and server.messages[0].body == "hi"